@@ -1,7 +1,11 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.utils import timezone
-from .models import User, Job, JobApplication, Review, Wallet, Transaction, Notification, HelperDocument
+from .ledger import post_transaction
+from .models import (
+    User, Job, JobApplication, Review, Wallet, Transaction, Notification, HelperDocument,
+    ArchivedJob, ArchivedJobApplication, ArchivedNotification, OutboxEvent, Task, UserImport, WalletCheckpoint
+)
 
 class CustomUserAdmin(UserAdmin):
     list_display = ('username', 'email', 'first_name', 'last_name', 'user_type', 'is_verified', 'created_at')
@@ -103,10 +107,23 @@ class WalletAdmin(admin.ModelAdmin):
     readonly_fields = ('created_at',)
 
 class TransactionAdmin(admin.ModelAdmin):
-    list_display = ('wallet', 'type', 'amount', 'reason', 'created_at')
+    list_display = ('wallet', 'type', 'amount', 'reason', 'running_balance', 'created_at')
     list_filter = ('type', 'reason')
     search_fields = ('wallet__user__username',)
-    readonly_fields = ('created_at',)
+    readonly_fields = ('running_balance', 'created_at')
+
+    def save_model(self, request, obj, form, change):
+        # New transactions go through the ledger so the wallet balance follows
+        if change:
+            super().save_model(request, obj, form, change)
+        else:
+            saved = post_transaction(obj.wallet, obj.type, obj.amount, obj.reason)
+            obj.pk, obj.running_balance, obj.created_at = saved.pk, saved.running_balance, saved.created_at
+            obj._state.adding = False
+
+class WalletCheckpointAdmin(admin.ModelAdmin):
+    list_display = ('wallet', 'as_of', 'balance')
+    search_fields = ('wallet__user__username',)
 
 class NotificationAdmin(admin.ModelAdmin):
     list_display = ('user', 'message_short', 'is_read', 'created_at')
@@ -118,11 +135,52 @@ class NotificationAdmin(admin.ModelAdmin):
         return obj.message[:50] + '...' if len(obj.message) > 50 else obj.message
     message_short.short_description = 'Message'
 
+class ArchivedJobAdmin(admin.ModelAdmin):
+    list_display = ('title', 'user', 'category', 'status', 'start_time', 'archived_at')
+    list_filter = ('category', 'status')
+    search_fields = ('title', 'user__username')
+    readonly_fields = ('archived_at',)
+
+class ArchivedJobApplicationAdmin(admin.ModelAdmin):
+    list_display = ('job_id', 'helper', 'status', 'created_at', 'archived_at')
+    list_filter = ('status',)
+    search_fields = ('helper__username',)
+    readonly_fields = ('archived_at',)
+
+class ArchivedNotificationAdmin(admin.ModelAdmin):
+    list_display = ('user', 'created_at', 'archived_at')
+    search_fields = ('user__username', 'message')
+    readonly_fields = ('archived_at',)
+
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ('event_type', 'attempts', 'created_at', 'processed_at')
+    list_filter = ('event_type', ('processed_at', admin.EmptyFieldListFilter))
+    readonly_fields = ('created_at', 'processed_at')
+
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('name', 'queue', 'status', 'attempts', 'run_at', 'finished_at')
+    list_filter = ('status', 'queue', 'name')
+    search_fields = ('name', 'last_error')
+    readonly_fields = ('created_at', 'finished_at', 'locked_by', 'locked_at')
+
+class UserImportAdmin(admin.ModelAdmin):
+    list_display = ('id', 'created_by', 'status', 'created_at', 'finished_at')
+    list_filter = ('status',)
+    exclude = ('data',)
+    readonly_fields = ('created_by', 'content_type', 'status', 'report', 'created_at', 'finished_at')
+
 admin.site.register(User, CustomUserAdmin)
 admin.site.register(Job, JobAdmin)
 admin.site.register(JobApplication, JobApplicationAdmin)
 admin.site.register(Review, ReviewAdmin)
 admin.site.register(Wallet, WalletAdmin)
 admin.site.register(Transaction, TransactionAdmin)
+admin.site.register(WalletCheckpoint, WalletCheckpointAdmin)
 admin.site.register(Notification, NotificationAdmin)
 admin.site.register(HelperDocument, HelperDocumentAdmin)
+admin.site.register(ArchivedJob, ArchivedJobAdmin)
+admin.site.register(ArchivedJobApplication, ArchivedJobApplicationAdmin)
+admin.site.register(ArchivedNotification, ArchivedNotificationAdmin)
+admin.site.register(OutboxEvent, OutboxEventAdmin)
+admin.site.register(Task, TaskAdmin)
+admin.site.register(UserImport, UserImportAdmin)
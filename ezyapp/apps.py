@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class EzyappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ezyapp'
+
+    def ready(self):
+        from . import handlers, signals, tasks  # noqa: F401
@@ -0,0 +1,119 @@
+"""
+Expiry and archival of settled rows.
+
+Open jobs whose time has passed are marked expired, and settled jobs, job
+applications and read notifications older than the retention window are
+moved into the archive tables. All moves run in bounded batches, each in its
+own transaction, so the sweeper never holds long locks on the hot tables.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .maptiles import invalidate_job_tiles
+from .models import (
+    Job, JobApplication, Notification,
+    ArchivedJob, ArchivedJobApplication, ArchivedNotification
+)
+
+SETTLED_JOB_STATUSES = ('completed', 'cancelled', 'expired')
+RESOLVED_APPLICATION_STATUSES = ('accepted', 'rejected')
+
+
+def get_retention_cutoff(retention_days=None, now=None):
+    if retention_days is None:
+        retention_days = getattr(settings, 'ARCHIVE_RETENTION_DAYS', 90)
+    return (now or timezone.now()) - timedelta(days=retention_days)
+
+
+def get_batch_size(batch_size=None):
+    return batch_size or getattr(settings, 'ARCHIVE_BATCH_SIZE', 500)
+
+
+def expire_jobs(now=None, batch_size=None):
+    """Mark open jobs whose end time (or start time, if none) has passed as expired."""
+    now = now or timezone.now()
+    batch_size = get_batch_size(batch_size)
+    stale = Job.objects.filter(status='open').filter(
+        Q(end_time__lt=now) | Q(end_time__isnull=True, start_time__lt=now)
+    )
+
+    expired = 0
+    while True:
+        rows = list(stale.values_list('pk', 'location_lat', 'location_long', 'category')[:batch_size])
+        if not rows:
+            return expired
+        pks = [row[0] for row in rows]
+        expired += Job.objects.filter(pk__in=pks, status='open').update(status='expired')
+        invalidate_job_tiles(row[1:] for row in rows)
+
+
+def _move_batch(queryset, archive_model, extra=None):
+    """Copy one batch of rows into ``archive_model`` and delete the originals."""
+    field_names = [
+        f.attname for f in archive_model._meta.concrete_fields
+        if f.attname != 'archived_at' and f.attname not in (extra or {})
+    ]
+    rows = list(queryset.values(*field_names, **(extra or {})))
+    archive_model.objects.bulk_create(
+        [archive_model(**row) for row in rows], ignore_conflicts=True
+    )
+    queryset.model.objects.filter(pk__in=[row['id'] for row in rows]).delete()
+    return len(rows)
+
+
+def _archive_applications(queryset):
+    return _move_batch(
+        queryset, ArchivedJobApplication, extra={'poster_id': F('job__user_id')}
+    )
+
+
+def archive_jobs(cutoff, batch_size=None):
+    """
+    Archive settled jobs that started before ``cutoff``. Applications for
+    those jobs are archived first so the cascade delete doesn't drop them.
+    """
+    batch_size = get_batch_size(batch_size)
+    settled = Job.objects.filter(status__in=SETTLED_JOB_STATUSES, start_time__lt=cutoff)
+
+    archived = 0
+    while True:
+        with transaction.atomic():
+            pks = list(settled.values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                return archived
+            _archive_applications(JobApplication.objects.filter(job_id__in=pks))
+            archived += _move_batch(Job.objects.filter(pk__in=pks), ArchivedJob)
+
+
+def archive_applications(cutoff, batch_size=None):
+    """Archive accepted and rejected applications created before ``cutoff``."""
+    batch_size = get_batch_size(batch_size)
+    resolved = JobApplication.objects.filter(
+        status__in=RESOLVED_APPLICATION_STATUSES, created_at__lt=cutoff
+    )
+
+    archived = 0
+    while True:
+        with transaction.atomic():
+            pks = list(resolved.values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                return archived
+            archived += _archive_applications(JobApplication.objects.filter(pk__in=pks))
+
+
+def archive_notifications(cutoff, batch_size=None):
+    """Archive read notifications created before ``cutoff``."""
+    batch_size = get_batch_size(batch_size)
+    read = Notification.objects.filter(is_read=True, created_at__lt=cutoff)
+
+    archived = 0
+    while True:
+        with transaction.atomic():
+            pks = list(read.values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                return archived
+            archived += _move_batch(Notification.objects.filter(pk__in=pks), ArchivedNotification)
@@ -0,0 +1,224 @@
+"""
+Resized profile pictures.
+
+``serve_avatar`` answers ``/avatars/<user id>/<size>.<webp|jpeg>`` with a
+square, centre-cropped rendering of the user's profile picture. Renderings
+are kept in AVATAR_CACHE_DIR under MEDIA_ROOT, named after a hash of the
+picture's file name, so a new upload gets new files (and URLs) and never
+serves a stale rendering. The standard sizes in AVATAR_SIZES are rendered
+in the background when a picture is uploaded; the few AVATAR_EXTRA_SIZES
+are rendered on their first request, at most at the ``avatars`` throttle
+rate per user, and any other size is a 404.
+
+The cache is bounded by AVATAR_CACHE_MAX_BYTES. A hit refreshes the file's
+modification time (at most hourly), and eviction deletes the least recently
+used files until the cache is back under 90% of the limit.
+
+Serializers link the standard sizes with ``get_avatar_urls``; the ``v``
+query parameter carries the picture hash, which lets those URLs be cached
+for a year.
+"""
+import hashlib
+import io
+import logging
+import math
+import os
+import tempfile
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.http import Http404, JsonResponse
+from PIL import Image, ImageOps
+
+from .media import get_media_user, serve_file
+from .throttling import take_token
+
+logger = logging.getLogger(__name__)
+
+AVATAR_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+AVATAR_URL = '/avatars/'
+TOUCH_INTERVAL = 60 * 60
+
+_bytes_written = 0
+
+
+def get_avatar_sizes():
+    return getattr(settings, 'AVATAR_SIZES', {'small': 64, 'medium': 128, 'large': 256})
+
+
+def get_allowed_sizes():
+    """Sizes served: the standard ones and a few more rendered on demand."""
+    return set(get_avatar_sizes().values()) | set(getattr(settings, 'AVATAR_EXTRA_SIZES', (32, 48, 96, 192, 512)))
+
+
+def get_cache_root():
+    return os.path.join(settings.MEDIA_ROOT, getattr(settings, 'AVATAR_CACHE_DIR', 'avatar_cache'))
+
+
+def get_picture_key(name):
+    """Version of a picture, changing whenever a new file is uploaded."""
+    return hashlib.sha256(name.encode()).hexdigest()[:16]
+
+
+def get_avatar_name(picture_name, size, fmt):
+    """Path of a rendering relative to MEDIA_ROOT."""
+    key = get_picture_key(picture_name)
+    return '/'.join((getattr(settings, 'AVATAR_CACHE_DIR', 'avatar_cache'), key[:2], f'{key}-{size}.{fmt}'))
+
+
+def get_avatar_urls(user, request=None):
+    """URLs of the standard avatar sizes of ``user``, by size name and format."""
+    if not user.profile_picture:
+        return None
+    key = get_picture_key(user.profile_picture.name)
+    urls = {}
+    for label, size in get_avatar_sizes().items():
+        urls[label] = {}
+        for fmt in AVATAR_FORMATS:
+            url = f'{AVATAR_URL}{user.pk}/{size}.{fmt}?v={key}'
+            urls[label][fmt] = request.build_absolute_uri(url) if request is not None else url
+    return urls
+
+
+def render_avatar(picture_name, size, fmt):
+    """Render ``picture_name`` as a ``size``x``size`` ``fmt`` image and return its bytes."""
+    image_format, options = AVATAR_FORMATS[fmt]
+    with default_storage.open(picture_name) as source:
+        image = Image.open(source)
+        # Let the JPEG decoder downscale by a power of two while decoding
+        image.draft('RGB', (size * 2, size * 2))
+        image = ImageOps.exif_transpose(image)
+        has_alpha = image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+        if has_alpha and fmt == 'webp':
+            image = image.convert('RGBA')
+        elif has_alpha:
+            background = Image.new('RGB', image.size, 'white')
+            background.paste(image.convert('RGBA'), mask=image.convert('RGBA'))
+            image = background
+        else:
+            image = image.convert('RGB')
+        image = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+
+    output = io.BytesIO()
+    image.save(output, image_format, **options)
+    return output.getvalue()
+
+
+def find_avatar(picture_name, size, fmt):
+    """Path of the rendering if it is cached, else None."""
+    full_path = os.path.join(settings.MEDIA_ROOT, get_avatar_name(picture_name, size, fmt))
+    try:
+        mtime = os.stat(full_path).st_mtime
+    except FileNotFoundError:
+        return None
+    now = time.time()
+    if now - mtime > TOUCH_INTERVAL:
+        os.utime(full_path, (now, now))
+    return full_path
+
+
+def ensure_avatar(picture_name, size, fmt):
+    """Path of the rendering, creating it if it isn't cached."""
+    global _bytes_written
+    full_path = find_avatar(picture_name, size, fmt)
+    if full_path is not None:
+        return full_path
+
+    full_path = os.path.join(settings.MEDIA_ROOT, get_avatar_name(picture_name, size, fmt))
+    content = render_avatar(picture_name, size, fmt)
+    directory = os.path.dirname(full_path)
+    os.makedirs(directory, exist_ok=True)
+    # Written under a temporary name and renamed, so readers never see a partial file
+    descriptor, temporary_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(descriptor, 'wb') as output:
+        output.write(content)
+    os.replace(temporary_path, full_path)
+
+    _bytes_written += len(content)
+    if _bytes_written > get_cache_max_bytes() // 10:
+        _bytes_written = 0
+        evict_avatars()
+    return full_path
+
+
+def generate_avatars(picture_name):
+    """Render the standard sizes of a newly uploaded picture."""
+    for size in get_avatar_sizes().values():
+        for fmt in AVATAR_FORMATS:
+            ensure_avatar(picture_name, size, fmt)
+
+
+def get_cache_max_bytes():
+    return getattr(settings, 'AVATAR_CACHE_MAX_BYTES', 256 * 2 ** 20)
+
+
+def evict_avatars(max_bytes=None):
+    """Delete least recently used renderings until the cache is under 90% of ``max_bytes``."""
+    max_bytes = max_bytes or get_cache_max_bytes()
+    files, total = [], 0
+    for directory, _, names in os.walk(get_cache_root()):
+        for name in names:
+            path = os.path.join(directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+    if total <= max_bytes:
+        return 0
+
+    removed = 0
+    files.sort()
+    for _, size, path in files:
+        if total <= max_bytes * 0.9:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+    return removed
+
+
+def serve_avatar(request, user_id, size, fmt):
+    user = get_media_user(request)
+    if user is None:
+        return JsonResponse({'error': 'Authentication credentials were not provided.'}, status=401)
+    if fmt not in AVATAR_FORMATS or size not in get_allowed_sizes():
+        raise Http404
+    picture_name = (
+        get_user_model().objects.filter(pk=user_id).values_list('profile_picture', flat=True).first()
+    )
+    if not picture_name:
+        raise Http404
+
+    full_path = find_avatar(picture_name, size, fmt)
+    if full_path is None:
+        # Rendering costs CPU and disk in this worker, so misses are rate limited
+        taken = take_token('avatars', f'user:{user.pk}')
+        if taken is not None and not taken[0]:
+            _, tokens, _, refill_rate = taken
+            response = JsonResponse({'error': 'Too many avatar renderings; try again later.'}, status=429)
+            response['Retry-After'] = str(math.ceil((1 - tokens) / refill_rate))
+            return response
+    try:
+        full_path = full_path or ensure_avatar(picture_name, size, fmt)
+    except (FileNotFoundError, Image.UnidentifiedImageError, Image.DecompressionBombError):
+        logger.warning('Cannot render an avatar from %s', picture_name, exc_info=True)
+        raise Http404
+    # URLs carrying the current version never change content
+    immutable = request.GET.get('v') == get_picture_key(picture_name)
+    response = serve_file(
+        request, full_path, get_avatar_name(picture_name, size, fmt),
+        max_age=60 * 60 * 24 * 365 if immutable else None
+    )
+    if immutable:
+        response['Cache-Control'] += ', immutable'
+    return response
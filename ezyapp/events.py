@@ -0,0 +1,100 @@
+"""
+Domain events through a transactional outbox.
+
+``publish`` writes an OutboxEvent in the caller's transaction, so an event
+exists if and only if the state change that caused it was committed. The
+process_outbox worker drains pending events in batches and hands each one to
+the handlers registered with ``subscribe``. An event is marked processed in
+the same transaction as its handlers' database writes; if the worker dies
+before committing, the batch is delivered again (at-least-once), so handlers
+with external side effects must tolerate duplicates.
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+_handlers = defaultdict(list)
+
+
+def subscribe(event_type):
+    """Register the decorated function as a handler for ``event_type``."""
+    def decorator(handler):
+        _handlers[event_type].append(handler)
+        return handler
+    return decorator
+
+
+def get_handlers(event_type):
+    return list(_handlers.get(event_type, ()))
+
+
+def publish(event_type, **payload):
+    """Record an event; call inside the transaction that makes the change."""
+    return OutboxEvent.objects.create(event_type=event_type, payload=payload)
+
+
+def dispatch(event):
+    for handler in get_handlers(event.event_type):
+        handler(event)
+
+
+def drain_outbox(batch_size=None, max_attempts=None):
+    """
+    Deliver one batch of pending events. Returns the number of events
+    delivered and the number that failed and were left for a retry.
+    """
+    batch_size = batch_size or getattr(settings, 'OUTBOX_BATCH_SIZE', 100)
+    max_attempts = max_attempts or getattr(settings, 'OUTBOX_MAX_ATTEMPTS', 5)
+
+    retry_delay = getattr(settings, 'OUTBOX_RETRY_DELAY', 30)
+
+    with transaction.atomic():
+        now = timezone.now()
+        pending = OutboxEvent.objects.filter(
+            processed_at__isnull=True, attempts__lt=max_attempts, available_at__lte=now
+        ).order_by('id')
+        # Concurrent workers each take a different batch instead of waiting
+        if connection.features.has_select_for_update_skip_locked:
+            pending = pending.select_for_update(skip_locked=True)
+        events = list(pending[:batch_size])
+
+        delivered = failed = 0
+        for event in events:
+            event.attempts += 1
+            try:
+                # A savepoint per event, so a failing handler only undoes its own writes
+                with transaction.atomic():
+                    dispatch(event)
+            except Exception as exc:
+                logger.exception('Outbox event %s (%s) failed', event.id, event.event_type)
+                event.last_error = f'{type(exc).__name__}: {exc}'
+                event.available_at = now + timedelta(seconds=retry_delay * 2 ** (event.attempts - 1))
+                failed += 1
+            else:
+                event.processed_at = now
+                event.last_error = ''
+                delivered += 1
+
+        OutboxEvent.objects.bulk_update(events, ['attempts', 'last_error', 'available_at', 'processed_at'])
+    return delivered, failed
+
+
+def purge_processed_events(cutoff, batch_size=None):
+    """Delete events processed before ``cutoff``, in batches."""
+    batch_size = batch_size or getattr(settings, 'OUTBOX_BATCH_SIZE', 100)
+    processed = OutboxEvent.objects.filter(processed_at__lt=cutoff)
+
+    purged = 0
+    while True:
+        pks = list(processed.values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return purged
+        purged += OutboxEvent.objects.filter(pk__in=pks).delete()[0]
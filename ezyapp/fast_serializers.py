@@ -0,0 +1,148 @@
+"""
+Read-only list serialization straight from ``values_list()`` rows.
+
+A ValuesSerializer is compiled once from a ModelSerializer: each readable
+field is mapped to a database column and a converter that produces the same
+output as the field's ``to_representation``. Listing then skips model
+instantiation and the per-row serializer machinery entirely. Fields that
+need a model instance (method fields, nested serializers, file fields) are
+rejected at compile time, so a serializer either compiles to an exact
+equivalent or not at all.
+"""
+import decimal
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+# Fields whose to_representation returns database values unchanged
+IDENTITY_FIELDS = (
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.BooleanField,
+    serializers.JSONField,
+    serializers.PrimaryKeyRelatedField,
+    serializers.ReadOnlyField,
+)
+
+UNSUPPORTED_FIELDS = (
+    serializers.SerializerMethodField,
+    serializers.BaseSerializer,
+    serializers.FileField,
+    serializers.ManyRelatedField,
+    serializers.HiddenField,
+)
+
+
+def decimal_converter(field):
+    """DecimalField.to_representation with the quantize context built once."""
+    coerce_to_string = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+    if not coerce_to_string or field.localize or field.decimal_places is None:
+        return lambda: field.to_representation
+
+    def factory():
+        context = decimal.getcontext().copy()
+        if field.max_digits is not None:
+            context.prec = field.max_digits
+        exponent = decimal.Decimal('.1') ** field.decimal_places
+        rounding = field.rounding
+
+        def convert(value):
+            if not isinstance(value, decimal.Decimal):
+                return field.to_representation(value)
+            return '{:f}'.format(value.quantize(exponent, rounding=rounding, context=context))
+        return convert
+    return factory
+
+
+def datetime_converter(field):
+    """DateTimeField.to_representation with the current timezone looked up once per page."""
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    if (output_format is None or output_format.lower() != ISO_8601
+            or not settings.USE_TZ or hasattr(field, 'timezone')):
+        return lambda: field.to_representation
+
+    def factory():
+        current_timezone = timezone.get_current_timezone()
+
+        def convert(value):
+            if isinstance(value, str) or timezone.is_naive(value):
+                return field.to_representation(value)
+            value = value.astimezone(current_timezone).isoformat()
+            if value.endswith('+00:00'):
+                value = value[:-6] + 'Z'
+            return value
+        return convert
+    return factory
+
+
+def get_converter_factory(field):
+    """Return a factory for the field's converter, or None if values pass through unchanged."""
+    if isinstance(field, IDENTITY_FIELDS + (serializers.ChoiceField,)):
+        return None
+    if isinstance(field, serializers.DecimalField):
+        return decimal_converter(field)
+    if type(field) is serializers.DateTimeField:
+        return datetime_converter(field)
+    return lambda: field.to_representation
+
+
+class ValuesSerializer:
+    """Serialize ``values_list()`` rows exactly as ``serializer_class`` would."""
+
+    def __init__(self, serializer_class, fields=None):
+        self.serializer_class = serializer_class
+        model = serializer_class.Meta.model
+        self.names, self.columns, self.converters = [], [], []
+
+        serializer = serializer_class(fields=fields) if fields else serializer_class()
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, UNSUPPORTED_FIELDS) or '.' in field.source or field.source == '*':
+                raise TypeError(
+                    f'{serializer_class.__name__}.{name} ({type(field).__name__}) '
+                    'cannot be serialized from values()'
+                )
+            if isinstance(field, serializers.ChoiceField) and not all(
+                    isinstance(key, str) for key in field.choices):
+                raise TypeError(f'{serializer_class.__name__}.{name} has non-string choices')
+
+            model_field = model._meta.get_field(field.source)
+            index = len(self.columns)
+            self.names.append(name)
+            self.columns.append(model_field.attname)
+            factory = get_converter_factory(field)
+            if factory is not None:
+                self.converters.append((index, factory))
+
+    def values(self, queryset, extra=()):
+        """
+        Narrow ``queryset`` to the columns this serializer reads. ``extra``
+        columns are appended to each row and ignored by to_representation.
+        """
+        return queryset.values_list(*self.columns, *extra)
+
+    def to_representation(self, rows):
+        names = self.names
+        # Converters are built per call so per-request state (the active
+        # timezone, the decimal context) is picked up once per page.
+        converters = [(index, factory()) for index, factory in self.converters]
+        data = []
+        for row in rows:
+            if converters:
+                row = list(row)
+                for index, convert in converters:
+                    value = row[index]
+                    if value is not None:
+                        row[index] = convert(value)
+            data.append(dict(zip(names, row)))
+        return data
+
+
+@lru_cache(maxsize=256)
+def get_values_serializer(serializer_class, fields=None):
+    """Compiled ValuesSerializer for ``serializer_class``, optionally limited to ``fields``."""
+    return ValuesSerializer(serializer_class, fields)
@@ -0,0 +1,74 @@
+"""
+Date window for lists of partitioned rows.
+
+Transaction and Notification are partitioned by month of ``created_at`` on
+PostgreSQL (see ezyapp/partitions.py), and a query only skips partitions
+when it bounds ``created_at``. DateWindowFilter gives their lists such a
+bound: ``?created_after=`` and ``?created_before=`` (ISO 8601 dates or
+date-times) select the window, and without ``created_after`` only the last
+LIST_DATE_WINDOW_DAYS days are listed. On SQLite the bound is a plain filter.
+"""
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend
+
+
+def parse_bound(name, value):
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            parsed = datetime.combine(day, time.min) if day is not None else None
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise serializers.ValidationError({name: 'Use an ISO 8601 date or date-time.'})
+    return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
+
+
+class DateWindowFilter(BaseFilterBackend):
+    """Bound list queries on the view's ``date_window_field`` (default: created_at)."""
+    after_param = 'created_after'
+    before_param = 'created_before'
+
+    def get_window_days(self, view):
+        return getattr(view, 'date_window_days', None) or getattr(settings, 'LIST_DATE_WINDOW_DAYS', 90)
+
+    def filter_queryset(self, request, queryset, view):
+        if getattr(view, 'action', None) != 'list':
+            return queryset
+        field = getattr(view, 'date_window_field', 'created_at')
+        after = request.query_params.get(self.after_param)
+        before = request.query_params.get(self.before_param)
+
+        if before:
+            before = parse_bound(self.before_param, before)
+            queryset = queryset.filter(**{f'{field}__lt': before})
+        if after:
+            after = parse_bound(self.after_param, after)
+        else:
+            after = (before or timezone.now()) - timedelta(days=self.get_window_days(view))
+        return queryset.filter(**{f'{field}__gte': after})
+
+    def get_schema_operation_parameters(self, view):
+        days = self.get_window_days(view)
+        return [
+            {
+                'name': self.after_param,
+                'required': False,
+                'in': 'query',
+                'description': f'List rows created at or after this date-time (default: {days} days before created_before)',
+                'schema': {'type': 'string', 'format': 'date-time'},
+            },
+            {
+                'name': self.before_param,
+                'required': False,
+                'in': 'query',
+                'description': 'List rows created before this date-time (default: now)',
+                'schema': {'type': 'string', 'format': 'date-time'},
+            },
+        ]
@@ -0,0 +1,23 @@
+"""Outbox event handlers. Imported from EzyappConfig.ready()."""
+from .events import subscribe
+from .models import Notification
+
+
+@subscribe('job.assigned')
+def notify_assigned_helper(event):
+    payload = event.payload
+    Notification.objects.create(
+        user_id=payload['helper_id'],
+        message=f"You've been assigned to the job '{payload['title']}'!"
+    )
+
+
+@subscribe('job.completed')
+def notify_job_completed(event):
+    payload = event.payload
+    completed_by = 'job poster' if payload['completed_by'] == payload['user_id'] else 'helper'
+    recipient_id = payload['assigned_to_id'] if completed_by == 'job poster' else payload['user_id']
+    Notification.objects.create(
+        user_id=recipient_id,
+        message=f"Job '{payload['title']}' has been marked as complete by the {completed_by}"
+    )
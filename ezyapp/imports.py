@@ -0,0 +1,107 @@
+"""
+Streaming bulk import of jobs.
+
+Rows are read line by line from the request body (NDJSON or CSV), validated
+with JobSerializer in chunks and inserted with bulk_create, one transaction
+per chunk. Invalid rows are skipped and reported back by row number.
+"""
+import codecs
+import csv
+import json
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework import serializers
+
+from .maptiles import get_map_state, invalidate_job_tiles
+from .models import Job
+
+NDJSON_CONTENT_TYPES = ('application/x-ndjson', 'application/jsonl', 'application/json-lines')
+CSV_CONTENT_TYPES = ('text/csv',)
+SUPPORTED_CONTENT_TYPES = NDJSON_CONTENT_TYPES + CSV_CONTENT_TYPES
+
+
+def iter_ndjson_rows(lines):
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield serializers.ValidationError({'non_field_errors': [f'Invalid JSON: {exc}']})
+            continue
+        if not isinstance(row, dict):
+            yield serializers.ValidationError({'non_field_errors': ['Each line must be a JSON object.']})
+            continue
+        yield row
+
+
+def iter_csv_rows(lines):
+    for row in csv.DictReader(lines):
+        # Empty cells mean "not provided" so optional fields fall back to their defaults
+        yield {key: value for key, value in row.items() if key and value not in ('', None)}
+
+
+def iter_rows(stream, content_type):
+    """Yield dicts (or ValidationErrors for unparseable lines) from ``stream``."""
+    lines = codecs.iterdecode(iter(stream) if stream is not None else iter(()), 'utf-8-sig')
+    if content_type in CSV_CONTENT_TYPES:
+        return iter_csv_rows(lines)
+    return iter_ndjson_rows(lines)
+
+
+def iter_chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def import_jobs(rows, user, context, chunk_size=None, max_rows=None):
+    """
+    Validate and insert job ``rows`` for ``user``.
+
+    Returns a report with the number of created and failed rows and the
+    errors for each failed row (1-based), capped at JOB_IMPORT_MAX_ERRORS.
+    Rows beyond ``max_rows`` are not read and ``truncated`` is set.
+    """
+    from .serializers import JobSerializer
+
+    chunk_size = chunk_size or getattr(settings, 'JOB_IMPORT_CHUNK_SIZE', 500)
+    max_rows = max_rows or getattr(settings, 'JOB_IMPORT_MAX_ROWS', 50000)
+    max_errors = getattr(settings, 'JOB_IMPORT_MAX_ERRORS', 1000)
+
+    # One serializer instance is reused for every row so its fields are built once
+    validator = JobSerializer(context=context)
+    report = {'created': 0, 'failed': 0, 'truncated': False, 'errors': []}
+    rows = iter(rows)
+    row_number = 0
+
+    for chunk in iter_chunks(islice(rows, max_rows), chunk_size):
+        jobs = []
+        for row in chunk:
+            row_number += 1
+            try:
+                if isinstance(row, serializers.ValidationError):
+                    raise row
+                validated = validator.run_validation(row)
+            except serializers.ValidationError as exc:
+                report['failed'] += 1
+                if len(report['errors']) < max_errors:
+                    report['errors'].append({'row': row_number, 'errors': exc.detail})
+                continue
+            jobs.append(Job(user=user, **validated))
+
+        with transaction.atomic():
+            Job.objects.bulk_create(jobs, batch_size=chunk_size)
+            invalidate_job_tiles(filter(None, map(get_map_state, jobs)))
+        report['created'] += len(jobs)
+
+    report['truncated'] = next(rows, None) is not None
+    return report
@@ -0,0 +1,177 @@
+"""
+Wallet ledger.
+
+Every balance change goes through ``post_transaction``, which locks the
+wallet row, applies the amount and records the resulting balance on the
+Transaction as ``running_balance``. WalletCheckpoint rows, written daily,
+anchor historical lookups: the balance at any instant is the running balance
+of the wallet's last transaction before it, searched for only back to the
+latest checkpoint, so answering never walks the whole history.
+"""
+from datetime import datetime, time
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Min, OuterRef, Q, Subquery, Sum
+from django.utils import timezone
+
+from .models import Transaction, Wallet, WalletCheckpoint
+
+ZERO = Decimal('0.00')
+
+
+def signed_amount(type, amount):
+    return amount if type == 'credit' else -amount
+
+
+def post_transaction(wallet, type, amount, reason):
+    """Apply a credit or debit to ``wallet`` and record it."""
+    with transaction.atomic():
+        wallet = Wallet.objects.select_for_update().get(pk=wallet.pk)
+        wallet.balance += signed_amount(type, amount)
+        wallet.save(update_fields=['balance'])
+        return Transaction.objects.create(
+            wallet=wallet, type=type, amount=amount, reason=reason, running_balance=wallet.balance
+        )
+
+
+def get_totals(queryset):
+    """Sum of credits and of debits in a transaction queryset."""
+    totals = queryset.aggregate(
+        credits=Sum('amount', filter=Q(type='credit')),
+        debits=Sum('amount', filter=Q(type='debit')),
+    )
+    return totals['credits'] or ZERO, totals['debits'] or ZERO
+
+
+def balance_at(wallet, when):
+    """The balance of ``wallet`` just before ``when``."""
+    checkpoint = (
+        WalletCheckpoint.objects.filter(wallet=wallet, as_of__lte=when)
+        .order_by('-as_of').values_list('as_of', 'balance').first()
+    )
+    latest = Transaction.objects.filter(wallet=wallet, created_at__lt=when)
+    if checkpoint is not None:
+        latest = latest.filter(created_at__gte=checkpoint[0])
+    running_balance = latest.order_by('-created_at', '-id').values_list('running_balance', flat=True).first()
+
+    if running_balance is not None:
+        return running_balance
+    return checkpoint[1] if checkpoint is not None else ZERO
+
+
+def get_statement(wallet, start, end):
+    """Opening and closing balance of ``wallet`` for [start, end) and the transactions in between."""
+    opening = balance_at(wallet, start)
+    activity = Transaction.objects.filter(
+        wallet=wallet, created_at__gte=start, created_at__lt=end
+    ).order_by('created_at', 'id')
+    credits, debits = get_totals(activity)
+    return {
+        'opening_balance': opening,
+        'closing_balance': opening + credits - debits,
+        'total_credits': credits,
+        'total_debits': debits,
+        'transactions': activity,
+    }
+
+
+def get_checkpoint_time(now=None):
+    """Midnight at the start of the current day in the project time zone."""
+    today = timezone.localdate(now or timezone.now())
+    return timezone.make_aware(datetime.combine(today, time.min))
+
+
+def create_checkpoints(as_of=None, batch_size=None):
+    """
+    Record the balance at ``as_of`` (default: today's midnight) of every
+    wallet whose balance changed since its latest checkpoint.
+    """
+    as_of = as_of or get_checkpoint_time()
+    batch_size = batch_size or getattr(settings, 'LEDGER_BATCH_SIZE', 1000)
+    balance = Subquery(
+        Transaction.objects.filter(wallet=OuterRef('pk'), created_at__lt=as_of)
+        .order_by('-created_at', '-id').values('running_balance')[:1]
+    )
+    checkpointed = Subquery(
+        WalletCheckpoint.objects.filter(wallet=OuterRef('pk'), as_of__lte=as_of)
+        .order_by('-as_of').values('balance')[:1]
+    )
+
+    created, last_pk = 0, 0
+    while True:
+        rows = list(
+            Wallet.objects.filter(pk__gt=last_pk).order_by('pk')
+            .annotate(balance_as_of=balance, checkpointed=checkpointed)
+            .values_list('pk', 'balance_as_of', 'checkpointed')[:batch_size]
+        )
+        if not rows:
+            return created
+        last_pk = rows[-1][0]
+        checkpoints = [
+            WalletCheckpoint(wallet_id=pk, as_of=as_of, balance=balance_as_of)
+            for pk, balance_as_of, previous in rows
+            if balance_as_of is not None and balance_as_of != previous
+        ]
+        WalletCheckpoint.objects.bulk_create(checkpoints, ignore_conflicts=True)
+        created += len(checkpoints)
+
+
+def get_wallet_id_ranges(chunk_size=None):
+    """Split the wallet id space into half-open [start, end) ranges of ``chunk_size`` ids."""
+    chunk_size = chunk_size or getattr(settings, 'LEDGER_BATCH_SIZE', 1000)
+    bounds = Wallet.objects.aggregate(low=Min('pk'), high=Max('pk'))
+    if bounds['low'] is None:
+        return []
+    return [
+        (start, min(start + chunk_size, bounds['high'] + 1))
+        for start in range(bounds['low'], bounds['high'] + 1, chunk_size)
+    ]
+
+
+def _reconcile(wallets, transactions):
+    balances = dict(wallets.values_list('pk', 'balance'))
+    totals = {
+        row['wallet_id']: row
+        for row in transactions.values('wallet_id').order_by('wallet_id').annotate(
+            credits=Sum('amount', filter=Q(type='credit')),
+            debits=Sum('amount', filter=Q(type='debit')),
+            transactions=Count('pk'),
+        )
+    }
+
+    mismatches = []
+    for wallet_id, balance in balances.items():
+        row = totals.get(wallet_id, {})
+        # SQLite sums decimals as floats; round to the balance's precision
+        net = ((row.get('credits') or ZERO) - (row.get('debits') or ZERO)).quantize(ZERO)
+        if net != balance:
+            mismatches.append({
+                'wallet_id': wallet_id,
+                'balance': balance,
+                'ledger_balance': net,
+                'difference': balance - net,
+                'transactions': row.get('transactions', 0),
+            })
+    return len(balances), mismatches
+
+
+def reconcile_range(start, end):
+    """
+    Compare the balance of wallets with ids in [start, end) against the net of
+    their transactions. Returns the number of wallets checked and a list of
+    mismatches. Reads only, with one grouped query per table.
+    """
+    return _reconcile(
+        Wallet.objects.filter(pk__gte=start, pk__lt=end),
+        Transaction.objects.filter(wallet_id__gte=start, wallet_id__lt=end),
+    )
+
+
+def reconcile_wallets(wallet_ids):
+    """Like reconcile_range, for an explicit list of wallet ids."""
+    return _reconcile(
+        Wallet.objects.filter(pk__in=wallet_ids),
+        Transaction.objects.filter(wallet_id__in=wallet_ids),
+    )
@@ -0,0 +1,108 @@
+"""
+Synthetic data used by the audit and benchmark commands.
+
+Everything is inserted with bulk_create so that a few thousand rows can be
+generated in well under a second. Callers are expected to run inside a
+transaction they roll back afterwards.
+"""
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from ezyapp.models import (
+    Job, JobApplication, Review, Wallet, Transaction, Notification, HelperDocument
+)
+
+User = get_user_model()
+
+
+def populate(scale=1000, seed=42):
+    """
+    Insert roughly ``scale`` jobs plus proportional users, applications,
+    transactions, notifications, reviews and documents.
+
+    Returns a dict with a sample ``poster`` and ``helper`` to run queries as.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    n_users = max(scale // 10, 4)
+
+    users = User.objects.bulk_create([
+        User(
+            username=f'synthetic_{i}',
+            email=f'synthetic_{i}@example.com',
+            password='!',
+            user_type='poster' if i % 2 == 0 else 'helper',
+            is_verified=i % 3 != 0,
+            phone_number=f'+91{9000000000 + i}',
+        )
+        for i in range(n_users)
+    ])
+    posters = [u for u in users if u.user_type == 'poster']
+    helpers = [u for u in users if u.user_type == 'helper']
+
+    wallets = Wallet.objects.bulk_create([
+        Wallet(user=u, balance=Decimal(rng.randint(0, 50000)) / 100) for u in users
+    ])
+    HelperDocument.objects.bulk_create([
+        HelperDocument(user=u, status=rng.choice(['pending', 'approved', 'rejected']))
+        for u in helpers
+    ])
+
+    statuses = ['open'] * 2 + ['assigned', 'completed', 'cancelled']
+    jobs = []
+    for i in range(scale):
+        status = rng.choice(statuses)
+        start = now + timedelta(hours=rng.randint(-720, 720))
+        jobs.append(Job(
+            user=rng.choice(posters),
+            title=f'Synthetic job {i}',
+            description='Generated for query plan analysis',
+            location_lat=Decimal('12.9') + Decimal(rng.randint(0, 99999)) / 1000000,
+            location_long=Decimal('77.5') + Decimal(rng.randint(0, 99999)) / 1000000,
+            location_address=f'{i} Synthetic Street',
+            category=rng.choice(Job.CATEGORY_CHOICES)[0],
+            job_type='fixed',
+            price=Decimal(rng.randint(100, 100000)) / 100,
+            start_time=start,
+            end_time=start + timedelta(hours=2),
+            status=status,
+            assigned_to=rng.choice(helpers) if status != 'open' else None,
+        ))
+    jobs = Job.objects.bulk_create(jobs)
+
+    applications = {}
+    for job in jobs:
+        for helper in rng.sample(helpers, min(2, len(helpers))):
+            applications[(job.pk, helper.pk)] = JobApplication(
+                job=job, helper=helper, status=rng.choice(['applied', 'accepted', 'rejected'])
+            )
+    JobApplication.objects.bulk_create(applications.values())
+
+    reviews = {}
+    for _ in range(scale // 2):
+        reviewer, reviewed = rng.sample(users, 2)
+        reviews[(reviewer.pk, reviewed.pk)] = Review(
+            reviewer=reviewer, reviewed=reviewed, rating=rng.randint(1, 5), comment='Synthetic'
+        )
+    Review.objects.bulk_create(reviews.values())
+
+    Transaction.objects.bulk_create([
+        Transaction(
+            wallet=rng.choice(wallets),
+            type=rng.choice(['credit', 'debit']),
+            amount=Decimal(rng.randint(100, 10000)) / 100,
+            reason=rng.choice(Transaction.REASON_CHOICES)[0],
+        )
+        for _ in range(scale * 2)
+    ])
+    Notification.objects.bulk_create([
+        Notification(user=rng.choice(users), message='Synthetic notification',
+                     is_read=rng.random() < 0.7)
+        for _ in range(scale * 2)
+    ])
+
+    return {'poster': posters[0], 'helper': helpers[0]}
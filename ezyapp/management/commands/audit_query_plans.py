@@ -0,0 +1,90 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from rest_framework.test import APIRequestFactory
+
+from ezyapp import views
+from ._synthetic import populate
+
+# (viewset, user the request runs as, query string)
+AUDITED_VIEWS = [
+    (views.JobViewSet, 'helper', ''),
+    (views.JobViewSet, 'helper', '?category=home'),
+    (views.JobViewSet, 'helper', '?ordering=start_time'),
+    (views.JobViewSet, 'poster', ''),
+    (views.JobApplicationViewSet, 'helper', ''),
+    (views.JobApplicationViewSet, 'poster', ''),
+    (views.ReviewViewSet, 'helper', ''),
+    (views.WalletViewSet, 'helper', ''),
+    (views.TransactionViewSet, 'helper', ''),
+    (views.NotificationViewSet, 'helper', ''),
+    (views.NotificationViewSet, 'helper', '?is_read=false'),
+    (views.HelperDocumentViewSet, 'helper', ''),
+]
+
+# Full table scans as reported by EXPLAIN on PostgreSQL and SQLite.
+SEQ_SCAN_PATTERNS = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    'sqlite': re.compile(r'\bSCAN (\w+)\b(?! USING)'),
+}
+
+
+class Rollback(Exception):
+    pass
+
+
+def build_queryset(viewset_class, user, query_string=''):
+    """Return the queryset a list request would run, after filtering."""
+    view = viewset_class(action_map={'get': 'list'})
+    view.args, view.kwargs, view.format_kwarg = (), {}, None
+    request = view.initialize_request(APIRequestFactory().get('/' + query_string))
+    request.user = user
+    view.request = request
+    return view.filter_queryset(view.get_queryset())
+
+
+class Command(BaseCommand):
+    help = 'Run EXPLAIN for every viewset list query over synthetic data and report sequential scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=int, default=5000,
+                            help='Number of synthetic jobs to generate (default: 5000)')
+        parser.add_argument('--verbose-plans', action='store_true',
+                            help='Print the full plan for every query')
+
+    def handle(self, *args, **options):
+        pattern = SEQ_SCAN_PATTERNS.get(connection.vendor)
+        if pattern is None:
+            raise CommandError(f'Unsupported database backend: {connection.vendor}')
+
+        problems = 0
+        try:
+            with transaction.atomic():
+                actors = populate(scale=options['scale'])
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE')
+
+                for viewset_class, actor, query_string in AUDITED_VIEWS:
+                    queryset = build_queryset(viewset_class, actors[actor], query_string)
+                    plan = queryset[:10].explain()
+                    scans = sorted(set(pattern.findall(plan)))
+                    label = f'{viewset_class.__name__} as {actor}{query_string}'
+
+                    if scans:
+                        problems += 1
+                        self.stdout.write(self.style.WARNING(
+                            f'SEQ SCAN  {label}: {", ".join(scans)}'
+                        ))
+                    else:
+                        self.stdout.write(self.style.SUCCESS(f'ok        {label}'))
+
+                    if options['verbose_plans'] or scans:
+                        self.stdout.write(f'    {queryset.query}')
+                        for line in plan.splitlines():
+                            self.stdout.write(f'    {line}')
+                raise Rollback
+        except Rollback:
+            pass
+
+        self.stdout.write(f'{problems} of {len(AUDITED_VIEWS)} queries use sequential scans')
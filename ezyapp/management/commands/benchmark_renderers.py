@@ -0,0 +1,76 @@
+import json
+import timeit
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from ezyapp.models import Job
+from ezyapp.renderers import ORJSONRenderer, ORJSONParser, orjson
+from ezyapp.serializers import JobSerializer
+
+
+def build_payload(rows):
+    """A paginated job list, plus raw Decimal/datetime values as returned by actions."""
+    now = timezone.now()
+    jobs = [
+        Job(
+            id=i, user_id=1, title=f'Job {i} \u2028 café', description='Benchmark job',
+            location_lat=Decimal('12.9716000'), location_long=Decimal('77.5946000'),
+            location_address=f'{i} Benchmark Street', category='home', job_type='fixed',
+            price=Decimal('1499.50'), start_time=now + timedelta(hours=i), status='open',
+            created_at=now,
+        )
+        for i in range(rows)
+    ]
+    return {
+        'count': rows,
+        'next': None,
+        'previous': None,
+        'results': JobSerializer(jobs, many=True).data,
+        'balance': Decimal('2500.75'),
+        'verified_at': now,
+        'date': now.date(),
+    }
+
+
+class Command(BaseCommand):
+    help = 'Compare the orjson renderer and parser against the stock DRF JSON renderer and parser'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100, help='Jobs per payload (default: 100)')
+        parser.add_argument('--number', type=int, default=200, help='Iterations per timing (default: 200)')
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write(self.style.WARNING('orjson is not installed; ORJSONRenderer falls back to JSONRenderer'))
+
+        payload = build_payload(options['rows'])
+        number = options['number']
+
+        stock = JSONRenderer().render(payload)
+        fast = ORJSONRenderer().render(payload)
+        if stock == fast:
+            self.stdout.write(self.style.SUCCESS('Output is byte-identical'))
+        elif json.loads(stock) == json.loads(fast):
+            self.stdout.write(self.style.WARNING('Output differs in bytes but decodes identically'))
+        else:
+            self.stdout.write(self.style.ERROR('Output differs'))
+
+        timings = [
+            ('render', 'JSONRenderer', lambda: JSONRenderer().render(payload)),
+            ('render', 'ORJSONRenderer', lambda: ORJSONRenderer().render(payload)),
+            ('parse', 'JSONParser', lambda: JSONParser().parse(BytesIO(stock))),
+            ('parse', 'ORJSONParser', lambda: ORJSONParser().parse(BytesIO(stock))),
+        ]
+        self.stdout.write(f'{options["rows"]} rows, {len(stock)} bytes, {number} iterations')
+        baseline = {}
+        for kind, name, func in timings:
+            seconds = min(timeit.repeat(func, number=number, repeat=3)) / number
+            baseline.setdefault(kind, seconds)
+            speedup = baseline[kind] / seconds
+            self.stdout.write(f'  {name:<16} {seconds * 1e6:10.1f} us/op  {speedup:5.1f}x')
@@ -0,0 +1,69 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ezyapp.fast_serializers import get_values_serializer
+from ezyapp.models import Job, JobApplication, Review, Transaction, Notification
+from ezyapp.serializers import (
+    JobSerializer, JobApplicationSerializer, ReviewSerializer,
+    TransactionSerializer, NotificationSerializer
+)
+from ._synthetic import populate
+
+BENCHMARKED = [
+    (Job, JobSerializer),
+    (JobApplication, JobApplicationSerializer),
+    (Review, ReviewSerializer),
+    (Transaction, TransactionSerializer),
+    (Notification, NotificationSerializer),
+]
+
+
+class Rollback(Exception):
+    pass
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+class Command(BaseCommand):
+    help = 'Compare ModelSerializer list serialization with the values() fast path over synthetic data'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help='Rows per page (default: 10000)')
+        parser.add_argument('--repeat', type=int, default=3, help='Timing repetitions (default: 3)')
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        try:
+            with transaction.atomic():
+                populate(scale=rows)
+                for model, serializer_class in BENCHMARKED:
+                    queryset = model.objects.order_by('-pk')[:rows]
+                    reader = get_values_serializer(serializer_class)
+
+                    slow, expected = best_of(
+                        lambda: serializer_class(list(queryset.all()), many=True).data, repeat
+                    )
+                    fast, actual = best_of(
+                        lambda: reader.to_representation(reader.values(queryset.all())), repeat
+                    )
+
+                    count = len(actual)
+                    same = actual == [dict(item) for item in expected]
+                    self.stdout.write(
+                        f'{serializer_class.__name__:<26} {count:>6} rows  '
+                        f'{count / slow:>10,.0f} rows/s -> {count / fast:>10,.0f} rows/s  '
+                        f'{slow / fast:4.1f}x  '
+                        + (self.style.SUCCESS('identical') if same else self.style.ERROR('MISMATCH'))
+                    )
+                raise Rollback
+        except Rollback:
+            pass
@@ -0,0 +1,146 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+
+def get_free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def get_children(pid):
+    children = []
+    for entry in Path('/proc').iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / 'stat').read_text()
+        except OSError:
+            continue
+        # The command name may contain spaces; fields resume after its ')'
+        if int(stat.rsplit(')', 1)[1].split()[1]) == pid:
+            children.append(int(entry.name))
+    return children
+
+
+def get_memory(pid):
+    """RSS, PSS and USS (private memory) of ``pid`` in bytes, from smaps_rollup."""
+    values = {}
+    for line in Path(f'/proc/{pid}/smaps_rollup').read_text().splitlines()[1:]:
+        name, value = line.split(':', 1)
+        values[name] = int(value.split()[0]) * 1024
+    return values['Rss'], values['Pss'], values['Private_Clean'] + values['Private_Dirty']
+
+
+def get_cpu_seconds(pid):
+    fields = Path(f'/proc/{pid}/stat').read_text().rsplit(')', 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+
+
+def fetch(url):
+    try:
+        with urllib.request.urlopen(url, timeout=5) as response:
+            return response.status
+    except urllib.error.HTTPError as exc:
+        return exc.code
+
+
+class Command(BaseCommand):
+    help = 'Compare gunicorn startup time and memory with and without preload_app (Linux only)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Gunicorn workers (default: 4)')
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Requests sent after startup so every worker serves some (default: 200)')
+        parser.add_argument('--path', default='/api/jobs/', help='Path requested (default: /api/jobs/)')
+        parser.add_argument('--settle', type=float, default=1.0,
+                            help='Seconds to wait before measuring memory (default: 1)')
+
+    def handle(self, *args, **options):
+        if not Path('/proc/self/smaps_rollup').exists():
+            raise CommandError('benchmark_startup reads /proc/<pid>/smaps_rollup and needs Linux 4.14+')
+        if options['workers'] < 1:
+            raise CommandError('--workers must be at least 1')
+
+        results = {}
+        for preload in (False, True):
+            results[preload] = self.measure(preload, options)
+
+        self.stdout.write(f"{'':<28}{'per-worker load':>18}{'preload_app':>16}")
+        rows = (
+            ('Time to first response (s)', 'ready', '{:.2f}'),
+            ('CPU time, all processes (s)', 'cpu', '{:.2f}'),
+            ('Total RSS (MiB)', 'rss', '{:.1f}'),
+            ('Total PSS (MiB)', 'pss', '{:.1f}'),
+            ('Private memory/worker (MiB)', 'uss', '{:.1f}'),
+        )
+        for label, key, template in rows:
+            self.stdout.write(
+                f'{label:<28}{template.format(results[False][key]):>18}{template.format(results[True][key]):>16}'
+            )
+        saved = results[False]['pss'] - results[True]['pss']
+        self.stdout.write(self.style.SUCCESS(
+            f'preload_app saves {saved:.1f} MiB PSS across {options["workers"]} workers'
+        ))
+
+    def measure(self, preload, options):
+        port = get_free_port()
+        url = f'http://127.0.0.1:{port}{options["path"]}'
+        env = dict(os.environ, GUNICORN_PRELOAD=str(preload))
+        command = [
+            sys.executable, '-m', 'gunicorn', '-c', 'gunicorn_config.py',
+            '--workers', str(options['workers']), '--bind', f'127.0.0.1:{port}',
+            '--access-logfile', os.devnull, 'ezydoo.wsgi:application',
+        ]
+        started = time.perf_counter()
+        master = subprocess.Popen(
+            command, cwd=settings.BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            ready = self.wait_until_serving(url, master) - started
+            with ThreadPoolExecutor(options['workers']) as executor:
+                list(executor.map(fetch, [url] * options['requests']))
+            time.sleep(options['settle'])
+
+            workers = get_children(master.pid)
+            totals = [0, 0, 0]
+            for pid in [master.pid] + workers:
+                for index, value in enumerate(get_memory(pid)):
+                    totals[index] += value
+            worker_uss = sum(get_memory(pid)[2] for pid in workers) / max(len(workers), 1)
+            return {
+                'ready': ready,
+                'cpu': sum(get_cpu_seconds(pid) for pid in [master.pid] + workers),
+                'rss': totals[0] / 2 ** 20,
+                'pss': totals[1] / 2 ** 20,
+                'uss': worker_uss / 2 ** 20,
+            }
+        finally:
+            master.send_signal(signal.SIGTERM)
+            master.wait(timeout=30)
+
+    def wait_until_serving(self, url, process, timeout=60):
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            if process.poll() is not None:
+                raise CommandError(f'gunicorn exited with status {process.returncode}')
+            try:
+                fetch(url)
+            except OSError:
+                time.sleep(0.01)
+                continue
+            return time.perf_counter()
+        raise CommandError(f'gunicorn did not answer within {timeout}s')
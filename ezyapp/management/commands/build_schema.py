@@ -0,0 +1,18 @@
+import hashlib
+
+from django.core.management.base import BaseCommand
+
+from ezyapp.schema import SCHEMA_FORMATS, generate_schema, get_schema_path
+
+
+class Command(BaseCommand):
+    help = 'Generate the OpenAPI schema into SCHEMA_ROOT so it is served without runtime introspection'
+
+    def handle(self, *args, **options):
+        for fmt in SCHEMA_FORMATS:
+            content = generate_schema(fmt)
+            path = get_schema_path(fmt)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(content)
+            digest = hashlib.sha256(content).hexdigest()[:16]
+            self.stdout.write(f'Wrote {path} ({len(content)} bytes, {digest})')
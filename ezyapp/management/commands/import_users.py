@@ -0,0 +1,52 @@
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ezyapp.imports import CSV_CONTENT_TYPES, NDJSON_CONTENT_TYPES, iter_rows
+from ezyapp.onboarding import get_hash_workers, register_users
+
+FORMATS = {'ndjson': NDJSON_CONTENT_TYPES[0], 'csv': CSV_CONTENT_TYPES[0]}
+
+
+class Command(BaseCommand):
+    help = 'Register users in bulk from an NDJSON or CSV file, with their wallets and document entries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="NDJSON or CSV file of users, or '-' for standard input")
+        parser.add_argument('--format', choices=FORMATS, default=None,
+                            help='Input format (default: from the file extension, else ndjson)')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Processes hashing passwords (default: USER_IMPORT_HASH_WORKERS or the CPU count)')
+        parser.add_argument('--chunk-size', type=int, default=None,
+                            help='Rows inserted per transaction (default: USER_IMPORT_CHUNK_SIZE)')
+        parser.add_argument('--max-rows', type=int, default=None,
+                            help='Stop after this many rows (default: no limit)')
+
+    def handle(self, *args, **options):
+        if options['workers'] is not None and options['workers'] < 1:
+            raise CommandError('--workers must be at least 1')
+        path = options['path']
+        content_type = FORMATS[options['format'] or ('csv' if path.lower().endswith('.csv') else 'ndjson')]
+        workers = get_hash_workers(options['workers'])
+        started = time.monotonic()
+
+        try:
+            stream = sys.stdin.buffer if path == '-' else open(path, 'rb')
+        except OSError as exc:
+            raise CommandError(f'Cannot read {path}: {exc.strerror}')
+        with stream:
+            report = register_users(
+                iter_rows(stream, content_type), chunk_size=options['chunk_size'],
+                max_rows=options['max_rows'] or sys.maxsize, workers=workers
+            )
+
+        for error in report['errors']:
+            self.stderr.write(f"Row {error['row']}: {json.dumps(error['errors'])}")
+        elapsed = time.monotonic() - started
+        style = self.style.WARNING if report['failed'] or report['truncated'] else self.style.SUCCESS
+        self.stdout.write(style(
+            f"Created {report['created']} users, {report['failed']} rows failed"
+            f"{', input truncated' if report['truncated'] else ''} in {elapsed:.1f}s ({workers} hashing processes)"
+        ))
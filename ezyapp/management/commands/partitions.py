@@ -0,0 +1,74 @@
+import argparse
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from ezyapp import partitions
+
+MODEL_CHOICES = {label.split('.')[1].lower(): label for label in partitions.PARTITIONED_MODELS}
+
+
+class Command(BaseCommand):
+    help = 'List, create, detach and archive the monthly partitions of the transaction and notification tables (PostgreSQL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='Database alias (default: default)')
+        subcommands = parser.add_subparsers(dest='subcommand', required=True)
+
+        subcommands.add_parser('list', help='Show the monthly partitions and whether they are attached')
+
+        create = subcommands.add_parser('create', help='Create partitions from this month on')
+        create.add_argument('--months-ahead', type=int, default=None,
+                            help='Months after the current one to create (default: PARTITION_MONTHS_AHEAD)')
+
+        detach = subcommands.add_parser('detach', help='Detach the partitions of months before --before')
+        detach.add_argument('--before', required=True, type=self.parse_month, help='First month to keep (YYYY-MM)')
+        detach.add_argument('--model', choices=MODEL_CHOICES, action='append',
+                            help='Only this table (repeatable; default: both)')
+
+        archive = subcommands.add_parser('archive', help='Dump detached partitions to gzipped CSV and drop them')
+        archive.add_argument('--dir', default=None, help='Output directory (default: PARTITION_ARCHIVE_DIR)')
+        archive.add_argument('--keep', action='store_true', help='Keep the tables after dumping them')
+        archive.add_argument('--model', choices=MODEL_CHOICES, action='append',
+                             help='Only this table (repeatable; default: both)')
+
+    def parse_month(self, value):
+        try:
+            return partitions.parse_month(value)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f'invalid month {value!r}; use YYYY-MM')
+
+    def handle(self, *args, **options):
+        using = options['database']
+        connection = connections[using]
+        if not partitions.is_supported(connection):
+            raise CommandError(f'Partitioning needs PostgreSQL; {connection.vendor} tables are not partitioned')
+        labels = [MODEL_CHOICES[name] for name in options.get('model') or ()] or None
+
+        if options['subcommand'] == 'list':
+            for model in partitions.get_partitioned_models():
+                table = model._meta.db_table
+                if not partitions.is_partitioned(connection, table):
+                    raise CommandError(f'{table} is not partitioned; run migrate first')
+                self.stdout.write(table)
+                for month, attached in partitions.get_partitions(connection, table).items():
+                    self.stdout.write(f'  {partitions.partition_name(table, month)}  '
+                                      f'{"attached" if attached else "detached"}')
+
+        elif options['subcommand'] == 'create':
+            created = partitions.create_partitions(using, options['months_ahead'])
+            for name in created:
+                self.stdout.write(f'Created {name}')
+            self.stdout.write(self.style.SUCCESS(f'Created {len(created)} partitions'))
+
+        elif options['subcommand'] == 'detach':
+            detached = partitions.detach_partitions(options['before'], labels, using)
+            for name in detached:
+                self.stdout.write(f'Detached {name}')
+            self.stdout.write(self.style.SUCCESS(f'Detached {len(detached)} partitions'))
+
+        elif options['subcommand'] == 'archive':
+            archived = partitions.archive_partitions(options['dir'], labels, using, drop=not options['keep'])
+            for name, path in archived:
+                self.stdout.write(f'Archived {name} to {path}')
+            self.stdout.write(self.style.SUCCESS(f'Archived {len(archived)} partitions'))
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ezyapp.events import drain_outbox
+
+
+class Command(BaseCommand):
+    help = 'Deliver pending outbox events to their handlers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Events delivered per transaction (default: OUTBOX_BATCH_SIZE)')
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help='Seconds to wait when the outbox is empty (default: 1)')
+        parser.add_argument('--once', action='store_true',
+                            help='Drain the pending events and exit instead of polling')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        while True:
+            delivered, failed = drain_outbox(batch_size=batch_size)
+            if delivered or failed:
+                self.stdout.write(f'Delivered {delivered} events, {failed} failed')
+            if not delivered:
+                if options['once']:
+                    return
+                time.sleep(options['interval'])
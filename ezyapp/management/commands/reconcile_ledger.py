@@ -0,0 +1,75 @@
+import csv
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+
+from ezyapp import ledger
+
+REPORT_FIELDS = ('wallet_id', 'balance', 'ledger_balance', 'difference', 'transactions')
+
+
+class Command(BaseCommand):
+    help = 'Check every wallet balance against the net of its transactions and report mismatches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count(),
+                            help='Processes checking wallet id ranges in parallel (default: CPU count)')
+        parser.add_argument('--chunk-size', type=int, default=None,
+                            help='Wallet ids per range (default: LEDGER_BATCH_SIZE)')
+        parser.add_argument('--output', default=None, help='Write the mismatch report to this CSV file')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError('--workers must be at least 1')
+        started = time.monotonic()
+        ranges = ledger.get_wallet_id_ranges(options['chunk_size'])
+
+        checked, suspects = 0, []
+        for wallets, mismatches in self.map_ranges(ranges, options['workers']):
+            checked += wallets
+            suspects += mismatches
+
+        # Wallets written to while their range was read can look out of
+        # balance; only those still off on a second read are reported.
+        mismatches = []
+        suspect_ids = [suspect['wallet_id'] for suspect in suspects]
+        chunk_size = options['chunk_size'] or 1000
+        for offset in range(0, len(suspect_ids), chunk_size):
+            mismatches += ledger.reconcile_wallets(suspect_ids[offset:offset + chunk_size])[1]
+
+        self.write_report(mismatches, options['output'])
+        elapsed = time.monotonic() - started
+        style = self.style.ERROR if mismatches else self.style.SUCCESS
+        self.stdout.write(style(
+            f'Checked {checked} wallets in {len(ranges)} ranges in {elapsed:.1f}s: '
+            f'{len(mismatches)} mismatched'
+        ))
+
+    def map_ranges(self, ranges, workers):
+        if workers == 1 or len(ranges) <= 1:
+            return (ledger.reconcile_range(start, end) for start, end in ranges)
+        # Spawned workers set Django up themselves and open their own connections
+        executor = ProcessPoolExecutor(
+            min(workers, len(ranges)), mp_context=multiprocessing.get_context('spawn'),
+            initializer=django.setup
+        )
+        with executor:
+            return list(executor.map(ledger.reconcile_range, *zip(*ranges)))
+
+    def write_report(self, mismatches, output):
+        if not mismatches:
+            return
+        if output:
+            with open(output, 'w', newline='') as handle:
+                self.write_csv(handle, mismatches)
+            self.stdout.write(f'Mismatch report written to {output}')
+        else:
+            self.write_csv(self.stdout, mismatches)
+
+    def write_csv(self, handle, mismatches):
+        writer = csv.DictWriter(handle, fieldnames=REPORT_FIELDS, lineterminator='\n')
+        writer.writeheader()
+        writer.writerows(sorted(mismatches, key=lambda row: row['wallet_id']))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ezyapp.taskqueue import Worker, get_queues
+
+
+class Command(BaseCommand):
+    help = 'Run queued background tasks in a thread or process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queues', default=None,
+                            help='Comma-separated queues in priority order (default: TASK_QUEUES)')
+        parser.add_argument('--concurrency', type=int, default=4, help='Tasks run at once (default: 4)')
+        parser.add_argument('--pool', choices=('thread', 'process'), default='thread',
+                            help='Run tasks in threads (I/O-bound work) or processes (CPU-bound work)')
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help='Seconds between polls when no task is due (default: 1)')
+        parser.add_argument('--once', action='store_true', help='Exit once no task is due')
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1:
+            raise CommandError('--concurrency must be at least 1')
+        queues = [q.strip() for q in options['queues'].split(',') if q.strip()] if options['queues'] else get_queues()
+
+        worker = Worker(
+            queues=queues, concurrency=options['concurrency'], pool=options['pool'],
+            poll_interval=options['interval']
+        )
+        self.stdout.write(
+            f"Worker {worker.name} serving {', '.join(queues)} with {worker.concurrency} {worker.pool} workers"
+        )
+        worker.run(once=options['once'])
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from ezyapp import archive, events
+
+
+class Command(BaseCommand):
+    help = 'Expire stale open jobs, move settled rows older than the retention window into the archive tables and purge processed outbox events'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retention-days', type=int, default=None,
+                            help='Archive rows older than this many days (default: ARCHIVE_RETENTION_DAYS)')
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Rows moved per transaction (default: ARCHIVE_BATCH_SIZE)')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        cutoff = archive.get_retention_cutoff(options['retention_days'])
+
+        expired = archive.expire_jobs(batch_size=batch_size)
+        self.stdout.write(f'Expired {expired} open jobs')
+
+        jobs = archive.archive_jobs(cutoff, batch_size=batch_size)
+        self.stdout.write(f'Archived {jobs} jobs')
+
+        applications = archive.archive_applications(cutoff, batch_size=batch_size)
+        self.stdout.write(f'Archived {applications} job applications')
+
+        notifications = archive.archive_notifications(cutoff, batch_size=batch_size)
+        self.stdout.write(f'Archived {notifications} notifications')
+
+        purged = events.purge_processed_events(cutoff, batch_size=batch_size)
+        self.stdout.write(f'Purged {purged} processed outbox events')
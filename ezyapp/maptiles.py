@@ -0,0 +1,160 @@
+"""
+Clustered job map tiles.
+
+The map endpoint answers a bounding box at a zoom level from fixed tiles:
+at zoom ``z`` the world is split into square tiles 360 / 2**z degrees wide,
+and each tile into a MAP_TILE_CELLS x MAP_TILE_CELLS grid. One grouped query
+per tile buckets the open jobs by cell and returns each cell's job count and
+centroid; cells holding at most MAP_SPARSE_CELL_JOBS jobs list those jobs
+instead, so the map shows markers once it is zoomed in far enough.
+
+Tiles are cached for MAP_TILE_CACHE_TIMEOUT seconds per zoom and category.
+A pan only computes the tiles it newly uncovers. When a job is created,
+leaves or enters the open status, or moves, the tiles containing its old
+and new location are deleted at every zoom level (see ezyapp/signals.py).
+Bulk writes that skip the signals call ``invalidate_job_tiles`` themselves.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Avg, Count, FloatField, Q, Value
+from django.db.models.functions import Cast, Floor
+
+from .models import Job
+
+MAP_TILE_KEY = 'job:map:{zoom}:{x}:{y}:{category}'
+MAX_ZOOM = 20
+ALL_CATEGORIES = '*'
+JOB_COLUMNS = ('id', 'title', 'category', 'job_type', 'price', 'hourly_rate', 'location_lat', 'location_long')
+
+
+def get_tile_cells():
+    return getattr(settings, 'MAP_TILE_CELLS', 8)
+
+
+def get_tile_size(zoom):
+    return 360 / 2 ** zoom
+
+
+def get_tile(zoom, lat, lng):
+    """``(x, y)`` of the tile containing a point."""
+    size = get_tile_size(zoom)
+    count = 2 ** zoom
+    return (
+        min(int((float(lng) + 180) // size), count - 1),
+        min(int((float(lat) + 90) // size), max(count // 2 - 1, 0)),
+    )
+
+
+def get_tile_range(zoom, west, south, east, north):
+    """The corner tiles of a bounding box: ``(min_x, min_y, max_x, max_y)``."""
+    min_x, min_y = get_tile(zoom, south, west)
+    max_x, max_y = get_tile(zoom, north, east)
+    return min_x, min_y, max_x, max_y
+
+
+def count_tiles(zoom, west, south, east, north):
+    """How many tiles cover a bounding box, without listing them."""
+    min_x, min_y, max_x, max_y = get_tile_range(zoom, west, south, east, north)
+    return (max_x - min_x + 1) * (max_y - min_y + 1)
+
+
+def get_tiles(zoom, west, south, east, north):
+    """The tiles covering a bounding box, as ``(x, y)`` pairs. Check ``count_tiles`` first."""
+    min_x, min_y, max_x, max_y = get_tile_range(zoom, west, south, east, north)
+    return [(x, y) for x in range(min_x, max_x + 1) for y in range(min_y, max_y + 1)]
+
+
+def tile_key(zoom, x, y, category=None):
+    return MAP_TILE_KEY.format(zoom=zoom, x=x, y=y, category=category or ALL_CATEGORIES)
+
+
+def compute_tile(zoom, x, y, category=None):
+    """Clusters and sparse-cell jobs of one tile, straight from the database."""
+    size = get_tile_size(zoom)
+    cell = size / get_tile_cells()
+    west, south = x * size - 180, y * size - 90
+    jobs = Job.objects.filter(
+        status='open',
+        location_long__gte=west, location_long__lt=west + size,
+        location_lat__gte=south, location_lat__lt=south + size,
+    )
+    if category:
+        jobs = jobs.filter(category=category)
+    jobs = jobs.annotate(
+        cell_x=Floor((Cast('location_long', FloatField()) - Value(west)) / Value(cell)),
+        cell_y=Floor((Cast('location_lat', FloatField()) - Value(south)) / Value(cell)),
+    )
+
+    clusters, sparse = [], Q()
+    cells = jobs.values('cell_x', 'cell_y').annotate(
+        count=Count('id'), lat=Avg(Cast('location_lat', FloatField())), lng=Avg(Cast('location_long', FloatField()))
+    ).order_by()
+    for row in cells:
+        if row['count'] <= getattr(settings, 'MAP_SPARSE_CELL_JOBS', 3):
+            sparse |= Q(cell_x=row['cell_x'], cell_y=row['cell_y'])
+        else:
+            clusters.append({'lat': row['lat'], 'lng': row['lng'], 'count': row['count']})
+
+    points = []
+    if sparse:
+        for row in jobs.filter(sparse).values(*JOB_COLUMNS).order_by('id'):
+            row['lat'] = float(row.pop('location_lat'))
+            row['lng'] = float(row.pop('location_long'))
+            for field in ('price', 'hourly_rate'):
+                if row[field] is not None:
+                    row[field] = str(row[field])
+            points.append(row)
+    return {'clusters': clusters, 'jobs': points}
+
+
+def get_map(zoom, west, south, east, north, category=None):
+    """
+    Clusters and jobs of the tiles covering a bounding box, cached per tile.
+    Whole tiles are returned, so results may extend past the box.
+    """
+    tiles = get_tiles(zoom, west, south, east, north)
+    keys = {tile_key(zoom, x, y, category): (x, y) for x, y in tiles}
+    cached = cache.get_many(keys)
+    missing = {}
+    for key, (x, y) in keys.items():
+        if key not in cached:
+            missing[key] = cached[key] = compute_tile(zoom, x, y, category)
+    if missing:
+        cache.set_many(missing, getattr(settings, 'MAP_TILE_CACHE_TIMEOUT', 60 * 10))
+
+    clusters, jobs = [], []
+    for key in keys:
+        clusters.extend(cached[key]['clusters'])
+        jobs.extend(cached[key]['jobs'])
+    return {'zoom': zoom, 'tiles': len(tiles), 'clusters': clusters, 'jobs': jobs}
+
+
+def get_tile_keys(lat, lng, category):
+    keys = []
+    for zoom in range(MAX_ZOOM + 1):
+        x, y = get_tile(zoom, lat, lng)
+        keys.append(tile_key(zoom, x, y))
+        keys.append(tile_key(zoom, x, y, category))
+    return keys
+
+
+def invalidate_job_tiles(locations):
+    """
+    Delete the cached tiles containing ``locations`` (``(lat, lng, category)``
+    tuples) at every zoom level once the current transaction commits.
+    """
+    keys = set()
+    for lat, lng, category in locations:
+        if lat is not None and lng is not None:
+            keys.update(get_tile_keys(lat, lng, category))
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(list(keys)))
+
+
+def get_map_state(job):
+    """What the map shows of ``job``: ``(lat, lng, category)`` while it is open, else None."""
+    values = job.__dict__
+    if values.get('status') != 'open':
+        return None
+    return values.get('location_lat'), values.get('location_long'), values.get('category')
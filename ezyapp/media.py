@@ -0,0 +1,181 @@
+"""
+Access-checked delivery of uploaded files.
+
+Uploads are served from MEDIA_URL by ``serve_media`` in every environment.
+Profile pictures are visible to any signed-in user; verification documents
+only to the helper who uploaded them and to staff. Requests authenticate with
+the API's JWT (or an admin session).
+
+Once a request is allowed the bytes never pass through Python:
+
+* with MEDIA_ACCEL_REDIRECT set (e.g. ``/protected-media/``, an ``internal``
+  nginx location aliased to MEDIA_ROOT), the response is an empty
+  ``X-Accel-Redirect`` and the proxy sends the file itself, ranges included;
+* otherwise the response wraps the open file, which gunicorn hands to the
+  kernel with ``sendfile()``. ``Range: bytes=`` requests are answered with
+  206 by positioning the file at the start of the range and limiting the
+  Content-Length, so sendfile copies just that window.
+
+Responses carry an ETag and Last-Modified, and answer conditional requests
+with 304.
+"""
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.db.models import Q
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified, JsonResponse
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+
+from .authentication import CachedJWTAuthentication
+from .models import HelperDocument
+
+PROFILE_PICTURES = 'profile_pictures/'
+DOCUMENTS = 'documents/'
+DOCUMENT_FIELDS = ('aadhaar_card', 'driving_license', 'pan_card', 'selfie')
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def get_media_user(request):
+    """The user from the Authorization header, else the session user (or None)."""
+    try:
+        authenticated = CachedJWTAuthentication().authenticate(request)
+    except (AuthenticationFailed, InvalidToken, TokenError):
+        return None
+    if authenticated is not None:
+        return authenticated[0]
+    user = getattr(request, 'user', None)
+    return user if user is not None and user.is_authenticated else None
+
+
+def can_access(user, name):
+    if name.startswith(PROFILE_PICTURES):
+        return True
+    if name.startswith(DOCUMENTS):
+        if user.is_staff:
+            return True
+        match = Q()
+        for field in DOCUMENT_FIELDS:
+            match |= Q(**{field: name})
+        return HelperDocument.objects.filter(match, user=user).exists()
+    return False
+
+
+class FileRange:
+    """
+    ``length`` bytes of ``file`` from ``start``. Exposes the file's
+    descriptor, positioned at ``start``, so the server can sendfile() it.
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.name = file.name
+        self.remaining = length
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """
+    ``(start, end)`` (inclusive) for a single ``bytes=`` range, None to send
+    the whole file (no header, or several ranges) and ``()`` when the range
+    can't be satisfied.
+    """
+    match = RANGE_RE.match(header or '')
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first:
+        if not last or not int(last):
+            return ()
+        return max(size - int(last), 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return ()
+    return start, end
+
+
+def serve_media(request, path):
+    user = get_media_user(request)
+    if user is None:
+        return JsonResponse({'error': 'Authentication credentials were not provided.'}, status=401)
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    name = os.path.relpath(full_path, settings.MEDIA_ROOT).replace(os.sep, '/')
+    if not can_access(user, name):
+        raise Http404  # indistinguishable from a missing file
+    return serve_file(request, full_path, name)
+
+
+def serve_file(request, full_path, name, max_age=None):
+    """Send ``full_path`` (``name`` relative to MEDIA_ROOT) once access has been checked."""
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    last_modified = http_date(stat.st_mtime)
+    if request.headers.get('If-None-Match') == etag or (
+        'If-None-Match' not in request.headers
+        and (parse_http_date_safe(request.headers.get('If-Modified-Since', '')) or 0) >= int(stat.st_mtime)
+    ):
+        response = HttpResponseNotModified()
+    else:
+        response = build_file_response(request, full_path, name, stat.st_size, etag, last_modified)
+    response['ETag'] = etag
+    response['Last-Modified'] = last_modified
+    response['Accept-Ranges'] = 'bytes'
+    if max_age is None:
+        max_age = getattr(settings, 'MEDIA_MAX_AGE', 60 * 60)
+    patch_cache_control(response, private=True, max_age=max_age)
+    return response
+
+
+def build_file_response(request, full_path, name, size, etag, last_modified):
+    byte_range = None
+    if_range = request.headers.get('If-Range')
+    if if_range is None or if_range in (etag, last_modified):
+        byte_range = parse_range(request.headers.get('Range'), size)
+    if byte_range == ():
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    accel_redirect = getattr(settings, 'MEDIA_ACCEL_REDIRECT', '')
+    if accel_redirect:
+        # The proxy serves the file, and the range, from its internal location
+        response = HttpResponse(content_type=mimetypes.guess_type(name)[0] or 'application/octet-stream')
+        response['X-Accel-Redirect'] = accel_redirect.rstrip('/') + '/' + name
+        return response
+
+    file = open(full_path, 'rb')
+    if byte_range is None:
+        return FileResponse(file)
+    start, end = byte_range
+    response = FileResponse(FileRange(file, start, end - start + 1), status=206)
+    response['Content-Length'] = end - start + 1
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
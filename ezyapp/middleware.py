@@ -0,0 +1,186 @@
+"""
+Request middleware: Idempotency-Key replay and rate-limit headers.
+
+A client that sends ``Idempotency-Key: <unique value>`` with a POST, PUT,
+PATCH or DELETE gets the same response however many times it retries: the
+first request claims the key by inserting an IdempotencyKey row (the unique
+constraint makes the claim atomic across processes), runs, and stores its
+response; retries with the same key and request replay that response
+without touching the view. Small bodies are part of the request's
+fingerprint; large ones only by length, so streamed imports and uploads
+are not read into memory. A retry that arrives while the first request is
+still running waits for it to finish. Keys are scoped to the authenticated
+user and expire after IDEMPOTENCY_KEY_TTL seconds. Anonymous requests
+(signup, login, OTP) have no user to scope a key to, so their keys are
+ignored: unrelated clients picking the same key must not collide or see
+each other's responses.
+"""
+import hashlib
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from .models import IdempotencyKey
+
+UNSAFE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+# Responses a retry should not replay: the client is expected to try again
+NON_REPLAYABLE_STATUSES = (401, 408, 409, 429)
+REPLAYED_HEADERS = ('Content-Type', 'Location')
+
+
+def get_request_scope(request):
+    """
+    The user a key belongs to, from the JWT (or session) without running DRF
+    authentication, or None for anonymous requests.
+    """
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    if header is not None:
+        raw_token = authentication.get_raw_token(header)
+        if raw_token is not None:
+            try:
+                token = authentication.get_validated_token(raw_token)
+                return f'user:{token[jwt_settings.USER_ID_CLAIM]}'
+            except (InvalidToken, TokenError, KeyError):
+                pass
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f'user:{user.pk}'
+    return None
+
+
+def get_request_fingerprint(request, max_body_size):
+    """
+    A hash of the request. Bodies up to ``max_body_size`` bytes are hashed
+    whole; larger or unsized bodies (streamed imports, file uploads) are
+    identified by their length only, so they are never buffered here.
+    """
+    digest = hashlib.sha256()
+    for part in (request.method, request.get_full_path(), request.content_type or ''):
+        digest.update(part.encode())
+        digest.update(b'\0')
+    try:
+        content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        content_length = None
+    if content_length is not None and content_length <= max_body_size:
+        digest.update(request.body)
+    else:
+        digest.update(f'length:{content_length}'.encode())
+    return digest.hexdigest()
+
+
+class IdempotencyMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.path_prefix = getattr(settings, 'IDEMPOTENCY_PATH_PREFIX', '/api/')
+        self.ttl = getattr(settings, 'IDEMPOTENCY_KEY_TTL', 60 * 60 * 24)
+        self.lock_timeout = getattr(settings, 'IDEMPOTENCY_LOCK_TIMEOUT', 25)
+        self.max_body_size = getattr(settings, 'IDEMPOTENCY_MAX_BODY_SIZE', 64 * 1024)
+
+    def __call__(self, request):
+        key = request.headers.get('Idempotency-Key')
+        if not key or request.method not in UNSAFE_METHODS or not request.path.startswith(self.path_prefix):
+            return self.get_response(request)
+        if len(key) > 255:
+            return JsonResponse({'error': 'Idempotency-Key must be at most 255 characters'}, status=400)
+
+        scope = get_request_scope(request)
+        if scope is None:
+            return self.get_response(request)
+        fingerprint = get_request_fingerprint(request, self.max_body_size)
+        record = self.claim(scope, key, fingerprint)
+        if record is not None:
+            return self.replay(record, fingerprint)
+
+        try:
+            response = self.get_response(request)
+        except Exception:
+            self.release(scope, key)
+            raise
+        self.store(scope, key, response)
+        return response
+
+    def claim(self, scope, key, fingerprint):
+        """
+        Claim ``key`` for this request and return None, or return the
+        existing record once the request that claimed it has finished.
+        """
+        deadline = time.monotonic() + self.lock_timeout
+        while True:
+            now = timezone.now()
+            try:
+                with transaction.atomic():
+                    IdempotencyKey.objects.create(
+                        scope=scope, key=key, fingerprint=fingerprint,
+                        expires_at=now + timedelta(seconds=self.ttl)
+                    )
+                return None
+            except IntegrityError:
+                pass
+
+            record = IdempotencyKey.objects.filter(scope=scope, key=key).first()
+            if record is None:
+                continue  # released between our insert and read; claim again
+            if record.expires_at <= now:
+                IdempotencyKey.objects.filter(pk=record.pk, expires_at__lte=now).delete()
+                continue
+            if record.completed_at is not None or record.fingerprint != fingerprint:
+                return record
+            if time.monotonic() >= deadline:
+                return record
+            time.sleep(0.05)
+
+    def replay(self, record, fingerprint):
+        if record.fingerprint != fingerprint:
+            return JsonResponse(
+                {'error': 'Idempotency-Key was already used for a different request'}, status=422
+            )
+        if record.completed_at is None:
+            response = JsonResponse(
+                {'error': 'A request with this Idempotency-Key is still being processed'}, status=409
+            )
+            response['Retry-After'] = '1'
+            return response
+
+        response = HttpResponse(bytes(record.response_body or b''), status=record.status_code)
+        for header, value in record.response_headers.items():
+            response[header] = value
+        response['Idempotent-Replayed'] = 'true'
+        return response
+
+    def store(self, scope, key, response):
+        if (response.status_code >= 500 or response.status_code in NON_REPLAYABLE_STATUSES
+                or response.streaming):
+            self.release(scope, key)
+            return
+        IdempotencyKey.objects.filter(scope=scope, key=key).update(
+            status_code=response.status_code,
+            response_headers={header: response[header] for header in REPLAYED_HEADERS if response.has_header(header)},
+            response_body=response.content,
+            completed_at=timezone.now(),
+        )
+
+    def release(self, scope, key):
+        """Forget the key so the client can retry the request."""
+        IdempotencyKey.objects.filter(scope=scope, key=key, completed_at__isnull=True).delete()
+
+
+class RateLimitHeadersMiddleware:
+    """Copy the quota computed by ezyapp.throttling.EndpointThrottle onto the response."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        for header, value in getattr(request, 'throttle_quota', {}).items():
+            response[header] = value
+        return response
@@ -0,0 +1,182 @@
+# Generated by Django 5.2 on 2026-10-19 03:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('ezyapp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='helperdocument',
+            name='ezyapp_help_user_id_db1d46_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='helperdocument',
+            name='ezyapp_help_status_fa84bb_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='helperdocument',
+            name='ezyapp_help_verifie_943ada_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='helperdocument',
+            name='ezyapp_help_created_2bfa35_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='job',
+            name='ezyapp_job_user_id_aeaa44_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='job',
+            name='ezyapp_job_categor_96f977_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='job',
+            name='ezyapp_job_status_de026d_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='job',
+            name='ezyapp_job_assigne_b4503f_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='job',
+            name='ezyapp_job_created_9406b7_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='job',
+            name='ezyapp_job_start_t_262fca_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='jobapplication',
+            name='ezyapp_joba_job_id_f391f3_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='jobapplication',
+            name='ezyapp_joba_helper__649c83_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='jobapplication',
+            name='ezyapp_joba_status_d7b397_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='jobapplication',
+            name='ezyapp_joba_created_fdb6fa_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='notification',
+            name='ezyapp_noti_user_id_0c69fb_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='notification',
+            name='ezyapp_noti_is_read_7be1d3_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='notification',
+            name='ezyapp_noti_created_331c39_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='review',
+            name='ezyapp_revi_reviewe_f4dd94_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='review',
+            name='ezyapp_revi_reviewe_ea5554_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='review',
+            name='ezyapp_revi_rating_57ac20_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='review',
+            name='ezyapp_revi_created_a260e4_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='transaction',
+            name='ezyapp_tran_wallet__6b6bec_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='transaction',
+            name='ezyapp_tran_type_5ac539_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='transaction',
+            name='ezyapp_tran_reason_575dc6_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='transaction',
+            name='ezyapp_tran_created_44643b_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='user',
+            name='ezyapp_user_user_ty_d849bc_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='user',
+            name='ezyapp_user_is_veri_82449c_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='wallet',
+            name='ezyapp_wall_user_id_d5cd9c_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='wallet',
+            name='ezyapp_wall_balance_60c0ac_idx',
+        ),
+        migrations.AddIndex(
+            model_name='helperdocument',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['created_at'], name='doc_pending_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['user', '-created_at'], name='job_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['assigned_to', '-created_at'], name='job_assignee_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('status', 'open')), fields=['-created_at'], name='job_open_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('status', 'open')), fields=['start_time'], name='job_open_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('status', 'open')), fields=['category', '-created_at'], name='job_open_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobapplication',
+            index=models.Index(fields=['helper', '-created_at'], name='jobapp_helper_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobapplication',
+            index=models.Index(fields=['job', '-created_at'], name='jobapp_job_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', '-created_at'], name='notif_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['user', '-created_at'], name='notif_user_unread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['reviewed', '-created_at'], name='review_reviewed_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['wallet', '-created_at'], name='txn_wallet_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['user_type', 'is_verified'], name='user_type_verified_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-19 03:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ezyapp', '0002_tune_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('status', 'open')), fields=['price'], name='job_open_price_idx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2 on 2026-10-19 03:53
+
+import django.db.models.deletion
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def backfill_running_balances(apps, schema_editor):
+    """Number existing transactions with the cumulative net of their wallet's history."""
+    Transaction = apps.get_model('ezyapp', 'Transaction')
+    updated, wallet_id, balance = [], None, Decimal('0')
+    for txn in Transaction.objects.order_by('wallet_id', 'created_at', 'id').iterator(chunk_size=2000):
+        if txn.wallet_id != wallet_id:
+            wallet_id, balance = txn.wallet_id, Decimal('0')
+        balance += txn.amount if txn.type == 'credit' else -txn.amount
+        txn.running_balance = balance
+        updated.append(txn)
+        if len(updated) >= 2000:
+            Transaction.objects.bulk_update(updated, ['running_balance'])
+            updated = []
+    Transaction.objects.bulk_update(updated, ['running_balance'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ezyapp', '0006_task_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='running_balance',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True),
+        ),
+        migrations.CreateModel(
+            name='WalletCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('as_of', models.DateTimeField()),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('wallet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='checkpoints', to='ezyapp.wallet')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('wallet', 'as_of'), name='checkpoint_wallet_as_of_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_running_balances, migrations.RunPython.noop),
+    ]
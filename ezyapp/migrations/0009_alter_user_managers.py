@@ -0,0 +1,20 @@
+# Generated by Django 5.2 on 2026-10-19 04:14
+
+import ezyapp.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ezyapp', '0008_idempotency_keys'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='user',
+            managers=[
+                ('objects', ezyapp.models.CachingUserManager()),
+            ],
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2 on 2026-10-19 04:30
+
+from django.db import migrations
+
+from ezyapp.partitions import is_supported, partition_table, unpartition_table
+
+MODELS = ('Transaction', 'Notification')
+
+
+def partition(apps, schema_editor):
+    """Partition both tables by month of created_at (PostgreSQL only; see ezyapp/partitions.py)."""
+    if not is_supported(schema_editor.connection):
+        return
+    for name in MODELS:
+        partition_table(schema_editor, apps.get_model('ezyapp', name))
+
+
+def unpartition(apps, schema_editor):
+    if not is_supported(schema_editor.connection):
+        return
+    for name in MODELS:
+        unpartition_table(schema_editor, apps.get_model('ezyapp', name))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ezyapp', '0009_alter_user_managers'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition, unpartition),
+    ]
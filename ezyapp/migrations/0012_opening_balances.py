@@ -0,0 +1,68 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+ZERO = Decimal('0.00')
+
+
+def record_opening_balances(apps, schema_editor):
+    """
+    0007 numbered running balances from zero, but some wallet balances were
+    seeded or edited (e.g. in the admin) without a Transaction. Give those
+    wallets an opening-balance transaction for the difference, dated before
+    their history, renumber their running balances from it and correct
+    their checkpoints.
+    """
+    Wallet = apps.get_model('ezyapp', 'Wallet')
+    Transaction = apps.get_model('ezyapp', 'Transaction')
+    WalletCheckpoint = apps.get_model('ezyapp', 'WalletCheckpoint')
+
+    nets = {
+        row['wallet_id']: ((row['credits'] or ZERO) - (row['debits'] or ZERO)).quantize(ZERO)
+        for row in Transaction.objects.values('wallet_id').order_by('wallet_id').annotate(
+            credits=Sum('amount', filter=Q(type='credit')),
+            debits=Sum('amount', filter=Q(type='debit')),
+        )
+    }
+    for wallet in Wallet.objects.order_by('pk').iterator(chunk_size=2000):
+        opening_balance = wallet.balance - nets.get(wallet.pk, ZERO)
+        if not opening_balance:
+            continue
+
+        history = list(Transaction.objects.filter(wallet_id=wallet.pk).order_by('created_at', 'id'))
+        opened_at = wallet.created_at
+        if history and history[0].created_at <= opened_at:
+            opened_at = history[0].created_at - timedelta(microseconds=1)
+        opening = Transaction.objects.create(
+            wallet_id=wallet.pk, type='credit' if opening_balance > 0 else 'debit',
+            amount=abs(opening_balance), reason='other', running_balance=opening_balance,
+        )
+        Transaction.objects.filter(pk=opening.pk).update(created_at=opened_at)
+
+        balance = opening_balance
+        for txn in history:
+            balance += txn.amount if txn.type == 'credit' else -txn.amount
+            txn.running_balance = balance
+        Transaction.objects.bulk_update(history, ['running_balance'], batch_size=2000)
+
+        WalletCheckpoint.objects.filter(wallet_id=wallet.pk).update(balance=Coalesce(
+            Subquery(
+                Transaction.objects.filter(wallet_id=wallet.pk, created_at__lt=OuterRef('as_of'))
+                .order_by('-created_at', '-id').values('running_balance')[:1]
+            ),
+            Value(opening_balance),
+        ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ezyapp', '0011_user_imports'),
+    ]
+
+    operations = [
+        migrations.RunPython(record_opening_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,196 @@
+import time
+
+from django.conf import settings
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+from rest_framework import filters, permissions, serializers
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from .fast_serializers import get_values_serializer
+from .profiling import get_current_profile
+from .serializers import DynamicFieldsModelSerializer
+
+
+def parse_list_param(value):
+    if not value:
+        return None
+    return tuple(dict.fromkeys(item.strip() for item in value.split(',') if item.strip())) or None
+
+
+class SparseFieldsetMixin:
+    """
+    Support ``?fields=id,title`` and ``?expand=user`` on safe requests.
+
+    The requested fields are passed to the serializer and narrow the query
+    with ``only()``; expanded relations are joined with ``select_related()``.
+    """
+    # Actions that only read, whatever their HTTP method
+    read_actions = ('bulk_retrieve',)
+
+    def is_read_request(self):
+        return self.request is not None and (
+            self.request.method in permissions.SAFE_METHODS
+            or getattr(self, 'action', None) in self.read_actions
+        )
+
+    def get_requested_fields(self):
+        if not self.is_read_request():
+            return None
+        return parse_list_param(self.request.query_params.get('fields'))
+
+    def get_requested_expand(self):
+        if not self.is_read_request():
+            return None
+        return parse_list_param(self.request.query_params.get('expand'))
+
+    def get_serializer(self, *args, **kwargs):
+        if issubclass(self.get_serializer_class(), DynamicFieldsModelSerializer):
+            kwargs.setdefault('fields', self.get_requested_fields())
+            kwargs.setdefault('expand', self.get_requested_expand())
+        return super().get_serializer(*args, **kwargs)
+
+    def get_ordering_columns(self, queryset):
+        """Columns the OrderingFilter will sort on for this request."""
+        for backend in self.filter_backends:
+            if issubclass(backend, filters.OrderingFilter):
+                ordering = backend().get_ordering(self.request, queryset, self) or []
+                return [term.lstrip('-') for term in ordering]
+        return []
+
+    def apply_sparse_fieldset(self, queryset):
+        fields = self.get_requested_fields()
+        expand = self.get_requested_expand()
+        serializer_class = self.get_serializer_class()
+        if not (fields or expand) or not issubclass(serializer_class, DynamicFieldsModelSerializer):
+            return queryset
+
+        # Instantiating validates the names; errors become a 400 response
+        serializer = serializer_class(fields=fields, expand=expand)
+
+        if expand:
+            related = []
+            for field_name in expand:
+                if field_name not in serializer.fields:
+                    continue  # expanded but not among the requested fields
+                related.append(field_name)
+                nested_meta = getattr(serializer.fields[field_name], 'Meta', None)
+                for path in getattr(nested_meta, 'select_related', ()):
+                    related.append(f'{field_name}__{path}')
+            queryset = queryset.select_related(*related)
+
+        if fields:
+            model = queryset.model
+            concrete = {field.name for field in model._meta.concrete_fields}
+            sources = [field.source for field in serializer.fields.values() if not field.write_only]
+            # Method fields and reverse relations need the whole row
+            if all(source in concrete for source in sources):
+                columns = [model._meta.pk.name] + sources + self.get_ordering_columns(queryset)
+                queryset = queryset.only(*dict.fromkeys(columns))
+        return queryset
+
+    def filter_queryset(self, queryset):
+        return self.apply_sparse_fieldset(super().filter_queryset(queryset))
+
+
+class FastListMixin(SparseFieldsetMixin):
+    """
+    Serve the list action from values_list() rows through a ValuesSerializer
+    compiled from ``fast_list_serializer_class``, skipping model instances
+    and per-row ModelSerializer work. Other actions are unaffected.
+    """
+    fast_list_serializer_class = None
+
+    def get_fast_list_serializer(self):
+        if (self.fast_list_serializer_class is None
+                or self.get_serializer_class() is not self.fast_list_serializer_class
+                or self.get_requested_expand()):
+            return None
+        return get_values_serializer(self.fast_list_serializer_class, self.get_requested_fields())
+
+    def serialize_rows(self, reader, rows):
+        return reader.to_representation(rows)
+
+    def list(self, request, *args, **kwargs):
+        reader = self.get_fast_list_serializer()
+        if reader is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        # Ordering columns ride along at the end of each row (compound queries
+        # can only sort on selected columns); to_representation ignores them.
+        extra = [column for column in self.get_ordering_columns(queryset) if column not in reader.columns]
+        rows = reader.values(queryset, extra)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(self.profile_serialize_rows(reader, page))
+        return Response(self.profile_serialize_rows(reader, list(rows)))
+
+    def profile_serialize_rows(self, reader, rows):
+        profile = get_current_profile()
+        if profile is None:
+            return self.serialize_rows(reader, rows)
+        started = time.perf_counter()
+        data = self.serialize_rows(reader, rows)
+        profile.record_serializer(f'{reader.serializer_class.__name__} (values)', time.perf_counter() - started)
+        return data
+
+
+class BulkRetrieveMixin:
+    """
+    Fetch many objects in one request: ``GET .../bulk/?ids=1,2,3`` or
+    ``POST .../bulk/`` with ``{"ids": [1, 2, 3]}``.
+
+    Objects are loaded with a single ``IN`` query over the same scoped
+    queryset ``retrieve`` uses and returned in request order. Ids that don't
+    exist or aren't visible to the user are listed under ``missing``.
+    """
+
+    def get_bulk_ids(self, request):
+        if request.method == 'POST':
+            raw = request.data.get('ids')
+        else:
+            raw = request.query_params.get('ids')
+        if isinstance(raw, str):
+            raw = [item for item in raw.split(',') if item.strip()]
+        if not isinstance(raw, list) or not raw:
+            raise serializers.ValidationError({'ids': 'A non-empty list of ids is required.'})
+
+        try:
+            ids = list(dict.fromkeys(int(item) for item in raw))
+        except (TypeError, ValueError):
+            raise serializers.ValidationError({'ids': 'Ids must be integers.'})
+
+        max_ids = getattr(settings, 'BULK_RETRIEVE_MAX_IDS', 100)
+        if len(ids) > max_ids:
+            raise serializers.ValidationError({'ids': f'At most {max_ids} ids can be requested at once.'})
+        return ids
+
+    def get_bulk_objects(self, queryset):
+        return queryset
+
+    @extend_schema(
+        summary="Retrieve many objects",
+        description="Retrieve up to BULK_RETRIEVE_MAX_IDS objects by id, in request order",
+        parameters=[OpenApiParameter('ids', str, description='Comma-separated ids (GET)')],
+        request={"application/json": {"type": "object", "properties": {
+            "ids": {"type": "array", "items": {"type": "integer"}}
+        }}},
+    )
+    @action(detail=False, methods=['get', 'post'], url_path='bulk')
+    def bulk_retrieve(self, request):
+        ids = self.get_bulk_ids(request)
+        queryset = self.filter_queryset(self.get_queryset()).filter(pk__in=ids)
+        # Join what the serializer reads per object (e.g. UserProfileSerializer.documents_status).
+        # A sparse fieldset narrowed with only() holds no such fields, and
+        # joining a deferred relation is a FieldError.
+        related = getattr(getattr(self.get_serializer_class(), 'Meta', None), 'select_related', ())
+        deferred, _ = queryset.query.deferred_loading
+        if related and not deferred:
+            queryset = queryset.select_related(*related)
+        objects = {obj.pk: obj for obj in self.get_bulk_objects(queryset)}
+
+        serializer = self.get_serializer([objects[pk] for pk in ids if pk in objects], many=True)
+        return Response({
+            'results': serializer.data,
+            'missing': [pk for pk in ids if pk not in objects],
+        })
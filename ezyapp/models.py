@@ -1,13 +1,20 @@
 from django.db import models
-from django.contrib.auth.models import AbstractUser
+from django.db.models import Q
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.db.models import JSONField
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
 import random
 import string
 
+from .querycache import CachingManager, CachingManagerMixin, CachingQuerySet
+
 def generate_otp():
     return ''.join(random.choices(string.digits, k=6))
 
+class CachingUserManager(CachingManagerMixin, UserManager.from_queryset(CachingQuerySet)):
+    pass
+
 class User(AbstractUser):
     USER_TYPE_CHOICES = (
         ('poster', 'Job Poster'),
@@ -24,12 +31,13 @@ class User(AbstractUser):
     # OTP verification fields
     otp = models.CharField(max_length=6, blank=True, null=True)
     otp_created_at = models.DateTimeField(blank=True, null=True)
+
+    objects = CachingUserManager()
     
     class Meta:
         indexes = [
-            models.Index(fields=['user_type']),
+            models.Index(fields=['user_type', 'is_verified'], name='user_type_verified_idx'),
             models.Index(fields=['phone_number']),
-            models.Index(fields=['is_verified']),
         ]
 
     def __str__(self):
@@ -66,13 +74,14 @@ class HelperDocument(models.Model):
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    objects = CachingManager()
     
     class Meta:
         indexes = [
-            models.Index(fields=['user']),
-            models.Index(fields=['status']),
-            models.Index(fields=['verified_by']),
-            models.Index(fields=['created_at']),
+            # Admin review queue: pending documents only
+            models.Index(fields=['created_at'], name='doc_pending_created_idx',
+                         condition=Q(status='pending')),
         ]
     
     def __str__(self):
@@ -84,6 +93,7 @@ class Job(models.Model):
         ('assigned', 'Assigned'),
         ('completed', 'Completed'),
         ('cancelled', 'Cancelled'),
+        ('expired', 'Expired'),
     )
     
     JOB_TYPE_CHOICES = (
@@ -120,15 +130,24 @@ class Job(models.Model):
         blank=True
     )
     created_at = models.DateTimeField(auto_now_add=True)
+
+    # Not read through the cache; its version bumps tell suggest.py about new jobs
+    objects = CachingManager()
     
     class Meta:
         indexes = [
-            models.Index(fields=['user']),
-            models.Index(fields=['category']),
-            models.Index(fields=['status']),
-            models.Index(fields=['assigned_to']),
-            models.Index(fields=['created_at']),
-            models.Index(fields=['start_time']),
+            # Poster feed: own jobs, newest first
+            models.Index(fields=['user', '-created_at'], name='job_user_created_idx'),
+            # Helper feed: assigned jobs plus open jobs only
+            models.Index(fields=['assigned_to', '-created_at'], name='job_assignee_created_idx'),
+            models.Index(fields=['-created_at'], name='job_open_created_idx',
+                         condition=Q(status='open')),
+            models.Index(fields=['start_time'], name='job_open_start_idx',
+                         condition=Q(status='open')),
+            models.Index(fields=['price'], name='job_open_price_idx',
+                         condition=Q(status='open')),
+            models.Index(fields=['category', '-created_at'], name='job_open_category_idx',
+                         condition=Q(status='open')),
             # Compound index for location-based queries
             models.Index(fields=['location_lat', 'location_long']),
         ]
@@ -153,10 +172,8 @@ class JobApplication(models.Model):
         # Ensure a helper can only apply once to a job
         unique_together = ('job', 'helper')
         indexes = [
-            models.Index(fields=['job']),
-            models.Index(fields=['helper']),
-            models.Index(fields=['status']),
-            models.Index(fields=['created_at']),
+            models.Index(fields=['helper', '-created_at'], name='jobapp_helper_created_idx'),
+            models.Index(fields=['job', '-created_at'], name='jobapp_job_created_idx'),
         ]
     
     def __str__(self):
@@ -173,10 +190,7 @@ class Review(models.Model):
         # Ensure a user can only review another user once
         unique_together = ('reviewer', 'reviewed')
         indexes = [
-            models.Index(fields=['reviewer']),
-            models.Index(fields=['reviewed']),
-            models.Index(fields=['rating']),
-            models.Index(fields=['created_at']),
+            models.Index(fields=['reviewed', '-created_at'], name='review_reviewed_created_idx'),
         ]
     
     def __str__(self):
@@ -186,13 +200,7 @@ class Wallet(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='wallet')
     balance = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     created_at = models.DateTimeField(auto_now_add=True)
-    
-    class Meta:
-        indexes = [
-            models.Index(fields=['user']),
-            models.Index(fields=['balance']),
-        ]
-    
+
     def __str__(self):
         return f"Wallet of {self.user.username}"
 
@@ -214,19 +222,32 @@ class Transaction(models.Model):
     type = models.CharField(max_length=10, choices=TYPE_CHOICES)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     reason = models.CharField(max_length=20, choices=REASON_CHOICES)
+    # Wallet balance right after this transaction; set by ezyapp.ledger.post_transaction
+    running_balance = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         indexes = [
-            models.Index(fields=['wallet']),
-            models.Index(fields=['type']),
-            models.Index(fields=['reason']),
-            models.Index(fields=['created_at']),
+            models.Index(fields=['wallet', '-created_at'], name='txn_wallet_created_idx'),
         ]
     
     def __str__(self):
         return f"{self.type} transaction of {self.amount} for {self.wallet.user.username}"
 
+class WalletCheckpoint(models.Model):
+    """The balance of a wallet at ``as_of``, written daily by a periodic task."""
+    wallet = models.ForeignKey(Wallet, on_delete=models.CASCADE, related_name='checkpoints')
+    as_of = models.DateTimeField()
+    balance = models.DecimalField(max_digits=12, decimal_places=2)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['wallet', 'as_of'], name='checkpoint_wallet_as_of_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.wallet} at {self.as_of}: {self.balance}"
+
 class Notification(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
     message = models.TextField()
@@ -235,10 +256,206 @@ class Notification(models.Model):
     
     class Meta:
         indexes = [
-            models.Index(fields=['user']),
-            models.Index(fields=['is_read']),
-            models.Index(fields=['created_at']),
+            models.Index(fields=['user', '-created_at'], name='notif_user_created_idx'),
+            models.Index(fields=['user', '-created_at'], name='notif_user_unread_idx',
+                         condition=Q(is_read=False)),
         ]
     
     def __str__(self):
         return f"Notification for {self.user.username}: {self.message[:30]}..."
+
+
+# Archive tables
+#
+# Rows are moved here by the sweep_jobs command once they are settled and
+# older than the retention window. Primary keys are copied from the live
+# tables so archived objects keep the ids clients already know.
+
+class ArchivedJob(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_jobs')
+    title = models.CharField(max_length=200)
+    description = models.TextField()
+    location_lat = models.DecimalField(max_digits=10, decimal_places=7)
+    location_long = models.DecimalField(max_digits=10, decimal_places=7)
+    location_address = models.CharField(max_length=255)
+    category = models.CharField(max_length=20, choices=Job.CATEGORY_CHOICES)
+    job_type = models.CharField(max_length=10, choices=Job.JOB_TYPE_CHOICES)
+    price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    hourly_rate = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField(null=True, blank=True)
+    status = models.CharField(max_length=20, choices=Job.STATUS_CHOICES)
+    assigned_to = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        related_name='archived_assigned_jobs',
+        null=True,
+        blank=True
+    )
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='archjob_user_created_idx'),
+            models.Index(fields=['assigned_to', '-created_at'], name='archjob_assignee_created_idx'),
+        ]
+
+    def __str__(self):
+        return self.title
+
+class ArchivedJobApplication(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    # The job may itself be live or archived, so only its id is kept
+    job_id = models.BigIntegerField(db_index=True)
+    # Denormalised job owner so posters can still list applications to their jobs
+    poster = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_received_applications')
+    helper = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_job_applications')
+    status = models.CharField(max_length=20, choices=JobApplication.STATUS_CHOICES)
+    message = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['helper', '-created_at'], name='archapp_helper_created_idx'),
+            models.Index(fields=['poster', '-created_at'], name='archapp_poster_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"Archived application {self.id} by {self.helper.username}"
+
+class ArchivedNotification(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_notifications')
+    message = models.TextField()
+    is_read = models.BooleanField(default=True)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='archnotif_user_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"Archived notification for {self.user.username}: {self.message[:30]}..."
+
+class OutboxEvent(models.Model):
+    """
+    A domain event recorded in the same transaction as the change that caused
+    it and delivered to handlers later by the process_outbox worker.
+    """
+    event_type = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    # Failed events are retried with backoff once this time has passed
+    available_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['available_at'], name='outbox_pending_idx',
+                condition=Q(processed_at__isnull=True)
+            ),
+            models.Index(fields=['processed_at'], name='outbox_processed_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} #{self.id}"
+
+class Task(models.Model):
+    """A unit of background work claimed and run by the run_worker command."""
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    )
+
+    name = models.CharField(max_length=200)
+    args = models.JSONField(default=list)
+    kwargs = models.JSONField(default=dict)
+    queue = models.CharField(max_length=50, default='default')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_at = models.DateTimeField(default=timezone.now)
+    # Set for periodic runs so each slot is enqueued once across all workers
+    unique_key = models.CharField(max_length=255, unique=True, null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['queue', 'run_at'], name='task_queued_idx',
+                condition=Q(status='queued')
+            ),
+            models.Index(
+                fields=['locked_at'], name='task_running_idx',
+                condition=Q(status='running')
+            ),
+            models.Index(fields=['status', 'finished_at'], name='task_status_finished_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.id} ({self.status})"
+
+class IdempotencyKey(models.Model):
+    """
+    A client-supplied Idempotency-Key and the response it produced, replayed
+    by IdempotencyMiddleware when the same request is retried.
+    """
+    scope = models.CharField(max_length=100)
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_headers = models.JSONField(default=dict)
+    response_body = models.BinaryField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'key'], name='idempotency_scope_key_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['expires_at'], name='idempotency_expires_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.key} ({self.scope})"
+
+class UserImport(models.Model):
+    """
+    A bulk user registration posted to /api/users/import/ and run in the
+    background by the register_user_import task (see ezyapp/onboarding.py).
+    """
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    )
+
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='user_imports')
+    content_type = models.CharField(max_length=100)
+    # The uploaded rows, plain-text passwords included, encrypted (see ezyapp/onboarding.py);
+    # cleared once the import has run or expired
+    data = models.BinaryField(blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    report = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"User import #{self.id} ({self.status})"
@@ -0,0 +1,207 @@
+"""
+Bulk user registration for partner onboarding.
+
+Rows (NDJSON or CSV, see ezyapp/imports.py) are validated like a signup,
+in chunks. Passwords are hashed in a process pool, because the PBKDF2
+hasher is CPU-bound and a single process would spend most of an import
+hashing. Each chunk is inserted in one transaction: users, their wallets
+and the document entries of helpers with one bulk_create each, instead of
+a signup's four writes per user.
+
+The import_users command runs an import in the foreground with a hashing
+pool. POST /api/users/import/ stores the body as a UserImport and returns
+at once; the register_user_import task runs it on a worker, hashing in
+the worker's own process, and records the report on the UserImport.
+Hashing a thousand passwords takes minutes, so the stored body still holds
+them in plain text: it is encrypted with a key derived from SECRET_KEY and
+cleared when the import finishes. Imports whose task is gone (say, its
+worker was killed) or that are older than USER_IMPORT_MAX_AGE are failed
+and cleared by the expire_user_imports task.
+
+bulk_create sends no post_save signals. Nothing a bulk registration writes
+needs them: rows carry no profile picture, and the query cache versions
+are bumped by the caching queryset itself (see ezyapp/querycache.py).
+"""
+import base64
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from datetime import timedelta
+from itertools import islice
+
+import django
+from cryptography.fernet import Fernet, MultiFernet
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.crypto import salted_hmac
+from rest_framework import serializers
+
+from .imports import iter_chunks, iter_rows
+from .models import HelperDocument, Task, UserImport, Wallet
+
+User = get_user_model()
+
+IMPORT_TASK = 'ezyapp.tasks.register_user_import'
+
+
+def get_hash_workers(workers=None):
+    return workers or getattr(settings, 'USER_IMPORT_HASH_WORKERS', None) or os.cpu_count() or 1
+
+
+def get_hash_pool(workers):
+    """A process pool hashing passwords, or None to hash in this process."""
+    if workers <= 1:
+        return None
+    # Spawned workers set Django up themselves, so they use the same hashers
+    return ProcessPoolExecutor(
+        workers, mp_context=multiprocessing.get_context('spawn'), initializer=django.setup
+    )
+
+
+def hash_passwords(passwords, pool=None, workers=1):
+    if pool is None or len(passwords) < 2:
+        return [make_password(password) for password in passwords]
+    chunksize = max(1, len(passwords) // (workers * 4))
+    return list(pool.map(make_password, passwords, chunksize=chunksize))
+
+
+def create_accounts(users):
+    """Insert the wallets of ``users`` and the document entries of the helpers among them."""
+    Wallet.objects.bulk_create([Wallet(user=user) for user in users])
+    HelperDocument.objects.bulk_create([HelperDocument(user=user) for user in users if user.user_type == 'helper'])
+
+
+def register_users(rows, context=None, chunk_size=None, max_rows=None, workers=None):
+    """
+    Validate and insert user ``rows``, each with a plain-text ``password``.
+
+    Returns a report like ezyapp.imports.import_jobs: the number of created
+    and failed rows, and the errors of each failed row (1-based), capped at
+    USER_IMPORT_MAX_ERRORS.
+    """
+    from .serializers import BulkUserSerializer
+
+    chunk_size = chunk_size or getattr(settings, 'USER_IMPORT_CHUNK_SIZE', 500)
+    max_rows = max_rows or getattr(settings, 'USER_IMPORT_MAX_ROWS', 1000)
+    max_errors = getattr(settings, 'USER_IMPORT_MAX_ERRORS', 1000)
+
+    validator = BulkUserSerializer(context=context or {})
+    report = {'created': 0, 'failed': 0, 'truncated': False, 'errors': []}
+    rows = iter(rows)
+    row_number = 0
+    seen_usernames = set()
+
+    def fail(number, errors):
+        report['failed'] += 1
+        if len(report['errors']) < max_errors:
+            report['errors'].append({'row': number, 'errors': errors})
+
+    workers = get_hash_workers(workers)
+    pool = get_hash_pool(workers)
+    with pool or nullcontext():
+        for chunk in iter_chunks(islice(rows, max_rows), chunk_size):
+            valid = []
+            for row in chunk:
+                row_number += 1
+                try:
+                    if isinstance(row, serializers.ValidationError):
+                        raise row
+                    validated = validator.run_validation(row)
+                except serializers.ValidationError as exc:
+                    fail(row_number, exc.detail)
+                    continue
+                valid.append((row_number, validated))
+
+            # Usernames are checked for the whole chunk at once, not with a query per row
+            usernames = [validated['username'] for _, validated in valid]
+            taken = seen_usernames.union(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+            accepted = []
+            for number, validated in valid:
+                if validated['username'] in taken:
+                    fail(number, {'username': ['A user with that username already exists.']})
+                    continue
+                taken.add(validated['username'])
+                accepted.append((number, validated))
+            seen_usernames.update(validated['username'] for _, validated in accepted)
+
+            # Hash outside the transaction so no locks are held meanwhile
+            hashes = hash_passwords([validated.pop('password') for _, validated in accepted], pool, workers)
+            users = [User(password=password, **validated) for (_, validated), password in zip(accepted, hashes)]
+            try:
+                with transaction.atomic():
+                    User.objects.bulk_create(users, batch_size=chunk_size)
+                    create_accounts(users)
+            except IntegrityError:
+                # A username was registered concurrently; the whole chunk is rolled back
+                for number, _ in accepted:
+                    fail(number, {'non_field_errors': ['Not created: a row in this chunk conflicts with an existing user.']})
+                continue
+            report['created'] += len(users)
+
+    # Duplicate usernames are found after the rest of their chunk is validated
+    report['errors'].sort(key=lambda error: error['row'])
+    report['truncated'] = next(rows, None) is not None
+    return report
+
+
+def get_upload_cipher():
+    """Fernet keyed from SECRET_KEY; the fallbacks still decrypt imports queued before a key rotation."""
+    secrets = [settings.SECRET_KEY, *getattr(settings, 'SECRET_KEY_FALLBACKS', [])]
+    return MultiFernet([
+        Fernet(base64.urlsafe_b64encode(
+            salted_hmac('ezyapp.onboarding.upload', 'user-import', secret=secret, algorithm='sha256').digest()
+        ))
+        for secret in secrets
+    ])
+
+
+def seal_upload(data):
+    return get_upload_cipher().encrypt(data)
+
+
+def open_upload(data):
+    return get_upload_cipher().decrypt(bytes(data))
+
+
+def run_user_import(import_id):
+    """Run a queued UserImport, record its report and drop its rows."""
+    claimed = UserImport.objects.filter(pk=import_id, status='queued').update(status='running')
+    if not claimed:
+        return
+    user_import = UserImport.objects.get(pk=import_id)
+    try:
+        report = register_users(
+            iter_rows(io.BytesIO(open_upload(user_import.data)), user_import.content_type), workers=1
+        )
+    except Exception:
+        UserImport.objects.filter(pk=import_id).update(status='failed', data=b'', finished_at=timezone.now())
+        raise
+    UserImport.objects.filter(pk=import_id).update(
+        status='succeeded', report=report, data=b'', finished_at=timezone.now()
+    )
+
+
+def expire_user_imports(now=None):
+    """
+    Fail unfinished imports and drop their rows when no task will finish
+    them, or when they are older than USER_IMPORT_MAX_AGE. Returns how
+    many were failed.
+    """
+    now = now or timezone.now()
+    # The task is enqueued once the upload commits; give it the lock timeout to show up
+    grace = now - timedelta(seconds=getattr(settings, 'TASK_LOCK_TIMEOUT', 600))
+    expiry = now - timedelta(seconds=getattr(settings, 'USER_IMPORT_MAX_AGE', 60 * 60 * 24))
+    pending = {
+        args[0] for args in Task.objects.filter(
+            name=IMPORT_TASK, status__in=('queued', 'running')
+        ).values_list('args', flat=True) if args
+    }
+    return UserImport.objects.filter(status__in=('queued', 'running')).filter(
+        Q(created_at__lt=grace) & ~Q(pk__in=pending) | Q(created_at__lt=expiry)
+    ).update(status='failed', data=b'', finished_at=now)
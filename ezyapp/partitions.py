@@ -0,0 +1,284 @@
+"""
+Monthly partitions of the Transaction and Notification tables (PostgreSQL).
+
+Migration 0010 turns both tables into tables partitioned by range of
+``created_at``, with one partition per calendar month (UTC) named
+``<table>_pYYYY_MM`` and a ``<table>_default`` partition that catches rows
+outside every month created so far. Because a partitioned table's unique
+constraints must include the partition key, the primary key becomes
+``(id, created_at)``; ids still come from one sequence, so they stay unique.
+
+Partitions are managed with the ``partitions`` command:
+
+* ``create`` adds the partitions from the current month to
+  PARTITION_MONTHS_AHEAD months ahead (also run daily as a task), moving any
+  matching rows out of the default partition;
+* ``detach`` detaches the partitions of months before a given month, leaving
+  them as plain tables the API no longer reads;
+* ``archive`` writes detached partitions to gzipped CSV files in
+  PARTITION_ARCHIVE_DIR and drops them.
+
+Queries prune partitions when they filter on ``created_at``; list endpoints
+get a default date window for that reason (see ezyapp/filters.py).
+
+On other databases (SQLite in development) the tables stay as they are,
+the migration does nothing and the commands refuse to run.
+"""
+import gzip
+import os
+import re
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections, transaction
+
+PARTITIONED_MODELS = ('ezyapp.Transaction', 'ezyapp.Notification')
+PARTITION_KEY = 'created_at'
+
+
+def is_supported(connection):
+    return connection.vendor == 'postgresql'
+
+
+def get_partitioned_models(labels=None):
+    return [apps.get_model(label) for label in labels or PARTITIONED_MODELS]
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def parse_month(value):
+    """A ``YYYY-MM`` string as the first day of that month."""
+    return datetime.strptime(value, '%Y-%m').date()
+
+
+def partition_name(table, month):
+    return f'{table}_p{month:%Y_%m}'
+
+
+def bound(month):
+    return f"'{month:%Y-%m-%d} 00:00:00+00'"
+
+
+def get_table_month(table, name):
+    match = re.fullmatch(re.escape(table) + r'_p(\d{4})_(\d{2})', name)
+    return date(int(match[1]), int(match[2]), 1) if match else None
+
+
+def is_partitioned(connection, table):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = %s AND pg_table_is_visible(c.oid)",
+            [table],
+        )
+        return cursor.fetchone() is not None
+
+
+def get_partitions(connection, table):
+    """
+    ``{month: attached}`` for the monthly partitions of ``table``, attached or
+    detached (detached partitions are found by name).
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname, EXISTS (SELECT 1 FROM pg_inherits i WHERE i.inhrelid = c.oid) "
+            "FROM pg_class c WHERE c.relkind = 'r' AND c.relname LIKE %s AND pg_table_is_visible(c.oid)",
+            [table.replace('_', r'\_') + r'\_p%'],
+        )
+        partitions = {}
+        for name, attached in cursor.fetchall():
+            month = get_table_month(table, name)
+            if month is not None:
+                partitions[month] = attached
+        return dict(sorted(partitions.items()))
+
+
+def create_partition(connection, table, month):
+    """
+    Add the partition of ``month`` to ``table`` unless it exists. Rows of that
+    month already in the default partition are moved into it.
+    """
+    name = partition_name(table, month)
+    default = f'{table}_default'
+    lower, upper = bound(month), bound(add_months(month, 1))
+    qn = connection.ops.quote_name
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        if month in get_partitions(connection, table):
+            return False
+        cursor.execute(
+            f'SELECT 1 FROM {qn(default)} WHERE {qn(PARTITION_KEY)} >= {lower} '
+            f'AND {qn(PARTITION_KEY)} < {upper} LIMIT 1'
+        )
+        if cursor.fetchone() is None:
+            cursor.execute(
+                f'CREATE TABLE {qn(name)} PARTITION OF {qn(table)} FOR VALUES FROM ({lower}) TO ({upper})'
+            )
+            return True
+        # A new partition can't overlap rows held by the default partition
+        cursor.execute(f'CREATE TABLE {qn(name)} (LIKE {qn(table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM {qn(default)} WHERE {qn(PARTITION_KEY)} >= {lower} '
+            f'AND {qn(PARTITION_KEY)} < {upper} RETURNING *) INSERT INTO {qn(name)} SELECT * FROM moved'
+        )
+        cursor.execute(
+            f'ALTER TABLE {qn(table)} ATTACH PARTITION {qn(name)} FOR VALUES FROM ({lower}) TO ({upper})'
+        )
+        return True
+
+
+def create_partitions(using='default', months_ahead=None, today=None):
+    """Create the partitions from this month to ``months_ahead`` months ahead. Returns their names."""
+    connection = connections[using]
+    if months_ahead is None:
+        months_ahead = getattr(settings, 'PARTITION_MONTHS_AHEAD', 3)
+    current = month_start(today or datetime.now(dt_timezone.utc))
+    created = []
+    for model in get_partitioned_models():
+        table = model._meta.db_table
+        for offset in range(months_ahead + 1):
+            month = add_months(current, offset)
+            if create_partition(connection, table, month):
+                created.append(partition_name(table, month))
+    return created
+
+
+def detach_partitions(before, labels=None, using='default'):
+    """Detach the monthly partitions of months before ``before``. Returns their names."""
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    detached = []
+    for model in get_partitioned_models(labels):
+        table = model._meta.db_table
+        for month, attached in get_partitions(connection, table).items():
+            if attached and month < before:
+                name = partition_name(table, month)
+                with connection.cursor() as cursor:
+                    cursor.execute(f'ALTER TABLE {qn(table)} DETACH PARTITION {qn(name)}')
+                detached.append(name)
+    return detached
+
+
+def archive_partitions(directory=None, labels=None, using='default', drop=True):
+    """
+    Write every detached partition to ``<directory>/<partition>.csv.gz``, then
+    drop it. Returns ``(name, path)`` pairs.
+    """
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    directory = str(directory or getattr(settings, 'PARTITION_ARCHIVE_DIR', settings.BASE_DIR / 'partition_archive'))
+    os.makedirs(directory, exist_ok=True)
+    archived = []
+    for model in get_partitioned_models(labels):
+        table = model._meta.db_table
+        for month, attached in get_partitions(connection, table).items():
+            if attached:
+                continue
+            name = partition_name(table, month)
+            path = os.path.join(directory, f'{name}.csv.gz')
+            temporary_path = path + '.tmp'
+            connection.ensure_connection()
+            with gzip.open(temporary_path, 'wb') as output, connection.cursor() as cursor:
+                with cursor.cursor.copy(f'COPY {qn(name)} TO STDOUT WITH (FORMAT csv, HEADER)') as copy:
+                    for block in copy:
+                        output.write(block)
+            os.replace(temporary_path, path)
+            if drop:
+                with connection.cursor() as cursor:
+                    cursor.execute(f'DROP TABLE {qn(name)}')
+            archived.append((name, path))
+    return archived
+
+
+def get_table_definitions(cursor, table):
+    """CREATE INDEX statements and foreign key / check constraints of ``table``, bar the primary key."""
+    cursor.execute(
+        "SELECT indexdef FROM pg_indexes WHERE schemaname = current_schema() AND tablename = %s "
+        "AND indexname NOT IN (SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass)",
+        [table, table],
+    )
+    indexes = [row[0] for row in cursor.fetchall()]
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = %s::regclass AND contype IN ('f', 'c') ORDER BY conname",
+        [table],
+    )
+    return indexes, cursor.fetchall()
+
+
+def restore_table_definitions(cursor, table, indexes, constraints, quote_name):
+    for statement in indexes:
+        cursor.execute(statement)
+    for name, definition in constraints:
+        cursor.execute(f'ALTER TABLE {quote_name(table)} ADD CONSTRAINT {quote_name(name)} {definition}')
+
+
+def partition_table(schema_editor, model, months_ahead=None):
+    """Turn ``model``'s table into a monthly partitioned table, keeping its rows (migration helper)."""
+    connection = schema_editor.connection
+    qn = schema_editor.quote_name
+    table = model._meta.db_table
+    old, sequence = f'{table}_unpartitioned', f'{table}_id_seq'
+    if months_ahead is None:
+        months_ahead = getattr(settings, 'PARTITION_MONTHS_AHEAD', 3)
+
+    with connection.cursor() as cursor:
+        indexes, constraints = get_table_definitions(cursor, table)
+        cursor.execute(f'SELECT MIN({qn(PARTITION_KEY)}), MAX(id) FROM {qn(table)}')
+        oldest, max_id = cursor.fetchone()
+
+        cursor.execute(f'ALTER TABLE {qn(table)} RENAME TO {qn(old)}')
+        cursor.execute(
+            f'CREATE TABLE {qn(table)} (LIKE {qn(old)} INCLUDING DEFAULTS) PARTITION BY RANGE ({qn(PARTITION_KEY)})'
+        )
+        cursor.execute(f'CREATE SEQUENCE {qn(table + "_partitioned_id_seq")} OWNED BY {qn(table)}.id')
+        if max_id is not None:
+            cursor.execute('SELECT setval(%s, %s)', [table + '_partitioned_id_seq', max_id])
+        cursor.execute(
+            f"ALTER TABLE {qn(table)} ALTER COLUMN id SET DEFAULT nextval('{table}_partitioned_id_seq'::regclass)"
+        )
+        cursor.execute(f'CREATE TABLE {qn(table + "_default")} PARTITION OF {qn(table)} DEFAULT')
+
+        current = month_start(datetime.now(dt_timezone.utc))
+        month = min(month_start(oldest), current) if oldest is not None else current
+        while month <= add_months(current, months_ahead):
+            upper = add_months(month, 1)
+            cursor.execute(
+                f'CREATE TABLE {qn(partition_name(table, month))} PARTITION OF {qn(table)} '
+                f'FOR VALUES FROM ({bound(month)}) TO ({bound(upper)})'
+            )
+            month = upper
+
+        cursor.execute(f'INSERT INTO {qn(table)} SELECT * FROM {qn(old)}')
+        cursor.execute(f'DROP TABLE {qn(old)}')
+        cursor.execute(f'ALTER SEQUENCE {qn(table + "_partitioned_id_seq")} RENAME TO {qn(sequence)}')
+        cursor.execute(
+            f'ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(table + "_pkey")} PRIMARY KEY (id, {qn(PARTITION_KEY)})'
+        )
+        restore_table_definitions(cursor, table, indexes, constraints, qn)
+
+
+def unpartition_table(schema_editor, model):
+    """Turn a partitioned table back into a plain one (reverses partition_table)."""
+    connection = schema_editor.connection
+    qn = schema_editor.quote_name
+    table = model._meta.db_table
+    old = f'{table}_partitioned'
+
+    with connection.cursor() as cursor:
+        indexes, constraints = get_table_definitions(cursor, table)
+        # Detached partitions keep their data but are no longer part of the table
+        cursor.execute(f'ALTER TABLE {qn(table)} RENAME TO {qn(old)}')
+        cursor.execute(f'CREATE TABLE {qn(table)} (LIKE {qn(old)} INCLUDING DEFAULTS)')
+        cursor.execute(f'ALTER SEQUENCE {qn(table + "_id_seq")} OWNED BY {qn(table)}.id')
+        cursor.execute(f'INSERT INTO {qn(table)} SELECT * FROM {qn(old)}')
+        cursor.execute(f'DROP TABLE {qn(old)}')
+        cursor.execute(f'ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(table + "_pkey")} PRIMARY KEY (id)')
+        restore_table_definitions(cursor, table, indexes, constraints, qn)
@@ -0,0 +1,366 @@
+"""
+Per-request profiling.
+
+ProfilingMiddleware profiles a request when a staff user sends
+``X-Profile: 1`` (or ``X-Profile: sample``), and a random PROFILING_SAMPLE_RATE
+fraction of other API requests. A profile records:
+
+* where the time went: a cProfile run (``cprofile`` mode, the default for the
+  header) or stacks sampled every PROFILING_SAMPLE_INTERVAL seconds from the
+  request thread (``sample`` mode, the default for sampled traffic, which
+  costs far less);
+* every SQL statement run, with its duration;
+* the time spent rendering each serializer field (inclusive of nested
+  serializers), and of each values()-based list page.
+
+Profiles are written as JSON files to PROFILING_DIR, keeping the newest
+PROFILING_MAX_FILES, and the response carries their id in ``X-Profile-Id``.
+Staff can list and download them from ``/admin/profiles/`` as pstats files
+(for ``python -m pstats`` or snakeviz) or speedscope JSON
+(https://www.speedscope.app).
+"""
+import cProfile
+import json
+import marshal
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+from contextvars import ContextVar
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib import admin
+from django.db import connections
+from django.http import Http404, HttpResponse
+from django.template.response import TemplateResponse
+from rest_framework.fields import SkipField
+from rest_framework.relations import PKOnlyObject
+
+from .media import get_media_user
+
+PROFILE_MODES = ('cprofile', 'sample')
+MAX_STACK_DEPTH = 128
+
+_current = ContextVar('ezyapp_profile', default=None)
+
+
+def get_current_profile():
+    """The RequestProfile of the request being profiled in this context, if any."""
+    return _current.get()
+
+
+def get_profile_dir():
+    return str(getattr(settings, 'PROFILING_DIR', settings.BASE_DIR / 'profiles'))
+
+
+def frame_key(code):
+    return code.co_filename, code.co_firstlineno, code.co_name
+
+
+class StackSampler(threading.Thread):
+    """Count the stacks of ``thread_id`` every ``interval`` seconds until stopped."""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(name='profile-sampler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                stack.append(frame_key(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.samples[tuple(reversed(stack))] += 1
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+class RequestProfile:
+    def __init__(self, request, mode, trigger):
+        self.id = f'{datetime.now(dt_timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}'
+        self.mode = mode
+        self.trigger = trigger
+        self.method = request.method
+        self.path = request.get_full_path()
+        self.queries = []
+        self.serializers = defaultdict(lambda: [0, 0.0])  # name -> [calls, seconds]
+        self.profiler = None
+        self.sampler = None
+
+    def execute_wrapper(self, alias):
+        def wrapper(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                self.queries.append({
+                    'alias': alias,
+                    'sql': sql,
+                    'duration': time.perf_counter() - started,
+                    'many': many,
+                })
+        return wrapper
+
+    def record_serializer(self, name, seconds):
+        cost = self.serializers[name]
+        cost[0] += 1
+        cost[1] += seconds
+
+    def run(self, get_response, request):
+        token = _current.set(self)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(self.execute_wrapper(connection.alias)))
+                if self.mode == 'cprofile':
+                    self.profiler = cProfile.Profile()
+                    self.profiler.enable()
+                else:
+                    self.sampler = StackSampler(
+                        threading.get_ident(), getattr(settings, 'PROFILING_SAMPLE_INTERVAL', 0.001)
+                    )
+                    self.sampler.start()
+                try:
+                    return get_response(request)
+                finally:
+                    if self.profiler is not None:
+                        self.profiler.disable()
+                    else:
+                        self.sampler.stop()
+        finally:
+            self.duration = time.perf_counter() - started
+            _current.reset(token)
+
+    def to_dict(self, response, user):
+        data = {
+            'id': self.id,
+            'mode': self.mode,
+            'trigger': self.trigger,
+            'method': self.method,
+            'path': self.path,
+            'user': getattr(user, 'pk', None),
+            'status': response.status_code,
+            'duration': self.duration,
+            'queries': self.queries,
+            'serializers': {
+                name: {'calls': calls, 'seconds': seconds}
+                for name, (calls, seconds) in sorted(self.serializers.items(), key=lambda item: -item[1][1])
+            },
+        }
+        if self.profiler is not None:
+            self.profiler.create_stats()
+            data['stats'] = [
+                [*func, cc, nc, tt, ct, [[*caller, *edge] for caller, edge in callers.items()]]
+                for func, (cc, nc, tt, ct, callers) in self.profiler.stats.items()
+            ]
+        else:
+            data['interval'] = self.sampler.interval
+            data['samples'] = [[list(map(list, stack)), count] for stack, count in self.sampler.samples.items()]
+        return data
+
+
+def profile_serializer(serializer, instance, profile):
+    """Serializer.to_representation, timing each field."""
+    ret = {}
+    prefix = type(serializer).__name__
+    for field in serializer._readable_fields:
+        started = time.perf_counter()
+        try:
+            attribute = field.get_attribute(instance)
+        except SkipField:
+            continue
+        check_for_none = attribute.pk if isinstance(attribute, PKOnlyObject) else attribute
+        if check_for_none is None:
+            ret[field.field_name] = None
+        else:
+            ret[field.field_name] = field.to_representation(attribute)
+        profile.record_serializer(f'{prefix}.{field.field_name}', time.perf_counter() - started)
+    return ret
+
+
+def save_profile(data):
+    directory = get_profile_dir()
+    os.makedirs(directory, exist_ok=True)
+    descriptor, temporary_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(descriptor, 'w') as output:
+        json.dump(data, output)
+    os.replace(temporary_path, os.path.join(directory, f'{data["id"]}.json'))
+
+    # Ids start with their timestamp, so name order is age order
+    names = sorted(name for name in os.listdir(directory) if name.endswith('.json'))
+    for name in names[:-getattr(settings, 'PROFILING_MAX_FILES', 200)]:
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            pass
+
+
+def load_profile(profile_id):
+    if not profile_id.replace('-', '').isalnum():
+        raise Http404
+    try:
+        with open(os.path.join(get_profile_dir(), f'{profile_id}.json')) as source:
+            return json.load(source)
+    except FileNotFoundError:
+        raise Http404
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.header = getattr(settings, 'PROFILING_HEADER', 'X-Profile')
+        self.sample_rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 0)
+        self.sample_mode = getattr(settings, 'PROFILING_SAMPLE_MODE', 'sample')
+        self.path_prefix = getattr(settings, 'PROFILING_PATH_PREFIX', '/api/')
+
+    def get_mode(self, request):
+        """``(mode, trigger)`` if the request should be profiled, else None."""
+        requested = request.headers.get(self.header)
+        if requested:
+            user = get_media_user(request)
+            if user is not None and user.is_staff:
+                return (requested if requested in PROFILE_MODES else 'cprofile'), 'header'
+        if self.sample_rate and request.path.startswith(self.path_prefix) and random.random() < self.sample_rate:
+            return self.sample_mode, 'sampled'
+        return None
+
+    def __call__(self, request):
+        mode = self.get_mode(request)
+        if mode is None:
+            return self.get_response(request)
+
+        profile = RequestProfile(request, *mode)
+        response = profile.run(self.get_response, request)
+        save_profile(profile.to_dict(response, get_media_user(request)))
+        response['X-Profile-Id'] = profile.id
+        return response
+
+
+def to_pstats(data):
+    """Profile data as a marshalled pstats file (cProfile profiles only)."""
+    stats = {}
+    for file, line, name, cc, nc, tt, ct, callers in data['stats']:
+        stats[(file, line, name)] = (
+            cc, nc, tt, ct, {(c[0], c[1], c[2]): tuple(c[3:]) for c in callers}
+        )
+    return marshal.dumps(stats)
+
+
+def get_weighted_stacks(data):
+    """``(stack, seconds)`` pairs, leaf last."""
+    if 'samples' in data:
+        return [([tuple(frame) for frame in stack], count * data['interval']) for stack, count in data['samples']]
+
+    # cProfile keeps no stacks, only caller -> callee edges with their times.
+    # Rebuild approximate stacks by splitting each function's own time across
+    # its callers in proportion to the time each call edge accounts for.
+    callers = {}
+    self_times = {}
+    for file, line, name, cc, nc, tt, ct, edges in data['stats']:
+        func = (file, line, name)
+        self_times[func] = tt
+        callers[func] = [((c[0], c[1], c[2]), c[6]) for c in edges]
+    threshold = data['duration'] * 0.0005
+
+    def expand(path, weight):
+        edges = [(caller, ct) for caller, ct in callers.get(path[0], ()) if caller not in path]
+        total = sum(ct for _, ct in edges)
+        if not edges or total <= 0 or len(path) >= MAX_STACK_DEPTH:
+            yield path, weight
+            return
+        for caller, ct in edges:
+            share = weight * ct / total
+            if share >= threshold:
+                yield from expand([caller] + path, share)
+            elif share > 0:
+                yield path, share
+
+    stacks = []
+    for func, tt in self_times.items():
+        if tt > 0:
+            stacks.extend(expand([func], tt))
+    return stacks
+
+
+def to_speedscope(data):
+    frames, index = [], {}
+    samples, weights = [], []
+    for stack, weight in get_weighted_stacks(data):
+        sample = []
+        for frame in stack:
+            if frame not in index:
+                index[frame] = len(frames)
+                file, line, name = frame
+                frames.append({'name': name, 'file': file, 'line': line})
+            sample.append(index[frame])
+        samples.append(sample)
+        weights.append(weight)
+    title = f'{data["method"]} {data["path"]} ({data["mode"]})'
+    return {
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'name': title,
+        'exporter': 'ezydoo',
+        'shared': {'frames': frames},
+        'profiles': [{
+            'type': 'sampled',
+            'name': title,
+            'unit': 'seconds',
+            'startValue': 0,
+            'endValue': sum(weights),
+            'samples': samples,
+            'weights': weights,
+        }],
+    }
+
+
+def profile_list_view(request):
+    """Admin page listing the stored profiles, newest first."""
+    directory = get_profile_dir()
+    names = sorted(
+        (name for name in os.listdir(directory) if name.endswith('.json')), reverse=True
+    ) if os.path.isdir(directory) else []
+    profiles = []
+    for name in names:
+        try:
+            data = load_profile(name[:-len('.json')])
+        except Http404:
+            continue  # rotated away while listing
+        profiles.append({
+            **{key: data[key] for key in ('id', 'mode', 'trigger', 'method', 'path', 'status', 'user')},
+            'duration_ms': data['duration'] * 1000,
+            'query_count': len(data['queries']),
+            'query_ms': sum(query['duration'] for query in data['queries']) * 1000,
+            'serializer_ms': sum(cost['seconds'] for cost in data['serializers'].values()) * 1000,
+        })
+    context = {**admin.site.each_context(request), 'title': 'Request profiles', 'profiles': profiles}
+    return TemplateResponse(request, 'admin/ezyapp/profiles.html', context)
+
+
+def profile_download_view(request, profile_id, fmt):
+    data = load_profile(profile_id)
+    if fmt == 'json':
+        response = HttpResponse(json.dumps(data, indent=1), content_type='application/json')
+    elif fmt == 'speedscope':
+        response = HttpResponse(json.dumps(to_speedscope(data)), content_type='application/json')
+        profile_id += '.speedscope'
+        fmt = 'json'
+    elif fmt == 'pstats' and 'stats' in data:
+        response = HttpResponse(to_pstats(data), content_type='application/octet-stream')
+    else:
+        raise Http404
+    response['Content-Disposition'] = f'attachment; filename="{profile_id}.{fmt}"'
+    return response
@@ -0,0 +1,222 @@
+"""
+Read-through cache for hot, rarely changing lookups.
+
+Models whose manager is a CachingManager gain ``queryset.cached()``, which
+evaluates the queryset through the cache, and ``get_cached(**lookup)``, a
+cached ``get()``:
+
+    User.objects.get_cached(pk=user_id)
+    HelperDocument.objects.filter(user=user).get_cached(pk=pk)
+
+User, HelperDocument and Job use one; Job only for its versions, which
+ezyapp/suggest.py follows. The lookups that go through it are the
+JWT user of every request, user profiles (alone or in bulk, with their
+verification documents) and the helper document status poll.
+
+Results are cached under a key built from the query's SQL and the current
+version of every model the query reads. Saving or deleting an instance, or
+calling update(), delete(), bulk_create() or bulk_update() on a caching
+queryset, bumps the model's version once the transaction commits, so
+entries for older versions are never read again and simply expire.
+
+Lookups go through a bounded in-process LRU (QUERY_CACHE_LOCAL_MAX_ENTRIES)
+before the shared cache (QUERY_CACHE_ALIAS). Versions are re-read from the
+shared cache at most every QUERY_CACHE_VERSION_TTL seconds, so a write in
+another process is seen within that delay; writes in this process are seen
+at once.
+
+The cache is bypassed, and lookups go straight to the database:
+
+* when QUERY_CACHE_ALIAS is a LocMemCache (the default without
+  CACHE_BACKEND), because each process would then keep its own versions
+  and never see another process's writes. Every process that writes to
+  these models (web, workers, cron jobs) must use the same shared cache;
+* inside a transaction, since results there may include writes that
+  haven't been committed or versioned yet.
+"""
+import hashlib
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import EmptyResultSet
+from django.db import connections, models, router, transaction
+from django.db.models.signals import post_delete, post_save
+
+VERSION_KEY = 'qc:v:{}'
+RESULT_KEY = 'qc:r:{}'
+
+
+class QueryCache:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.results = OrderedDict()  # key -> pickled result
+        self.versions = {}  # model label -> (version, read at)
+
+    @property
+    def shared(self):
+        return caches[getattr(settings, 'QUERY_CACHE_ALIAS', 'default')]
+
+    @property
+    def enabled(self):
+        """Whether the cache is shared by every process, so versions mean the same everywhere."""
+        return not isinstance(self.shared, LocMemCache)
+
+    def get_versions(self, labels):
+        ttl = getattr(settings, 'QUERY_CACHE_VERSION_TTL', 1.0)
+        now = time.monotonic()
+        versions, stale = {}, []
+        for label in labels:
+            version, read_at = self.versions.get(label, (None, 0))
+            if now - read_at < ttl:
+                versions[label] = version
+            else:
+                stale.append(label)
+        if stale:
+            found = self.shared.get_many([VERSION_KEY.format(label) for label in stale])
+            for label in stale:
+                key = VERSION_KEY.format(label)
+                version = found.get(key)
+                if version is None:
+                    # Start from the clock rather than 1, so a flushed shared
+                    # cache can't bring back versions other processes still hold
+                    self.shared.add(key, time.time_ns(), None)
+                    version = self.shared.get(key)
+                versions[label] = version
+                self.versions[label] = (version, now)
+        return versions
+
+    def bump(self, label):
+        key = VERSION_KEY.format(label)
+        try:
+            version = self.shared.incr(key)
+        except ValueError:
+            version = time.time_ns()
+            self.shared.set(key, version, None)
+        self.versions[label] = (version, time.monotonic())
+
+    def get_key(self, queryset):
+        query = queryset.query.clone()
+        sql, params = query.get_compiler(queryset.db).as_sql()
+        labels = sorted(get_query_labels(query))
+        versions = self.get_versions(labels)
+        signature = repr((queryset.db, sql, params, [(label, versions[label]) for label in labels]))
+        return RESULT_KEY.format(hashlib.sha256(signature.encode()).hexdigest())
+
+    def fetch(self, queryset, timeout=None):
+        """The results of ``queryset`` as a list, through the cache."""
+        if not self.enabled or connections[queryset.db].in_atomic_block:
+            return list(queryset)
+        try:
+            key = self.get_key(queryset)
+        except EmptyResultSet:
+            return []
+
+        with self.lock:
+            data = self.results.get(key)
+            if data is not None:
+                self.results.move_to_end(key)
+        if data is None:
+            data = self.shared.get(key)
+            if data is None:
+                data = pickle.dumps(list(queryset), pickle.HIGHEST_PROTOCOL)
+                self.shared.set(key, data, timeout or getattr(settings, 'QUERY_CACHE_TIMEOUT', 300))
+            self.remember(key, data)
+        # Unpickled per call, so callers never share (and mutate) one instance
+        return pickle.loads(data)
+
+    def remember(self, key, data):
+        with self.lock:
+            self.results[key] = data
+            self.results.move_to_end(key)
+            while len(self.results) > getattr(settings, 'QUERY_CACHE_LOCAL_MAX_ENTRIES', 1000):
+                self.results.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.results.clear()
+            self.versions.clear()
+
+
+query_cache = QueryCache()
+
+
+def get_query_labels(query):
+    """Labels of the models whose tables a compiled ``query`` reads."""
+    table_labels = get_table_labels()
+    tables = {join.table_name for join in query.alias_map.values()}
+    tables.add(query.model._meta.db_table)
+    return {table_labels[table] for table in tables if table in table_labels}
+
+
+@lru_cache(maxsize=None)
+def get_table_labels():
+    return {model._meta.db_table: model._meta.label for model in apps.get_models(include_auto_created=True)}
+
+
+def bump_version(model, using=None):
+    """Invalidate cached queries that read ``model``, once the current transaction commits."""
+    label = model._meta.label
+    transaction.on_commit(lambda: query_cache.bump(label), using=using or router.db_for_write(model))
+
+
+def instance_changed(sender, instance, using=None, **kwargs):
+    bump_version(sender, using)
+
+
+class CachingQuerySet(models.QuerySet):
+    def cached(self, timeout=None):
+        """Evaluate through the query cache and return a list."""
+        return query_cache.fetch(self, timeout)
+
+    def get_cached(self, *args, **kwargs):
+        """Like get(), through the query cache."""
+        results = self.filter(*args, **kwargs)[:2].cached()
+        if not results:
+            raise self.model.DoesNotExist(f'{self.model._meta.object_name} matching query does not exist.')
+        if len(results) > 1:
+            raise self.model.MultipleObjectsReturned(
+                f'get_cached() returned more than one {self.model._meta.object_name}.'
+            )
+        return results[0]
+
+    # Versions are bumped after writing: a bump before would let a concurrent
+    # read cache the old rows under the new version
+    def update(self, **kwargs):
+        result = super().update(**kwargs)
+        bump_version(self.model, self.db)
+        return result
+
+    def delete(self):
+        result = super().delete()
+        bump_version(self.model, self.db)
+        return result
+
+    def bulk_create(self, *args, **kwargs):
+        result = super().bulk_create(*args, **kwargs)
+        bump_version(self.model, self.db)
+        return result
+
+    def bulk_update(self, *args, **kwargs):
+        result = super().bulk_update(*args, **kwargs)
+        bump_version(self.model, self.db)
+        return result
+
+
+class CachingManagerMixin:
+    def contribute_to_class(self, cls, name):
+        super().contribute_to_class(cls, name)
+        if not cls._meta.abstract:
+            uid = f'querycache:{cls._meta.label}'
+            post_save.connect(instance_changed, sender=cls, weak=False, dispatch_uid=uid)
+            post_delete.connect(instance_changed, sender=cls, weak=False, dispatch_uid=uid)
+
+
+class CachingManager(CachingManagerMixin, models.Manager.from_queryset(CachingQuerySet)):
+    pass
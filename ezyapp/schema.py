@@ -0,0 +1,119 @@
+"""
+Pre-generated OpenAPI schema.
+
+``manage.py build_schema`` writes the schema to SCHEMA_ROOT at build time.
+The views below serve those files from memory instead of introspecting
+every viewset per request: ``/api/schema/`` revalidates with an ETag, and
+``/api/schema/<hash>.<format>`` (the URL the Redoc and Swagger pages load)
+is cached for a year since its content never changes. When no file has been
+built (and always under DEBUG, so docs follow code changes) the schema is
+generated once per process on first use.
+
+drf_spectacular's views import its schema generator, so the documentation
+views are only built when a documentation page is first requested.
+"""
+import hashlib
+import logging
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.shortcuts import redirect
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
+from django.views import View
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_FORMATS = {
+    'yaml': 'application/vnd.oai.openapi',
+    'json': 'application/vnd.oai.openapi+json',
+}
+
+
+def get_schema_path(fmt):
+    return Path(getattr(settings, 'SCHEMA_ROOT', settings.BASE_DIR / 'schema')) / f'openapi.{fmt}'
+
+
+def generate_schema(fmt):
+    """Introspect the API and render the schema as ``fmt``."""
+    from drf_spectacular.generators import SchemaGenerator
+    from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+
+    renderer = OpenApiJsonRenderer() if fmt == 'json' else OpenApiYamlRenderer()
+    return renderer.render(SchemaGenerator().get_schema(request=None, public=True), renderer_context={})
+
+
+@lru_cache(maxsize=len(SCHEMA_FORMATS))
+def get_schema_document(fmt):
+    """The schema as ``(content, digest)``, from SCHEMA_ROOT when it has been built."""
+    path = get_schema_path(fmt)
+    if not settings.DEBUG and path.exists():
+        content = path.read_bytes()
+    else:
+        if not settings.DEBUG:
+            logger.warning('%s not found; generating the schema at runtime. Run build_schema at build time.', path)
+        content = generate_schema(fmt)
+    return content, hashlib.sha256(content).hexdigest()[:16]
+
+
+def get_schema_url(fmt='json'):
+    return reverse('schema-hashed', kwargs={'digest': get_schema_document(fmt)[1], 'fmt': fmt})
+
+
+class SchemaView(View):
+    """Serve the pre-generated schema. YAML by default, JSON with ?format=json or an Accept header."""
+
+    def get_format(self, request, fmt=None):
+        if fmt:
+            return fmt
+        requested = request.GET.get('format')
+        if requested in SCHEMA_FORMATS:
+            return requested
+        return 'json' if 'json' in request.headers.get('Accept', '') else 'yaml'
+
+    def get(self, request, digest=None, fmt=None):
+        fmt = self.get_format(request, fmt)
+        if fmt not in SCHEMA_FORMATS:
+            raise Http404('Unknown schema format')
+        content, current = get_schema_document(fmt)
+        if digest is not None and digest != current:
+            # An old page asking for a previous schema gets the current one
+            return redirect('schema-hashed', digest=current, fmt=fmt)
+
+        etag = f'"{current}"'
+        if request.headers.get('If-None-Match') == etag:
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(content, content_type=SCHEMA_FORMATS[fmt])
+        response['ETag'] = etag
+        if digest is None:
+            patch_cache_control(response, public=True, no_cache=True)
+        else:
+            patch_cache_control(response, public=True, max_age=60 * 60 * 24 * 365, immutable=True)
+        return response
+
+
+class HashedSchemaMixin:
+    """Point the documentation page at the content-hashed schema URL."""
+
+    def _get_schema_url(self, request):
+        return get_schema_url('json')
+
+
+@lru_cache(maxsize=None)
+def get_docs_view(page):
+    """The ReDoc (``page='redoc'``) or Swagger UI view, built on first use."""
+    from drf_spectacular.views import SpectacularRedocView, SpectacularSwaggerView
+
+    base = SpectacularRedocView if page == 'redoc' else SpectacularSwaggerView
+    return type(f'Schema{base.__name__}', (HashedSchemaMixin, base), {}).as_view()
+
+
+def redoc_view(request, *args, **kwargs):
+    return get_docs_view('redoc')(request, *args, **kwargs)
+
+
+def swagger_view(request, *args, **kwargs):
+    return get_docs_view('swagger')(request, *args, **kwargs)
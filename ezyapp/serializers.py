@@ -1,19 +1,92 @@
+from datetime import timedelta
+
 from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
+from django.conf import settings
+from django.db import IntegrityError, transaction
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
-from .models import Job, JobApplication, Review, Wallet, Transaction, Notification, HelperDocument
+from .avatars import get_avatar_urls
+from .maptiles import MAX_ZOOM, count_tiles
+from .onboarding import create_accounts
+from .profiling import get_current_profile, profile_serializer
+from .models import (
+    Job, JobApplication, Review, Wallet, Transaction, Notification, HelperDocument,
+    ArchivedJob, ArchivedJobApplication, ArchivedNotification, UserImport
+)
+from django.urls import reverse
+from django.utils import timezone
 from drf_spectacular.utils import extend_schema_field
 
 User = get_user_model()
 
-class HelperDocumentSerializer(serializers.ModelSerializer):
+class DynamicFieldsModelSerializer(serializers.ModelSerializer):
+    """
+    A ModelSerializer that takes optional ``fields`` and ``expand`` arguments.
+
+    ``fields`` limits the output to the named fields. ``expand`` replaces the
+    named primary key fields with the nested serializers listed in
+    ``Meta.expandable_fields``.
+    """
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        expand = kwargs.pop('expand', None)
+        super().__init__(*args, **kwargs)
+
+        if expand:
+            expandable = getattr(self.Meta, 'expandable_fields', {})
+            unknown = set(expand) - set(expandable)
+            if unknown:
+                raise serializers.ValidationError(
+                    {'expand': f"Cannot expand: {', '.join(sorted(unknown))}"}
+                )
+            for field_name in expand:
+                self.fields[field_name] = expandable[field_name](read_only=True)
+
+        if fields:
+            unknown = set(fields) - set(self.fields)
+            if unknown:
+                raise serializers.ValidationError(
+                    {'fields': f"Unknown fields: {', '.join(sorted(unknown))}"}
+                )
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
+    def to_representation(self, instance):
+        profile = get_current_profile()
+        if profile is not None:
+            return profile_serializer(self, instance, profile)
+        return super().to_representation(instance)
+
+class HelperDocumentSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = HelperDocument
         fields = ('id', 'aadhaar_card', 'driving_license', 'pan_card', 'selfie', 
                  'status', 'rejection_reason', 'created_at', 'updated_at')
         read_only_fields = ('status', 'rejection_reason', 'created_at', 'updated_at')
 
-class UserSerializer(serializers.ModelSerializer):
+AVATAR_SCHEMA = {
+    'type': 'object',
+    'nullable': True,
+    'description': 'Square renderings of profile_picture by size name (small, medium, large)',
+    'additionalProperties': {
+        'type': 'object',
+        'properties': {
+            'webp': {'type': 'string', 'format': 'uri'},
+            'jpeg': {'type': 'string', 'format': 'uri'},
+        },
+    },
+}
+
+class AvatarMixin(serializers.Serializer):
+    """Adds ``avatar``: URLs of resized profile pictures (see ezyapp/avatars.py)."""
+    avatar = serializers.SerializerMethodField()
+
+    @extend_schema_field(AVATAR_SCHEMA)
+    def get_avatar(self, obj):
+        return get_avatar_urls(obj, self.context.get('request'))
+
+class UserSerializer(AvatarMixin, DynamicFieldsModelSerializer):
     password = serializers.CharField(write_only=True, required=True, validators=[validate_password])
     password2 = serializers.CharField(write_only=True, required=True)
     documents = HelperDocumentSerializer(required=False, read_only=True)
@@ -22,7 +95,7 @@ class UserSerializer(serializers.ModelSerializer):
         model = User
         fields = ('id', 'username', 'password', 'password2', 'email', 'first_name', 'last_name', 
                  'phone_number', 'user_type', 'is_verified', 'kyc_details', 'profile_picture',
-                 'created_at', 'documents')
+                 'avatar', 'created_at', 'documents')
         extra_kwargs = {
             'first_name': {'required': True},
             'last_name': {'required': True},
@@ -36,7 +109,7 @@ class UserSerializer(serializers.ModelSerializer):
         return attrs
         
     def create(self, validated_data):
-        user = User.objects.create(
+        user = User(
             username=validated_data['username'],
             email=validated_data['email'],
             first_name=validated_data['first_name'],
@@ -46,33 +119,70 @@ class UserSerializer(serializers.ModelSerializer):
             kyc_details=validated_data.get('kyc_details', {}),
             profile_picture=validated_data.get('profile_picture', None)
         )
-        
+        # Hash before the transaction; the user is then inserted once, with
+        # its wallet and (for helpers) document entry, or not at all
         user.set_password(validated_data['password'])
-        user.save()
-        
-        # Create a wallet for the user
-        Wallet.objects.create(user=user)
-        
-        # Create helper document entry if user is a helper
-        if user.user_type == 'helper':
-            HelperDocument.objects.create(user=user)
-        
+        with transaction.atomic():
+            user.save()
+            create_accounts([user])
         return user
 
-class UserUpdateSerializer(serializers.ModelSerializer):
+class BulkUserSerializer(UserSerializer):
+    """
+    Validates one row of a bulk registration (see ezyapp/onboarding.py).
+
+    There is no password confirmation or picture, and username uniqueness
+    is checked for a whole chunk of rows at once.
+    """
+    password2 = None
+    documents = None
+    avatar = None
+
+    class Meta(UserSerializer.Meta):
+        fields = ('username', 'password', 'email', 'first_name', 'last_name',
+                  'phone_number', 'user_type', 'kyc_details')
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fields['username'].validators = [
+            validator for validator in fields['username'].validators
+            if not isinstance(validator, UniqueValidator)
+        ]
+        return fields
+
+    def validate(self, attrs):
+        return attrs
+
+class UserImportSerializer(serializers.ModelSerializer):
+    url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UserImport
+        fields = ('id', 'url', 'status', 'report', 'created_at', 'finished_at')
+        read_only_fields = fields
+
+    @extend_schema_field({'type': 'string', 'format': 'uri'})
+    def get_url(self, obj):
+        url = reverse('user-user-import', kwargs={'import_id': obj.pk})
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request is not None else url
+
+class UserUpdateSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = User
         fields = ('first_name', 'last_name', 'email', 'phone_number', 'kyc_details', 'profile_picture')
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(AvatarMixin, DynamicFieldsModelSerializer):
     documents_status = serializers.SerializerMethodField()
     
     class Meta:
         model = User
         fields = ('id', 'username', 'email', 'first_name', 'last_name', 
                  'phone_number', 'user_type', 'is_verified', 'profile_picture',
-                 'created_at', 'documents_status')
+                 'avatar', 'created_at', 'documents_status')
         read_only_fields = fields
+        # Related objects documents_status reads, joined when this serializer is expanded
+        select_related = ('documents',)
     
     @extend_schema_field({
         'type': 'object',
@@ -103,13 +213,17 @@ class UserProfileSerializer(serializers.ModelSerializer):
         except HelperDocument.DoesNotExist:
             return None
 
-class JobSerializer(serializers.ModelSerializer):
+class JobSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Job
         fields = ('id', 'user', 'title', 'description', 'location_lat', 'location_long', 
                  'location_address', 'category', 'job_type', 'price', 'hourly_rate', 
                  'start_time', 'end_time', 'status', 'assigned_to', 'created_at')
         read_only_fields = ('user', 'assigned_to', 'created_at')
+        expandable_fields = {
+            'user': UserProfileSerializer,
+            'assigned_to': UserProfileSerializer,
+        }
         
     def validate(self, attrs):
         job_type = attrs.get('job_type')
@@ -134,15 +248,84 @@ class JobDetailSerializer(JobSerializer):
     class Meta(JobSerializer.Meta):
         pass
 
-class JobApplicationSerializer(serializers.ModelSerializer):
+class JobMapQuerySerializer(serializers.Serializer):
+    bbox = serializers.CharField(help_text="west,south,east,north in degrees")
+    zoom = serializers.IntegerField(min_value=0, max_value=MAX_ZOOM)
+    category = serializers.ChoiceField(choices=Job.CATEGORY_CHOICES, required=False)
+
+    def validate_bbox(self, value):
+        try:
+            west, south, east, north = (float(part) for part in value.split(','))
+        except ValueError:
+            raise serializers.ValidationError("Use west,south,east,north.")
+        if not (-180 <= west < east <= 180 and -90 <= south < north <= 90):
+            raise serializers.ValidationError("Coordinates are out of range or not in west,south,east,north order.")
+        return west, south, east, north
+
+    def validate(self, attrs):
+        max_tiles = getattr(settings, 'MAP_MAX_TILES', 64)
+        # Counted from the corner tiles: listing them first is exponential in the zoom
+        if count_tiles(attrs['zoom'], *attrs['bbox']) > max_tiles:
+            raise serializers.ValidationError({"bbox": f"Covers more than {max_tiles} tiles at this zoom level."})
+        return attrs
+
+class JobMapClusterSerializer(serializers.Serializer):
+    lat = serializers.FloatField()
+    lng = serializers.FloatField()
+    count = serializers.IntegerField()
+
+class JobMapJobSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    title = serializers.CharField()
+    category = serializers.CharField()
+    job_type = serializers.CharField()
+    price = serializers.DecimalField(max_digits=10, decimal_places=2, allow_null=True)
+    hourly_rate = serializers.DecimalField(max_digits=10, decimal_places=2, allow_null=True)
+    lat = serializers.FloatField()
+    lng = serializers.FloatField()
+
+class JobMapSerializer(serializers.Serializer):
+    zoom = serializers.IntegerField()
+    tiles = serializers.IntegerField()
+    clusters = JobMapClusterSerializer(many=True)
+    jobs = JobMapJobSerializer(many=True)
+
+class JobSuggestQuerySerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=100)
+    limit = serializers.IntegerField(min_value=1, max_value=20, default=8)
+
+class JobSuggestionSerializer(serializers.Serializer):
+    text = serializers.CharField()
+    field = serializers.ChoiceField(choices=('title', 'location_address'))
+    count = serializers.IntegerField(help_text="Open jobs using this text")
+
+class JobApplicationSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = JobApplication
         fields = ('id', 'job', 'helper', 'status', 'message', 'created_at')
         read_only_fields = ('helper', 'status', 'created_at')
+        expandable_fields = {
+            'job': JobSerializer,
+            'helper': UserProfileSerializer,
+        }
         
+    def validate(self, attrs):
+        request = self.context.get('request')
+        job = attrs.get('job')
+        # helper is read-only, so the unique_together validator is skipped; check it here
+        if (request is not None and job is not None and self.instance is None
+                and JobApplication.objects.filter(job=job, helper=request.user).exists()):
+            raise serializers.ValidationError({"job": "You have already applied for this job."})
+        return attrs
+
     def create(self, validated_data):
         validated_data['helper'] = self.context['request'].user
-        return super().create(validated_data)
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            # A concurrent duplicate got in between validate() and the insert
+            raise serializers.ValidationError({"job": "You have already applied for this job."})
 
 class JobApplicationDetailSerializer(JobApplicationSerializer):
     job = JobSerializer(read_only=True)
@@ -151,11 +334,15 @@ class JobApplicationDetailSerializer(JobApplicationSerializer):
     class Meta(JobApplicationSerializer.Meta):
         pass
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Review
         fields = ('id', 'reviewer', 'reviewed', 'rating', 'comment', 'created_at')
         read_only_fields = ('reviewer', 'created_at')
+        expandable_fields = {
+            'reviewer': UserProfileSerializer,
+            'reviewed': UserProfileSerializer,
+        }
         
     def validate(self, attrs):
         if attrs['reviewed'] == self.context['request'].user:
@@ -173,26 +360,83 @@ class ReviewDetailSerializer(ReviewSerializer):
     class Meta(ReviewSerializer.Meta):
         pass
 
-class WalletSerializer(serializers.ModelSerializer):
+class WalletSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Wallet
         fields = ('id', 'user', 'balance', 'created_at')
         read_only_fields = fields
+        expandable_fields = {
+            'user': UserProfileSerializer,
+        }
 
-class TransactionSerializer(serializers.ModelSerializer):
+class TransactionSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Transaction
-        fields = ('id', 'wallet', 'type', 'amount', 'reason', 'created_at')
+        fields = ('id', 'wallet', 'type', 'amount', 'reason', 'running_balance', 'created_at')
         read_only_fields = fields
+        expandable_fields = {
+            'wallet': WalletSerializer,
+        }
 
-class NotificationSerializer(serializers.ModelSerializer):
+class WalletStatementQuerySerializer(serializers.Serializer):
+    start = serializers.DateTimeField(required=False)
+    end = serializers.DateTimeField(required=False)
+
+    def validate(self, attrs):
+        end = attrs.get('end') or timezone.now()
+        start = attrs.get('start') or end - timedelta(days=30)
+        if start >= end:
+            raise serializers.ValidationError({"start": "Start must be before end."})
+        max_days = getattr(settings, 'WALLET_STATEMENT_MAX_DAYS', 366)
+        if end - start > timedelta(days=max_days):
+            raise serializers.ValidationError({"end": f"Statements can cover at most {max_days} days."})
+        return {'start': start, 'end': end}
+
+class WalletStatementSerializer(serializers.Serializer):
+    start = serializers.DateTimeField()
+    end = serializers.DateTimeField()
+    opening_balance = serializers.DecimalField(max_digits=12, decimal_places=2)
+    closing_balance = serializers.DecimalField(max_digits=12, decimal_places=2)
+    total_credits = serializers.DecimalField(max_digits=12, decimal_places=2)
+    total_debits = serializers.DecimalField(max_digits=12, decimal_places=2)
+    transactions = TransactionSerializer(many=True)
+
+class NotificationSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Notification
         fields = ('id', 'user', 'message', 'is_read', 'created_at')
         read_only_fields = ('user', 'message', 'created_at')
+        expandable_fields = {
+            'user': UserProfileSerializer,
+        }
         
     def update(self, instance, validated_data):
         # Only allow updating is_read field
         instance.is_read = validated_data.get('is_read', instance.is_read)
         instance.save()
-        return instance 
\ No newline at end of file
+        return instance
+
+class ArchivedJobSerializer(DynamicFieldsModelSerializer):
+    class Meta:
+        model = ArchivedJob
+        fields = JobSerializer.Meta.fields + ('archived_at',)
+        read_only_fields = fields
+        expandable_fields = JobSerializer.Meta.expandable_fields
+
+class ArchivedJobApplicationSerializer(DynamicFieldsModelSerializer):
+    job = serializers.IntegerField(source='job_id', read_only=True)
+
+    class Meta:
+        model = ArchivedJobApplication
+        fields = JobApplicationSerializer.Meta.fields + ('archived_at',)
+        read_only_fields = fields
+        expandable_fields = {
+            'helper': UserProfileSerializer,
+        }
+
+class ArchivedNotificationSerializer(DynamicFieldsModelSerializer):
+    class Meta:
+        model = ArchivedNotification
+        fields = NotificationSerializer.Meta.fields + ('archived_at',)
+        read_only_fields = fields
+        expandable_fields = NotificationSerializer.Meta.expandable_fields
@@ -0,0 +1,51 @@
+import os
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+
+from .avatars import get_avatar_name, get_avatar_sizes
+from .maptiles import get_map_state, invalidate_job_tiles
+from .models import Job, User
+from .suggest import get_suggestion_state, job_changed
+
+
+@receiver(post_init, sender=Job)
+def job_loaded(sender, instance, **kwargs):
+    # Remembered so a save can tell whether the job's map tiles or suggestions changed
+    instance._map_state = get_map_state(instance)
+    instance._suggestion_state = get_suggestion_state(instance)
+
+
+@receiver(post_save, sender=Job)
+def job_saved(sender, instance, created=False, **kwargs):
+    previous = None if created else getattr(instance, '_map_state', None)
+    state = get_map_state(instance)
+    if state != previous:
+        invalidate_job_tiles(filter(None, (previous, state)))
+        instance._map_state = state
+
+    previous = None if created else getattr(instance, '_suggestion_state', None)
+    state = get_suggestion_state(instance)
+    if state != previous:
+        transaction.on_commit(lambda: job_changed(instance.pk, state))
+        instance._suggestion_state = state
+
+
+@receiver(post_delete, sender=Job)
+def job_deleted(sender, instance, **kwargs):
+    invalidate_job_tiles(filter(None, [get_map_state(instance)]))
+    pk = instance.pk
+    transaction.on_commit(lambda: job_changed(pk, None))
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, update_fields=None, **kwargs):
+    if not instance.profile_picture or (update_fields is not None and 'profile_picture' not in update_fields):
+        return
+    picture_name = instance.profile_picture.name
+    size = next(iter(get_avatar_sizes().values()))
+    if not os.path.exists(os.path.join(settings.MEDIA_ROOT, get_avatar_name(picture_name, size, 'webp'))):
+        from .tasks import generate_avatars
+        transaction.on_commit(lambda: generate_avatars.enqueue(picture_name))
@@ -0,0 +1,226 @@
+"""
+Typeahead suggestions for the job search box.
+
+Each worker keeps an in-memory prefix index of the titles and addresses of
+open jobs. Every phrase is indexed under each of its first
+SUGGEST_MAX_WORDS word positions ("walk my dog" under "walk my dog", "my
+dog" and "dog"), in one sorted list. A query bisects to the range of keys
+starting with it and returns the phrases used by the most open jobs, so
+answering never touches the database.
+
+The index follows Job writes:
+
+* saves and deletes in this process update it at once (see ezyapp/signals.py);
+* writes in other processes bump the Job version of the query cache (see
+  ezyapp/querycache.py). When a request sees a new version, jobs created
+  since the index last looked are added;
+* the index is rebuilt from scratch every SUGGEST_REBUILD_INTERVAL
+  seconds, which picks up status changes and deletions made anywhere,
+  including by workers and cron jobs whose version bumps this process
+  can't see (the default cache is per process).
+
+Only a worker's first suggestion request waits for the index to be built.
+Later rebuilds run in a background thread, one at a time, while requests
+keep using the current index. The new index is swapped in at once,
+together with the saves this process made while it was being built.
+"""
+import bisect
+import heapq
+import logging
+import re
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection
+
+from .models import Job
+from .querycache import query_cache
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ('title', 'location_address')
+WORD_RE = re.compile(r'\w+')
+
+
+def normalize(text):
+    return ' '.join(WORD_RE.findall(text.casefold()))
+
+
+def get_suggestion_state(job):
+    """``(title, address)`` indexed for ``job`` while it is open, else None."""
+    values = job.__dict__
+    if values.get('status') != 'open':
+        return None
+    return tuple(values.get(field) for field in FIELDS)
+
+
+class SuggestionIndex:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.jobs = {}  # job id -> (title, address)
+        self.keys = []  # sorted (key, field, phrase)
+        self.counts = Counter()  # (field, phrase) -> open jobs using it
+        self.displays = {}  # (field, phrase) -> text as first written
+        self.results = {}  # (query, limit) -> suggestions
+        self.version = None
+        self.max_pk = 0
+        self.built_at = None
+        self.build_lock = threading.Lock()  # held by the first build, so requests wait for it once
+        self.rebuilder = None  # background rebuild thread, while one runs
+        self.pending = None  # changes applied during a rebuild, replayed onto its result
+
+    def get_phrase_keys(self, field, phrase):
+        words = phrase.split(' ')
+        return [
+            (' '.join(words[start:]), field, phrase)
+            for start in range(min(len(words), getattr(settings, 'SUGGEST_MAX_WORDS', 8)))
+        ]
+
+    def add(self, job_id, state):
+        with self.lock:
+            self.remove(job_id)
+            self.jobs[job_id] = state
+            self.max_pk = max(self.max_pk, job_id)
+            for field, text in zip(FIELDS, state):
+                phrase = normalize(text or '')
+                if not phrase:
+                    continue
+                self.counts[field, phrase] += 1
+                if self.counts[field, phrase] == 1:
+                    self.displays[field, phrase] = ' '.join(text.split())
+                    for key in self.get_phrase_keys(field, phrase):
+                        bisect.insort(self.keys, key)
+            self.results.clear()
+
+    def remove(self, job_id):
+        with self.lock:
+            state = self.jobs.pop(job_id, None)
+            if state is None:
+                return
+            for field, text in zip(FIELDS, state):
+                phrase = normalize(text or '')
+                if not phrase:
+                    continue
+                self.counts[field, phrase] -= 1
+                if self.counts[field, phrase] <= 0:
+                    del self.counts[field, phrase], self.displays[field, phrase]
+                    for key in self.get_phrase_keys(field, phrase):
+                        index = bisect.bisect_left(self.keys, key)
+                        if index < len(self.keys) and self.keys[index] == key:
+                            del self.keys[index]
+            self.results.clear()
+
+    def apply(self, job_id, state):
+        """Index ``job_id`` with ``state``, or drop it if ``state`` is None."""
+        with self.lock:
+            if self.pending is not None:
+                self.pending.append((job_id, state))
+            if state is None:
+                self.remove(job_id)
+            else:
+                self.add(job_id, state)
+
+    def rebuild(self):
+        with self.lock:
+            self.pending = []
+        try:
+            jobs = Job.objects.filter(status='open').values_list('pk', *FIELDS).order_by()
+            entries = {}
+            counts, displays = Counter(), {}
+            for pk, *state in jobs.iterator(chunk_size=2000):
+                entries[pk] = tuple(state)
+                for field, text in zip(FIELDS, state):
+                    phrase = normalize(text or '')
+                    if phrase:
+                        counts[field, phrase] += 1
+                        displays.setdefault((field, phrase), ' '.join(text.split()))
+            keys = sorted(key for field, phrase in counts for key in self.get_phrase_keys(field, phrase))
+        except BaseException:
+            with self.lock:
+                self.pending = None
+            raise
+        with self.lock:
+            self.jobs, self.keys, self.counts, self.displays = entries, keys, counts, displays
+            self.max_pk = max(entries, default=self.max_pk)
+            self.results = {}
+            self.built_at = time.monotonic()
+            # The scan may have read rows from before these changes
+            pending, self.pending = self.pending, None
+            for job_id, state in pending:
+                self.apply(job_id, state)
+
+    def start_rebuild(self):
+        """Rebuild in a background thread unless one is running. Returns the thread, or None."""
+        with self.lock:
+            if self.rebuilder is not None:
+                return None
+            thread = self.rebuilder = threading.Thread(target=self.run_rebuild, name='suggestion-index', daemon=True)
+        thread.start()
+        return thread
+
+    def run_rebuild(self):
+        try:
+            self.rebuild()
+        except Exception:
+            # The current index stays; the next request tries again
+            logger.exception('Rebuilding the suggestion index failed')
+        finally:
+            connection.close()
+            with self.lock:
+                self.rebuilder = None
+
+    def refresh(self):
+        """Catch up with Job writes made by other processes."""
+        version = query_cache.get_versions([Job._meta.label])[Job._meta.label]
+        if self.built_at is None:
+            with self.build_lock:
+                if self.built_at is None:
+                    self.rebuild()
+        else:
+            # Versions are per process unless the query cache is shared, so the
+            # index is also rebuilt on a timer whether or not they have moved
+            if time.monotonic() - self.built_at > getattr(settings, 'SUGGEST_REBUILD_INTERVAL', 60):
+                self.start_rebuild()
+            if version != self.version:
+                new_jobs = Job.objects.filter(pk__gt=self.max_pk, status='open').values_list('pk', *FIELDS)
+                for pk, *state in new_jobs:
+                    self.apply(pk, tuple(state))
+        self.version = version
+
+    def suggest(self, query, limit):
+        query = normalize(query)
+        if not query:
+            return []
+        with self.lock:
+            cached = self.results.get((query, limit))
+            if cached is not None:
+                return cached
+            start = bisect.bisect_left(self.keys, (query,))
+            end = bisect.bisect_left(self.keys, (query + '\uffff',), start)
+            # Keys are sorted, so ties keep alphabetical order in every worker
+            phrases = dict.fromkeys((field, phrase) for _, field, phrase in self.keys[start:end])
+            top = heapq.nlargest(limit, phrases, key=self.counts.__getitem__)
+            suggestions = [
+                {'text': self.displays[item], 'field': item[0], 'count': self.counts[item]} for item in top
+            ]
+            if len(self.results) >= getattr(settings, 'SUGGEST_MAX_CACHED_QUERIES', 1000):
+                self.results.clear()
+            self.results[query, limit] = suggestions
+            return suggestions
+
+
+suggestion_index = SuggestionIndex()
+
+
+def get_suggestions(query, limit):
+    suggestion_index.refresh()
+    return suggestion_index.suggest(query, limit)
+
+
+def job_changed(job_id, state):
+    """Apply a Job save or delete in this process to the index, if it is built."""
+    if suggestion_index.built_at is None:
+        return
+    suggestion_index.apply(job_id, state)
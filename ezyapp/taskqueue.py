@@ -0,0 +1,262 @@
+"""
+Database-backed background tasks.
+
+Functions decorated with ``@task`` can be queued with ``.enqueue()`` and are
+run by the run_worker command. Tasks live in the Task table, so no broker is
+needed: workers claim due tasks with ``SELECT ... FOR UPDATE SKIP LOCKED``
+(where the database supports it), mark them running and execute them in a
+thread or process pool outside the claiming transaction. Failed tasks are
+retried with exponential backoff up to ``max_attempts``. While a task runs,
+its worker refreshes the task's lock every TASK_HEARTBEAT_INTERVAL seconds,
+so only tasks whose worker died have a lock older than TASK_LOCK_TIMEOUT,
+and those are re-queued.
+
+Queues are priority lanes: a worker always fills free slots from the first
+queue it serves before looking at the next one. Tasks declared with
+``every=`` are enqueued once per interval, however many workers are running.
+"""
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+import django
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+def get_queues():
+    return list(getattr(settings, 'TASK_QUEUES', ('high', 'default', 'low')))
+
+
+class TaskDefinition:
+    def __init__(self, func, name, queue, max_attempts, every):
+        self.func = func
+        self.name = name
+        self.queue = queue
+        self.max_attempts = max_attempts
+        self.every = every
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def enqueue(self, *args, **kwargs):
+        """Queue a run with JSON-serializable ``args`` and ``kwargs``."""
+        return enqueue(self.name, args, kwargs, queue=self.queue, max_attempts=self.max_attempts)
+
+    def enqueue_at(self, run_at, *args, **kwargs):
+        """Queue a run that won't start before ``run_at``."""
+        return enqueue(
+            self.name, args, kwargs, queue=self.queue, max_attempts=self.max_attempts, run_at=run_at
+        )
+
+
+def task(name=None, queue='default', max_attempts=3, every=None):
+    """
+    Register the decorated function as a task. ``every`` (seconds, or a
+    timedelta) makes it periodic.
+    """
+    if isinstance(every, timedelta):
+        every = every.total_seconds()
+
+    def decorator(func):
+        definition = TaskDefinition(
+            func, name or f'{func.__module__}.{func.__name__}', queue, max_attempts, every
+        )
+        _registry[definition.name] = definition
+        return definition
+    return decorator
+
+
+def get_task(name):
+    return _registry.get(name)
+
+
+def enqueue(name, args=(), kwargs=None, queue='default', max_attempts=3, run_at=None, unique_key=None):
+    if name not in _registry:
+        raise LookupError(f'Unknown task {name!r}')
+    return Task.objects.create(
+        name=name, args=list(args), kwargs=kwargs or {}, queue=queue,
+        max_attempts=max_attempts, run_at=run_at or timezone.now(), unique_key=unique_key
+    )
+
+
+def schedule_periodic(now=None):
+    """Enqueue the current run of each periodic task if it isn't queued yet."""
+    now = now or timezone.now()
+    timestamp = now.timestamp()
+    runs = []
+    for definition in _registry.values():
+        if not definition.every:
+            continue
+        slot = int(timestamp // definition.every)
+        runs.append(Task(
+            name=definition.name, queue=definition.queue, max_attempts=definition.max_attempts,
+            run_at=now, unique_key=f'{definition.name}:{slot}'
+        ))
+    if runs:
+        Task.objects.bulk_create(runs, ignore_conflicts=True)
+
+
+def requeue_stale_tasks(now=None):
+    """Return tasks whose worker stopped reporting to the queue (or fail them if out of attempts)."""
+    now = now or timezone.now()
+    timeout = getattr(settings, 'TASK_LOCK_TIMEOUT', 600)
+    stale = Task.objects.filter(status='running', locked_at__lt=now - timedelta(seconds=timeout))
+    stale.filter(attempts__gte=F('max_attempts')).update(
+        status='failed', finished_at=now, last_error='Worker lock expired'
+    )
+    return stale.update(status='queued', run_at=now, locked_by='', locked_at=None)
+
+
+def claim_tasks(worker_name, limit, queues=None):
+    """Lock up to ``limit`` due tasks for ``worker_name`` and return their ids."""
+    now = timezone.now()
+    claimed = 0
+    with transaction.atomic():
+        for queue in queues or get_queues():
+            if claimed >= limit:
+                break
+            due = Task.objects.filter(status='queued', queue=queue, run_at__lte=now).order_by('run_at', 'id')
+            if connection.features.has_select_for_update_skip_locked:
+                pks = list(due.select_for_update(skip_locked=True).values_list('pk', flat=True)[:limit - claimed])
+            else:
+                # Without SKIP LOCKED (SQLite) select and claim in one UPDATE so
+                # the write lock is taken up front rather than upgraded mid-transaction
+                pks = due.values('pk')[:limit - claimed]
+            claimed += Task.objects.filter(pk__in=pks, status='queued').update(
+                status='running', locked_by=worker_name, locked_at=now, attempts=F('attempts') + 1
+            )
+    if not claimed:
+        return []
+    return list(Task.objects.filter(status='running', locked_by=worker_name, locked_at=now).values_list('pk', flat=True))
+
+
+class Heartbeat(threading.Thread):
+    """Refresh a running task's lock until stopped, so it isn't taken for abandoned."""
+
+    def __init__(self, task):
+        super().__init__(name=f'task-heartbeat-{task.pk}', daemon=True)
+        self.task = task
+        self.interval = getattr(settings, 'TASK_HEARTBEAT_INTERVAL', 60)
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self.stopped.wait(self.interval):
+                try:
+                    Task.objects.filter(pk=self.task.pk, status='running', locked_by=self.task.locked_by).update(
+                        locked_at=timezone.now()
+                    )
+                except DatabaseError:
+                    # Try again next beat; the lock timeout allows for several misses
+                    logger.warning('Heartbeat of task %s failed', self.task.pk, exc_info=True)
+        finally:
+            connection.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def execute_task(task_id):
+    """Run one claimed task and record the outcome. Called inside the worker pool."""
+    close_old_connections()
+    try:
+        task = Task.objects.get(pk=task_id)
+        definition = get_task(task.name)
+        heartbeat = Heartbeat(task)
+        heartbeat.start()
+        try:
+            if definition is None:
+                raise LookupError(f'Unknown task {task.name!r}')
+            definition.func(*task.args, **task.kwargs)
+        except Exception as exc:
+            logger.exception('Task %s (%s) failed', task.id, task.name)
+            now = timezone.now()
+            update = {'last_error': f'{type(exc).__name__}: {exc}', 'locked_by': '', 'locked_at': None}
+            if task.attempts < task.max_attempts:
+                delay = getattr(settings, 'TASK_RETRY_DELAY', 10) * 2 ** (task.attempts - 1)
+                update.update(status='queued', run_at=now + timedelta(seconds=delay))
+            else:
+                update.update(status='failed', finished_at=now)
+        else:
+            update = {'status': 'succeeded', 'finished_at': timezone.now(), 'last_error': ''}
+        finally:
+            heartbeat.stop()
+        # Only record the outcome if the task wasn't re-queued from under this worker
+        Task.objects.filter(pk=task.pk, status='running', locked_by=task.locked_by).update(**update)
+    finally:
+        close_old_connections()
+
+
+class Worker:
+    """Claim tasks and run them in a pool of ``concurrency`` threads or processes."""
+
+    def __init__(self, queues=None, concurrency=4, pool='thread', poll_interval=1.0, name=None):
+        self.queues = queues or get_queues()
+        self.concurrency = concurrency
+        self.pool = pool
+        self.poll_interval = poll_interval
+        self.name = name or f'{socket.gethostname()}:{os.getpid()}'
+        self.stopping = False
+
+    def stop(self, *args):
+        self.stopping = True
+
+    def make_executor(self):
+        if self.pool == 'process':
+            # Spawned (not forked) children never share the parent's database connections
+            return ProcessPoolExecutor(
+                self.concurrency, mp_context=multiprocessing.get_context('spawn'),
+                initializer=django.setup
+            )
+        return ThreadPoolExecutor(self.concurrency, thread_name_prefix='task-worker')
+
+    def run(self, once=False):
+        """Process tasks until stopped (SIGINT/SIGTERM), or until idle when ``once``."""
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, self.stop)
+            signal.signal(signal.SIGINT, self.stop)
+
+        executor = self.make_executor()
+        running = set()
+        last_housekeeping = 0
+        try:
+            while not self.stopping:
+                if time.monotonic() - last_housekeeping >= self.poll_interval:
+                    schedule_periodic()
+                    requeue_stale_tasks()
+                    last_housekeeping = time.monotonic()
+
+                free = self.concurrency - len(running)
+                claimed = claim_tasks(self.name, free, self.queues) if free else []
+                for task_id in claimed:
+                    running.add(executor.submit(execute_task, task_id))
+
+                if claimed and len(running) < self.concurrency:
+                    continue  # more may be due; claim again straight away
+                if not running:
+                    if once:
+                        break
+                    time.sleep(self.poll_interval)
+                    continue
+                done, running = wait(running, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is not None:
+                        logger.error('Worker failed to run a task', exc_info=future.exception())
+        finally:
+            executor.shutdown(wait=True)
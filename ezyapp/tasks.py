@@ -0,0 +1,60 @@
+"""Background tasks. Imported from EzyappConfig.ready() so workers can find them."""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from . import avatars, ledger, onboarding, partitions
+from .models import IdempotencyKey, Task
+from .taskqueue import task
+
+
+@task(queue='low', every=timedelta(hours=1))
+def purge_finished_tasks():
+    """Delete succeeded and failed tasks older than TASK_RETENTION_DAYS."""
+    cutoff = timezone.now() - timedelta(days=getattr(settings, 'TASK_RETENTION_DAYS', 7))
+    Task.objects.filter(status__in=('succeeded', 'failed'), finished_at__lt=cutoff).delete()
+
+
+@task(queue='low', every=timedelta(days=1))
+def checkpoint_wallet_balances():
+    """Record the start-of-day balance of wallets that changed since their last checkpoint."""
+    ledger.create_checkpoints()
+
+
+@task(queue='low', every=timedelta(hours=1))
+def purge_idempotency_keys():
+    """Delete expired Idempotency-Key records."""
+    IdempotencyKey.objects.filter(expires_at__lt=timezone.now()).delete()
+
+
+@task(queue='default')
+def generate_avatars(picture_name):
+    """Render the standard avatar sizes of a newly uploaded profile picture."""
+    avatars.generate_avatars(picture_name)
+
+
+@task(queue='default', max_attempts=1)
+def register_user_import(import_id):
+    """Register the users of a bulk import posted to /api/users/import/."""
+    onboarding.run_user_import(import_id)
+
+
+@task(queue='low', every=timedelta(minutes=10))
+def expire_user_imports():
+    """Fail user imports stranded by a killed worker, or too old, and drop their rows."""
+    onboarding.expire_user_imports()
+
+
+@task(queue='low', every=timedelta(hours=1))
+def evict_avatars():
+    """Trim the avatar cache to AVATAR_CACHE_MAX_BYTES."""
+    avatars.evict_avatars()
+
+
+@task(queue='low', every=timedelta(days=1))
+def create_partitions():
+    """Keep PARTITION_MONTHS_AHEAD months of transaction and notification partitions ready (PostgreSQL)."""
+    if partitions.is_supported(connection):
+        partitions.create_partitions()
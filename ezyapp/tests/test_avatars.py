@@ -0,0 +1,87 @@
+import io
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from PIL import Image
+from rest_framework.settings import api_settings
+from rest_framework.test import APIClient
+
+from ezyapp import avatars, throttling
+from ezyapp.models import User
+
+
+class AvatarTests(TestCase):
+    def setUp(self):
+        throttling._store = None
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(
+            SECURE_SSL_REDIRECT=False, MEDIA_ROOT=media_root, MEDIA_ACCEL_REDIRECT='',
+            AVATAR_SIZES={'small': 64}, AVATAR_EXTRA_SIZES=(32, 48),
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        patcher = mock.patch.dict(api_settings.DEFAULT_THROTTLE_RATES, {'avatars': '2/min'})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        os.makedirs(os.path.join(media_root, 'profile_pictures'))
+        Image.new('RGB', (300, 200), 'red').save(os.path.join(media_root, 'profile_pictures/helper.png'))
+        self.helper = User.objects.create_user('helper', user_type='helper')
+        User.objects.filter(pk=self.helper.pk).update(profile_picture='profile_pictures/helper.png')
+        self.client = APIClient()
+        self.client.force_login(User.objects.create_user('poster', user_type='poster'))
+
+    def get_avatar(self, size, fmt='webp', user=None, **params):
+        return self.client.get(f'/avatars/{(user or self.helper).pk}/{size}.{fmt}', params)
+
+    def test_renders_a_square_crop(self):
+        response = self.get_avatar(48, 'jpeg')
+        self.assertEqual(response.status_code, 200)
+        image = Image.open(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual((image.format, image.size), ('JPEG', (48, 48)))
+
+    def test_only_allowed_sizes_and_formats(self):
+        self.assertEqual(self.get_avatar(100).status_code, 404)
+        self.assertEqual(self.get_avatar(4096).status_code, 404)
+        self.assertEqual(self.get_avatar(64, 'png').status_code, 404)
+        self.assertEqual(self.get_avatar(64).status_code, 200)
+        self.assertEqual(self.get_avatar(32).status_code, 200)
+        self.assertIsNone(avatars.find_avatar('profile_pictures/helper.png', 100, 'webp'))
+
+    def test_missing_picture(self):
+        without_picture = User.objects.create_user('other', user_type='helper')
+        self.assertEqual(self.get_avatar(64, user=without_picture).status_code, 404)
+        self.assertEqual(self.client.get('/avatars/999999/64.webp').status_code, 404)
+
+    def test_requires_authentication(self):
+        self.client.logout()
+        self.assertEqual(self.get_avatar(64).status_code, 401)
+
+    def test_misses_are_throttled(self):
+        self.assertEqual(self.get_avatar(32).status_code, 200)
+        self.assertEqual(self.get_avatar(48).status_code, 200)
+        response = self.get_avatar(64)
+        self.assertEqual(response.status_code, 429)
+        # 2/min refills a token every 30 seconds
+        self.assertEqual(response['Retry-After'], '30')
+        self.assertIsNone(avatars.find_avatar('profile_pictures/helper.png', 64, 'webp'))
+
+        # Cached renderings are served without taking a token
+        for _ in range(3):
+            self.assertEqual(self.get_avatar(32).status_code, 200)
+
+    def test_pre_rendered_sizes_are_not_throttled(self):
+        avatars.generate_avatars('profile_pictures/helper.png')
+        for fmt in ('webp', 'jpeg', 'webp'):
+            self.assertEqual(self.get_avatar(64, fmt).status_code, 200)
+
+    def test_versioned_urls_are_immutable(self):
+        key = avatars.get_picture_key('profile_pictures/helper.png')
+        response = self.get_avatar(64, v=key)
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('max-age=31536000', response['Cache-Control'])
+        self.assertNotIn('immutable', self.get_avatar(64, v='old')['Cache-Control'])
@@ -0,0 +1,71 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from ezyapp import throttling
+from ezyapp.models import HelperDocument, Job, User
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, BULK_RETRIEVE_MAX_IDS=3)
+class BulkRetrieveTests(TestCase):
+    def setUp(self):
+        throttling._store = None
+        self.poster = User.objects.create_user('poster', user_type='poster')
+        self.other = User.objects.create_user('other', user_type='poster')
+        self.helper = User.objects.create_user('helper', user_type='helper')
+        HelperDocument.objects.create(user=self.helper)
+        self.client = APIClient()
+        self.client.force_authenticate(self.poster)
+
+    def create_job(self, user):
+        return Job.objects.create(
+            user=user, title='Walk my dog', description='Around the park', location_lat=Decimal('12.97'),
+            location_long=Decimal('77.59'), location_address='MG Road', category='pet', job_type='fixed',
+            price=Decimal('100.00'), start_time=timezone.now() + timedelta(days=1),
+        )
+
+    def test_results_follow_request_order(self):
+        response = self.client.get(f'/api/users/bulk/?ids={self.helper.pk},{self.poster.pk}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([user['id'] for user in response.json()['results']], [self.helper.pk, self.poster.pk])
+        self.assertEqual(response.json()['results'][0]['documents_status']['status'], 'pending')
+        self.assertEqual(response.json()['missing'], [])
+
+    def test_post_with_duplicate_ids(self):
+        response = self.client.post('/api/users/bulk/', {'ids': [self.helper.pk, self.helper.pk]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([user['id'] for user in response.json()['results']], [self.helper.pk])
+
+    def test_missing_and_invisible_ids(self):
+        own, other = self.create_job(self.poster), self.create_job(self.other)
+        response = self.client.get(f'/api/jobs/bulk/?ids={other.pk},{own.pk},999999')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([job['id'] for job in response.json()['results']], [own.pk])
+        # Jobs of other posters are reported like ids that don't exist
+        self.assertEqual(response.json()['missing'], [other.pk, 999999])
+
+    def test_id_cap(self):
+        response = self.client.get('/api/users/bulk/?ids=1,2,3,4')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('At most 3 ids', response.json()['ids'])
+        self.assertEqual(self.client.get('/api/users/bulk/?ids=1,2,3').status_code, 200)
+        self.assertEqual(self.client.post('/api/users/bulk/', {'ids': [1, 2, 3, 4]}, format='json').status_code, 400)
+
+    def test_invalid_ids(self):
+        for ids in ('', 'a,b', '1,,x'):
+            with self.subTest(ids=ids):
+                self.assertEqual(self.client.get(f'/api/users/bulk/?ids={ids}').status_code, 400)
+        self.assertEqual(self.client.post('/api/users/bulk/', {'ids': 'nope'}, format='json').status_code, 400)
+        self.assertEqual(self.client.post('/api/users/bulk/', {'ids': [[1]]}, format='json').status_code, 400)
+
+    def test_sparse_fields(self):
+        response = self.client.get(f'/api/users/bulk/?ids={self.helper.pk}&fields=id,username')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], [{'id': self.helper.pk, 'username': 'helper'}])
+
+    def test_requires_authentication(self):
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(f'/api/users/bulk/?ids={self.helper.pk}').status_code, 401)
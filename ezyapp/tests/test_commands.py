@@ -0,0 +1,12 @@
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase
+
+
+class AuditQueryPlansTests(SimpleTestCase):
+    def test_unsupported_backend_fails(self):
+        with mock.patch('ezyapp.management.commands.audit_query_plans.connection') as connection:
+            connection.vendor = 'oracle'
+            with self.assertRaisesMessage(CommandError, 'Unsupported database backend: oracle'):
+                call_command('audit_query_plans')
@@ -0,0 +1,89 @@
+import json
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from ezyapp.models import IdempotencyKey, Job, User
+
+
+def job_rows(count):
+    row = {
+        'title': 'Walk my dog', 'description': 'Twice around the park', 'location_lat': '12.9716000',
+        'location_long': '77.5946000', 'location_address': 'MG Road', 'category': 'pet',
+        'job_type': 'fixed', 'price': '250.00', 'start_time': '2030-01-01T09:00:00Z',
+        'end_time': '2030-01-01T10:00:00Z',
+    }
+    return ''.join(json.dumps(row) + '\n' for _ in range(count)).encode()
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class IdempotentImportTests(TestCase):
+    def setUp(self):
+        self.poster = User.objects.create_user('poster', password='S3cure-pass!x', user_type='poster')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.poster).access_token}')
+
+    def post_import(self, body, **headers):
+        return self.client.generic(
+            'POST', '/api/jobs/import/', body, content_type='application/x-ndjson', headers=headers
+        )
+
+    @override_settings(DATA_UPLOAD_MAX_MEMORY_SIZE=1024, IDEMPOTENCY_MAX_BODY_SIZE=1024)
+    def test_large_streamed_import_with_key(self):
+        body = job_rows(20)
+        self.assertGreater(len(body), 1024)
+
+        response = self.post_import(body, **{'Idempotency-Key': 'k1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['created'], 20)
+
+        retry = self.post_import(body, **{'Idempotency-Key': 'k1'})
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.json(), response.json())
+        self.assertEqual(Job.objects.count(), 20)
+
+    @override_settings(IDEMPOTENCY_MAX_BODY_SIZE=1024)
+    def test_large_bodies_are_matched_by_length(self):
+        self.post_import(job_rows(20), **{'Idempotency-Key': 'k2'})
+        response = self.post_import(job_rows(21), **{'Idempotency-Key': 'k2'})
+        self.assertEqual(response.status_code, 422)
+
+    def test_small_bodies_are_matched_by_content(self):
+        self.post_import(job_rows(1), **{'Idempotency-Key': 'k3'})
+        changed = job_rows(1).replace(b'Walk my dog', b'Walk my cat')
+        response = self.post_import(changed, **{'Idempotency-Key': 'k3'})
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(IdempotencyKey.objects.filter(key='k3').count(), 1)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class AnonymousRequestTests(TestCase):
+    def test_keys_of_anonymous_requests_are_ignored(self):
+        User.objects.create_user('alice', password='S3cure-pass!x', user_type='poster')
+        User.objects.create_user('bob', password='0ther-S3cret!', user_type='poster')
+        # Unrelated clients picking the same simple key
+        alice = self.client.post('/api/auth/token/', {'username': 'alice', 'password': 'S3cure-pass!x'},
+                                 headers={'Idempotency-Key': '1'})
+        bob = self.client.post('/api/auth/token/', {'username': 'bob', 'password': '0ther-S3cret!'},
+                               headers={'Idempotency-Key': '1'})
+        self.assertEqual((alice.status_code, bob.status_code), (200, 200))
+        self.assertNotEqual(alice.json()['access'], bob.json()['access'])
+
+        # A same-body retry runs again instead of replaying a stored token pair
+        retry = self.client.post('/api/auth/token/', {'username': 'alice', 'password': 'S3cure-pass!x'},
+                                 headers={'Idempotency-Key': '1'})
+        self.assertEqual(retry.status_code, 200)
+        self.assertFalse(retry.has_header('Idempotent-Replayed'))
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_signups_with_the_same_key(self):
+        def signup(username):
+            return self.client.post('/api/users/', {
+                'username': username, 'password': 'S3cure-pass!x', 'password2': 'S3cure-pass!x',
+                'email': f'{username}@example.com', 'first_name': 'Test', 'last_name': 'User', 'user_type': 'helper',
+            }, headers={'Idempotency-Key': 'signup'})
+        self.assertEqual(signup('carol').status_code, 201)
+        self.assertEqual(signup('dave').status_code, 201)
+        self.assertEqual(User.objects.filter(username__in=['carol', 'dave']).count(), 2)
@@ -0,0 +1,224 @@
+import threading
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+
+from ezyapp import ledger
+from ezyapp.models import Transaction, User, Wallet, WalletCheckpoint
+
+
+def at(day, hour=0):
+    return datetime(2026, 3, day, hour, tzinfo=dt_timezone.utc)
+
+
+def create_wallet(username='helper'):
+    return Wallet.objects.create(user=User.objects.create_user(username, user_type='helper'))
+
+
+def post_at(wallet, when, type, amount):
+    txn = ledger.post_transaction(wallet, type, Decimal(amount), 'deposit' if type == 'credit' else 'withdrawal')
+    Transaction.objects.filter(pk=txn.pk).update(created_at=when)
+    return txn
+
+
+class PostTransactionTests(TestCase):
+    def test_running_balance_follows_each_post(self):
+        wallet = create_wallet()
+        ledger.post_transaction(wallet, 'credit', Decimal('100.00'), 'deposit')
+        ledger.post_transaction(wallet, 'debit', Decimal('30.50'), 'withdrawal')
+        ledger.post_transaction(wallet, 'credit', Decimal('5.25'), 'refund')
+
+        running = list(Transaction.objects.filter(wallet=wallet).order_by('id').values_list('running_balance', flat=True))
+        self.assertEqual(running, [Decimal('100.00'), Decimal('69.50'), Decimal('74.75')])
+        wallet.refresh_from_db()
+        self.assertEqual(wallet.balance, Decimal('74.75'))
+
+    def test_stale_wallet_instance_is_not_used(self):
+        wallet = create_wallet()
+        stale = Wallet.objects.get(pk=wallet.pk)
+        ledger.post_transaction(wallet, 'credit', Decimal('10.00'), 'deposit')
+        txn = ledger.post_transaction(stale, 'credit', Decimal('10.00'), 'deposit')
+        self.assertEqual(txn.running_balance, Decimal('20.00'))
+
+
+class ConcurrentPostTests(TransactionTestCase):
+    @skipUnlessDBFeature('has_select_for_update')
+    def test_concurrent_posts_keep_running_balances_consistent(self):
+        wallet = create_wallet()
+        threads, errors = 8, []
+        barrier = threading.Barrier(threads)
+
+        def post():
+            try:
+                barrier.wait()
+                for _ in range(5):
+                    ledger.post_transaction(wallet, 'credit', Decimal('1.00'), 'deposit')
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=post) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(errors, [])
+        wallet.refresh_from_db()
+        self.assertEqual(wallet.balance, Decimal('40.00'))
+        running = Transaction.objects.filter(wallet=wallet).order_by('running_balance').values_list(
+            'running_balance', flat=True
+        )
+        # Each post saw the balance left by the one before it
+        self.assertEqual(list(running), [Decimal(n) for n in range(1, 41)])
+        self.assertEqual(ledger.reconcile_wallets([wallet.pk]), (1, []))
+
+
+class BalanceAtTests(TestCase):
+    def setUp(self):
+        self.wallet = create_wallet()
+        post_at(self.wallet, at(1, 10), 'credit', '100.00')
+        post_at(self.wallet, at(2, 10), 'debit', '40.00')
+        post_at(self.wallet, at(3, 10), 'credit', '15.00')
+
+    def test_without_checkpoints(self):
+        self.assertEqual(ledger.balance_at(self.wallet, at(1)), Decimal('0.00'))
+        self.assertEqual(ledger.balance_at(self.wallet, at(1, 10)), Decimal('0.00'))
+        self.assertEqual(ledger.balance_at(self.wallet, at(2)), Decimal('100.00'))
+        self.assertEqual(ledger.balance_at(self.wallet, at(4)), Decimal('75.00'))
+
+    def test_checkpoint_anchors_the_lookup(self):
+        self.assertEqual(ledger.create_checkpoints(as_of=at(2)), 1)
+        self.assertEqual(WalletCheckpoint.objects.get(wallet=self.wallet).balance, Decimal('100.00'))
+        # Transactions before the checkpoint are no longer read
+        Transaction.objects.filter(created_at__lt=at(2)).update(running_balance=Decimal('-1.00'))
+
+        self.assertEqual(ledger.balance_at(self.wallet, at(2, 5)), Decimal('100.00'))
+        self.assertEqual(ledger.balance_at(self.wallet, at(2, 12)), Decimal('60.00'))
+        self.assertEqual(ledger.balance_at(self.wallet, at(4)), Decimal('75.00'))
+
+    def test_unchanged_wallets_get_no_new_checkpoint(self):
+        ledger.create_checkpoints(as_of=at(2))
+        self.assertEqual(ledger.create_checkpoints(as_of=at(2, 5)), 0)
+        self.assertEqual(ledger.create_checkpoints(as_of=at(3)), 1)
+
+    def test_statement_around_a_checkpoint(self):
+        ledger.create_checkpoints(as_of=at(2))
+        statement = ledger.get_statement(self.wallet, at(2), at(4))
+        self.assertEqual(statement['opening_balance'], Decimal('100.00'))
+        self.assertEqual(statement['total_credits'], Decimal('15.00'))
+        self.assertEqual(statement['total_debits'], Decimal('40.00'))
+        self.assertEqual(statement['closing_balance'], Decimal('75.00'))
+        self.assertEqual([txn.amount for txn in statement['transactions']], [Decimal('40.00'), Decimal('15.00')])
+
+        statement = ledger.get_statement(self.wallet, at(2, 12), at(3))
+        self.assertEqual(statement['opening_balance'], Decimal('60.00'))
+        self.assertEqual(statement['closing_balance'], Decimal('60.00'))
+        self.assertEqual(list(statement['transactions']), [])
+
+
+class RunningBalanceBackfillTests(TransactionTestCase):
+    """Migration 0007 numbers the transactions that existed before running balances."""
+    before = [('ezyapp', '0006_task_queue')]
+    after = [('ezyapp', '0007_wallet_ledger')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_backfill(self):
+        apps = self.migrate(self.before)
+        User = apps.get_model('ezyapp', 'User')
+        Wallet = apps.get_model('ezyapp', 'Wallet')
+        Transaction = apps.get_model('ezyapp', 'Transaction')
+        first = Wallet.objects.create(user=User.objects.create(username='first', user_type='helper'))
+        second = Wallet.objects.create(user=User.objects.create(username='second', user_type='helper'))
+        rows = [
+            (first, 'credit', '50.00', at(1)), (second, 'credit', '20.00', at(1)),
+            (first, 'debit', '15.00', at(2)), (first, 'credit', '2.50', at(3)), (second, 'debit', '5.00', at(2)),
+        ]
+        for wallet, type, amount, when in rows:
+            txn = Transaction.objects.create(wallet=wallet, type=type, amount=Decimal(amount), reason='other')
+            Transaction.objects.filter(pk=txn.pk).update(created_at=when)
+
+        apps = self.migrate(self.after)
+        Transaction = apps.get_model('ezyapp', 'Transaction')
+
+        def running(wallet):
+            return list(Transaction.objects.filter(wallet_id=wallet.pk).order_by('created_at').values_list(
+                'running_balance', flat=True
+            ))
+        self.assertEqual(running(first), [Decimal('50.00'), Decimal('35.00'), Decimal('37.50')])
+        self.assertEqual(running(second), [Decimal('20.00'), Decimal('15.00')])
+
+
+class OpeningBalanceMigrationTests(TransactionTestCase):
+    """Migration 0012 accounts for balances set without a Transaction."""
+    before = [('ezyapp', '0011_user_imports')]
+    after = [('ezyapp', '0012_opening_balances')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_opening_balances(self):
+        apps = self.migrate(self.before)
+        User = apps.get_model('ezyapp', 'User')
+        Wallet = apps.get_model('ezyapp', 'Wallet')
+        Transaction = apps.get_model('ezyapp', 'Transaction')
+        WalletCheckpoint = apps.get_model('ezyapp', 'WalletCheckpoint')
+
+        def create_wallet(username, balance, created_at):
+            wallet = Wallet.objects.create(user=User.objects.create(username=username, user_type='helper'))
+            Wallet.objects.filter(pk=wallet.pk).update(balance=Decimal(balance), created_at=created_at)
+            return wallet
+
+        def create_txn(wallet, type, amount, running_balance, when):
+            txn = Transaction.objects.create(
+                wallet=wallet, type=type, amount=Decimal(amount), reason='other', running_balance=Decimal(running_balance)
+            )
+            Transaction.objects.filter(pk=txn.pk).update(created_at=when)
+
+        # Seeded with 100.00 in the admin, then backfilled by 0007 from zero
+        seeded = create_wallet('seeded', '130.00', at(2))
+        create_txn(seeded, 'credit', '50.00', '50.00', at(1))
+        create_txn(seeded, 'debit', '20.00', '30.00', at(3))
+        WalletCheckpoint.objects.create(wallet=seeded, as_of=at(2), balance=Decimal('50.00'))
+        balanced = create_wallet('balanced', '50.00', at(1))
+        create_txn(balanced, 'credit', '50.00', '50.00', at(2))
+        untouched = create_wallet('untouched', '25.00', at(4))
+
+        self.migrate(self.after)
+
+        def history(wallet):
+            return list(
+                Transaction.objects.filter(wallet_id=wallet.pk).order_by('created_at', 'id')
+                .values_list('type', 'amount', 'running_balance')
+            )
+        self.assertEqual(history(seeded), [
+            ('credit', Decimal('100.00'), Decimal('100.00')),
+            ('credit', Decimal('50.00'), Decimal('150.00')),
+            ('debit', Decimal('20.00'), Decimal('130.00')),
+        ])
+        self.assertEqual(WalletCheckpoint.objects.get(wallet_id=seeded.pk).balance, Decimal('150.00'))
+        self.assertEqual(history(balanced), [('credit', Decimal('50.00'), Decimal('50.00'))])
+        self.assertEqual(history(untouched), [('credit', Decimal('25.00'), Decimal('25.00'))])
+        self.assertEqual(Transaction.objects.get(wallet_id=untouched.pk).created_at, at(4))
+
+        wallet_ids = [seeded.pk, balanced.pk, untouched.pk]
+        self.assertEqual(ledger.reconcile_wallets(wallet_ids), (3, []))
+        self.assertEqual(ledger.balance_at(seeded.pk, at(2, 12)), Decimal('150.00'))
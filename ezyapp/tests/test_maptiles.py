@@ -0,0 +1,58 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from ezyapp import maptiles, throttling
+from ezyapp.models import Job, User
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, MAP_MAX_TILES=64)
+class JobMapTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        throttling._store = None
+        self.helper = User.objects.create_user('helper', user_type='helper')
+        self.client = APIClient()
+        self.client.force_authenticate(self.helper)
+
+    def get_map(self, bbox, zoom):
+        return self.client.get('/api/jobs/map/', {'bbox': bbox, 'zoom': zoom})
+
+    def test_tile_count_matches_tiles(self):
+        for zoom in (0, 3, 8):
+            bbox = (-10.5, 20.25, 30.75, 45.5)
+            self.assertEqual(maptiles.count_tiles(zoom, *bbox), len(maptiles.get_tiles(zoom, *bbox)))
+
+    def test_world_bbox_at_high_zoom_is_refused_without_listing_tiles(self):
+        # Listing them would take about 5 * 10**11 tuples
+        with mock.patch('ezyapp.maptiles.get_tiles', side_effect=AssertionError('tiles were listed')):
+            response = self.get_map('-180,-90,180,90', 20)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('bbox', response.json())
+
+    def test_valid_bbox(self):
+        poster = User.objects.create_user('poster', user_type='poster')
+        job = Job.objects.create(
+            user=poster, title='Walk my dog', description='Around the park', location_lat=Decimal('12.9716'),
+            location_long=Decimal('77.5946'), location_address='MG Road', category='pet', job_type='fixed',
+            price=Decimal('250.00'), start_time=timezone.now() + timedelta(days=1),
+        )
+        response = self.get_map('77,12,78,13', 10)
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body['tiles'], maptiles.count_tiles(10, 77, 12, 78, 13))
+        self.assertLessEqual(body['tiles'], 64)
+        self.assertEqual([point['id'] for point in body['jobs']], [job.pk])
+
+    def test_bad_bbox(self):
+        for bbox in ('1,2,3', 'a,b,c,d', '10,0,5,1', '0,0,1,91', 'nan,0,1,1', '-inf,0,1,1'):
+            with self.subTest(bbox=bbox):
+                response = self.get_map(bbox, 5)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('bbox', response.json())
+        self.assertEqual(self.get_map('0,0,1,1', 21).status_code, 400)
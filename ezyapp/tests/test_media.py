@@ -0,0 +1,112 @@
+import os
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from ezyapp.models import HelperDocument, User
+
+CONTENT = b'0123456789' * 10
+
+
+class MediaAccessTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(
+            SECURE_SSL_REDIRECT=False, MEDIA_ROOT=media_root, MEDIA_ACCEL_REDIRECT='',
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        for name in ('profile_pictures/helper.png', 'documents/pan/helper.pdf', 'documents/pan/orphan.pdf'):
+            os.makedirs(os.path.join(media_root, os.path.dirname(name)), exist_ok=True)
+            with open(os.path.join(media_root, name), 'wb') as f:
+                f.write(CONTENT)
+        with open(os.path.join(media_root, 'secret.txt'), 'wb') as f:
+            f.write(CONTENT)
+
+        self.helper = User.objects.create_user('helper', user_type='helper')
+        HelperDocument.objects.create(user=self.helper, pan_card='documents/pan/helper.pdf')
+        self.other = User.objects.create_user('other', user_type='poster')
+        self.staff = User.objects.create_user('staff', user_type='poster', is_staff=True)
+        self.client = APIClient()
+
+    def get(self, path, user=None, **headers):
+        if user is not None:
+            self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+        return self.client.get(f'/media/{path}', headers=headers)
+
+    def test_requires_authentication(self):
+        self.assertEqual(self.get('profile_pictures/helper.png').status_code, 401)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer not-a-token')
+        self.assertEqual(self.client.get('/media/profile_pictures/helper.png').status_code, 401)
+
+    def test_session_authentication(self):
+        self.client.force_login(self.other)
+        self.assertEqual(self.client.get('/media/profile_pictures/helper.png').status_code, 200)
+
+    def test_profile_pictures_are_visible_to_any_user(self):
+        response = self.get('profile_pictures/helper.png', self.other)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+        self.assertIn('private', response['Cache-Control'])
+
+    def test_documents_are_visible_to_the_owner_and_staff(self):
+        self.assertEqual(self.get('documents/pan/helper.pdf', self.helper).status_code, 200)
+        self.assertEqual(self.get('documents/pan/helper.pdf', self.staff).status_code, 200)
+        # Refused exactly like a missing file
+        self.assertEqual(self.get('documents/pan/helper.pdf', self.other).status_code, 404)
+        self.assertEqual(self.get('documents/pan/orphan.pdf', self.helper).status_code, 404)
+
+    def test_other_paths_are_hidden(self):
+        self.assertEqual(self.get('secret.txt', self.staff).status_code, 404)
+        self.assertEqual(self.get('profile_pictures/../secret.txt', self.staff).status_code, 404)
+        self.assertEqual(self.get('profile_pictures/../../etc/passwd', self.staff).status_code, 404)
+        self.assertEqual(self.get('profile_pictures/missing.png', self.staff).status_code, 404)
+        self.assertEqual(self.get('profile_pictures/', self.staff).status_code, 404)
+
+    def test_conditional_requests(self):
+        response = self.get('profile_pictures/helper.png', self.other)
+        etag, last_modified = response['ETag'], response['Last-Modified']
+
+        response = self.get('profile_pictures/helper.png', If_None_Match=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(self.get('profile_pictures/helper.png', If_Modified_Since=last_modified).status_code, 304)
+        # A changed file no longer matches
+        self.assertEqual(self.get('profile_pictures/helper.png', If_None_Match='"stale"').status_code, 200)
+
+    def test_ranges(self):
+        response = self.get('profile_pictures/helper.png', self.other, Range='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 10-19/100')
+        self.assertEqual(response['Content-Length'], '10')
+        self.assertEqual(b''.join(response.streaming_content), CONTENT[10:20])
+
+        response = self.get('profile_pictures/helper.png', Range='bytes=-5')
+        self.assertEqual(response['Content-Range'], 'bytes 95-99/100')
+        self.assertEqual(b''.join(response.streaming_content), CONTENT[-5:])
+        response = self.get('profile_pictures/helper.png', Range='bytes=90-')
+        self.assertEqual(b''.join(response.streaming_content), CONTENT[90:])
+
+        response = self.get('profile_pictures/helper.png', Range='bytes=100-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */100')
+        # Several ranges, or a stale If-Range, get the whole file
+        self.assertEqual(self.get('profile_pictures/helper.png', Range='bytes=0-1,5-6').status_code, 200)
+        self.assertEqual(
+            self.get('profile_pictures/helper.png', Range='bytes=0-1', If_Range='"stale"').status_code, 200
+        )
+
+    def test_range_checks_access_first(self):
+        self.assertEqual(self.get('documents/pan/helper.pdf', self.other, Range='bytes=0-9').status_code, 404)
+
+    @override_settings(MEDIA_ACCEL_REDIRECT='/protected-media/')
+    def test_accel_redirect(self):
+        response = self.get('documents/pan/helper.pdf', self.helper)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/documents/pan/helper.pdf')
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertEqual(response.content, b'')
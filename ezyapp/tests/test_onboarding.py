@@ -0,0 +1,96 @@
+import json
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from ezyapp.models import Task, User, UserImport
+from ezyapp.onboarding import expire_user_imports, run_user_import
+from ezyapp.taskqueue import claim_tasks, requeue_stale_tasks
+
+
+def user_row(username, user_type='helper', password='S3cure-pass!x'):
+    return json.dumps({
+        'username': username, 'password': password, 'email': f'{username}@example.com',
+        'first_name': 'Test', 'last_name': 'User', 'user_type': user_type,
+    }) + '\n'
+
+
+@override_settings(
+    SECURE_SSL_REDIRECT=False, PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher']
+)
+class UserImportTests(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user('staff', password='S3cure-pass!x', user_type='poster', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def test_import_is_queued_and_run_by_a_worker(self):
+        body = (user_row('helper1') + user_row('poster1', 'poster') + user_row('helper1')
+                + user_row('weak', password='123')).encode()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.generic('POST', '/api/users/import/', body, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['status'], 'queued')
+        self.assertTrue(Task.objects.filter(name='ezyapp.tasks.register_user_import', status='queued').exists())
+        self.assertFalse(User.objects.filter(username='helper1').exists())
+
+        run_user_import(response.json()['id'])
+
+        report = self.client.get(response['Location']).json()
+        self.assertEqual(report['status'], 'succeeded')
+        self.assertEqual(report['report']['created'], 2)
+        self.assertEqual([error['row'] for error in report['report']['errors']], [3, 4])
+        self.assertEqual(bytes(UserImport.objects.get().data), b'')
+
+        helper = User.objects.get(username='helper1')
+        self.assertTrue(helper.check_password('S3cure-pass!x'))
+        self.assertEqual(helper.wallet.balance, 0)
+        self.assertEqual(helper.documents.status, 'pending')
+        self.assertFalse(hasattr(User.objects.get(username='poster1'), 'documents'))
+
+    def test_upload_is_stored_encrypted(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.generic('POST', '/api/users/import/', user_row('helper1'), content_type='application/x-ndjson')
+        data = bytes(UserImport.objects.get().data)
+        self.assertNotIn(b'S3cure-pass', data)
+        self.assertNotIn(b'helper1', data)
+
+    def test_import_stranded_by_a_killed_worker_is_failed_and_cleared(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.generic('POST', '/api/users/import/', user_row('helper1'), content_type='application/x-ndjson')
+        task = Task.objects.get(name='ezyapp.tasks.register_user_import')
+        self.assertEqual(claim_tasks('worker-1', 1, queues=['default']), [task.pk])
+        # The worker claimed the import, then was killed before finishing it
+        UserImport.objects.filter(pk=response.json()['id']).update(status='running')
+        self.assertEqual(expire_user_imports(), 0)
+
+        later = timezone.now() + timedelta(hours=1)
+        requeue_stale_tasks(now=later)
+        self.assertEqual(Task.objects.get(pk=task.pk).status, 'failed')
+        self.assertEqual(expire_user_imports(now=later), 1)
+        user_import = UserImport.objects.get()
+        self.assertEqual(user_import.status, 'failed')
+        self.assertEqual(bytes(user_import.data), b'')
+        self.assertIsNotNone(user_import.finished_at)
+        self.assertFalse(User.objects.filter(username='helper1').exists())
+
+    def test_old_queued_import_is_expired(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.generic('POST', '/api/users/import/', user_row('helper1'), content_type='application/x-ndjson')
+        self.assertEqual(expire_user_imports(now=timezone.now() + timedelta(hours=1)), 0)
+        self.assertEqual(expire_user_imports(now=timezone.now() + timedelta(days=2)), 1)
+        self.assertEqual(bytes(UserImport.objects.get(status='failed').data), b'')
+
+    def test_import_is_staff_only(self):
+        self.client.force_authenticate(User.objects.create_user('helper', user_type='helper'))
+        response = self.client.generic('POST', '/api/users/import/', user_row('x'), content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(USER_IMPORT_MAX_BODY_SIZE=100)
+    def test_large_imports_are_refused(self):
+        body = (user_row('a') + user_row('b')).encode()
+        response = self.client.generic('POST', '/api/users/import/', body, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 413)
+        self.assertFalse(UserImport.objects.exists())
@@ -0,0 +1,139 @@
+import gzip
+import os
+import tempfile
+from datetime import date, datetime, timezone as dt_timezone
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.db import IntegrityError, connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+from ezyapp import partitions
+from ezyapp.models import Notification, Transaction
+
+BEFORE = [('ezyapp', '0009_alter_user_managers')]
+AFTER = [('ezyapp', '0010_partition_transactions_notifications')]
+
+
+def at(year, month, day=15):
+    return datetime(year, month, day, 12, tzinfo=dt_timezone.utc)
+
+
+def get_primary_key(table):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT a.attname FROM pg_index i JOIN pg_attribute a ON a.attrelid = i.indrelid "
+            "AND a.attnum = ANY(i.indkey) WHERE i.indrelid = %s::regclass AND i.indisprimary ORDER BY a.attnum",
+            [table],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def get_index_names(table):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT indexname FROM pg_indexes WHERE tablename = %s", [table])
+        return {row[0] for row in cursor.fetchall()}
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Partitioning needs PostgreSQL')
+class PartitionMigrationTests(TransactionTestCase):
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        for table in ('ezyapp_transaction', 'ezyapp_notification'):
+            for month, attached in partitions.get_partitions(connection, table).items():
+                if not attached:
+                    with connection.cursor() as cursor:
+                        cursor.execute(f'DROP TABLE {partitions.partition_name(table, month)}')
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def create_history(self):
+        apps = self.migrate(BEFORE)
+        HistoricalUser = apps.get_model('ezyapp', 'User')
+        user = HistoricalUser.objects.create(username='helper', user_type='helper')
+        wallet = apps.get_model('ezyapp', 'Wallet').objects.create(user=user)
+        HistoricalTransaction = apps.get_model('ezyapp', 'Transaction')
+        HistoricalNotification = apps.get_model('ezyapp', 'Notification')
+        for when in (at(2025, 1), at(2025, 3), datetime.now(dt_timezone.utc)):
+            txn = HistoricalTransaction.objects.create(
+                wallet=wallet, type='credit', amount=Decimal('10.00'), reason='deposit', running_balance=Decimal('10.00')
+            )
+            HistoricalTransaction.objects.filter(pk=txn.pk).update(created_at=when)
+            notification = HistoricalNotification.objects.create(user=user, message='hello')
+            HistoricalNotification.objects.filter(pk=notification.pk).update(created_at=when)
+        return user.pk, wallet.pk
+
+    def test_partition_and_unpartition(self):
+        user_id, wallet_id = self.create_history()
+        indexes = get_index_names('ezyapp_transaction') - {'ezyapp_transaction_pkey'}
+        max_id = Transaction.objects.order_by('-id').values_list('id', flat=True).first()
+
+        self.migrate(AFTER)
+        for table in ('ezyapp_transaction', 'ezyapp_notification'):
+            self.assertTrue(partitions.is_partitioned(connection, table))
+            self.assertEqual(get_primary_key(table), ['id', 'created_at'])
+        months = partitions.get_partitions(connection, 'ezyapp_transaction')
+        self.assertEqual(min(months), date(2025, 1, 1))
+        self.assertTrue(all(months.values()))
+        self.assertLessEqual(indexes, get_index_names('ezyapp_transaction'))
+        self.assertEqual(Transaction.objects.count(), 3)
+        self.assertEqual(Notification.objects.filter(user_id=user_id).count(), 3)
+
+        # New rows keep drawing ids from the old sequence, and foreign keys still hold
+        txn = Transaction.objects.create(wallet_id=wallet_id, type='debit', amount=Decimal('1.00'), reason='other')
+        self.assertGreater(txn.pk, max_id)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Transaction.objects.create(wallet_id=wallet_id + 1000, type='debit', amount=Decimal('1.00'), reason='other')
+
+        self.migrate(BEFORE)
+        for table in ('ezyapp_transaction', 'ezyapp_notification'):
+            self.assertFalse(partitions.is_partitioned(connection, table))
+            self.assertEqual(get_primary_key(table), ['id'])
+            self.assertEqual(partitions.get_partitions(connection, table), {})
+        self.assertLessEqual(indexes, get_index_names('ezyapp_transaction'))
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM ezyapp_transaction')
+            self.assertEqual(cursor.fetchone()[0], 4)
+
+    def test_create_detach_and_archive(self):
+        user_id, _ = self.create_history()
+        self.migrate(AFTER)
+        old = Notification.objects.create(user_id=user_id, message='old')
+        Notification.objects.filter(pk=old.pk).update(created_at=at(2020, 6))
+
+        # The row landed in the default partition and moves with its month
+        self.assertTrue(partitions.create_partition(connection, 'ezyapp_notification', date(2020, 6, 1)))
+        self.assertFalse(partitions.create_partition(connection, 'ezyapp_notification', date(2020, 6, 1)))
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM ezyapp_notification_default')
+            self.assertEqual(cursor.fetchone()[0], 0)
+            cursor.execute('SELECT COUNT(*) FROM ezyapp_notification_p2020_06')
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+        detached = partitions.detach_partitions(date(2025, 1, 1), ['ezyapp.Notification'])
+        self.assertEqual(detached, ['ezyapp_notification_p2020_06'])
+        self.assertFalse(Notification.objects.filter(pk=old.pk).exists())
+        self.assertEqual(Transaction.objects.count(), 3)
+
+        with tempfile.TemporaryDirectory() as directory:
+            archived = partitions.archive_partitions(directory, ['ezyapp.Notification'])
+            self.assertEqual([name for name, _ in archived], ['ezyapp_notification_p2020_06'])
+            with gzip.open(os.path.join(directory, 'ezyapp_notification_p2020_06.csv.gz'), 'rt') as archive:
+                lines = archive.read().splitlines()
+        self.assertTrue(lines[0].startswith('id,'))
+        self.assertEqual(len(lines), 2)
+        self.assertNotIn(date(2020, 6, 1), partitions.get_partitions(connection, 'ezyapp_notification'))
+
+    def test_create_partitions_ahead(self):
+        self.migrate(AFTER)
+        created = partitions.create_partitions(months_ahead=1, today=date(2040, 1, 10))
+        self.assertEqual(created, [
+            'ezyapp_transaction_p2040_01', 'ezyapp_transaction_p2040_02',
+            'ezyapp_notification_p2040_01', 'ezyapp_notification_p2040_02',
+        ])
+        self.assertEqual(partitions.create_partitions(months_ahead=1, today=date(2040, 1, 10)), [])
@@ -0,0 +1,78 @@
+import os
+import tempfile
+
+from django.db import connection
+from django.test import TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from ezyapp import throttling
+from ezyapp.models import HelperDocument, User
+from ezyapp.querycache import query_cache
+
+SHARED_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'shared': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': os.path.join(tempfile.gettempdir(), 'ezydoo-test-cache')},
+}
+
+
+def deactivate_elsewhere(user):
+    """Deactivate ``user`` the way another process would, without bumping this process's versions."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'UPDATE {User._meta.db_table} SET is_active = %s WHERE id = %s', [False, user.pk])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class CachedAuthenticationTests(TransactionTestCase):
+    def setUp(self):
+        query_cache.clear()
+        self.user = User.objects.create_user('helper', password='S3cure-pass!x', user_type='helper')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+    def test_local_cache_is_bypassed(self):
+        self.assertFalse(query_cache.enabled)
+        self.assertEqual(self.client.get(f'/api/users/{self.user.pk}/').status_code, 200)
+        deactivate_elsewhere(self.user)
+        self.assertEqual(self.client.get(f'/api/users/{self.user.pk}/').status_code, 401)
+
+    @override_settings(CACHES=SHARED_CACHES, QUERY_CACHE_ALIAS='shared')
+    def test_shared_cache_is_used(self):
+        query_cache.shared.clear()
+        self.assertTrue(query_cache.enabled)
+        self.assertEqual(self.client.get(f'/api/users/{self.user.pk}/').status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(User.objects.get_cached(pk=self.user.pk), self.user)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, CACHES=SHARED_CACHES, QUERY_CACHE_ALIAS='shared')
+class CachedProfileTests(TransactionTestCase):
+    def setUp(self):
+        query_cache.clear()
+        query_cache.shared.clear()
+        throttling._store = None
+        self.helper = User.objects.create_user('helper', user_type='helper')
+        self.document = HelperDocument.objects.create(user=self.helper)
+        self.poster = User.objects.create_user('poster', user_type='poster')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.poster).access_token}')
+
+    def test_profile_is_cached_until_verification_changes(self):
+        url = f'/api/users/{self.helper.pk}/'
+        self.assertEqual(self.client.get(url).json()['documents_status']['status'], 'pending')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+        self.document.status = 'approved'
+        self.document.save()
+        self.assertEqual(self.client.get(url).json()['documents_status']['status'], 'approved')
+        self.assertEqual(self.client.get('/api/users/0/').status_code, 404)
+        self.assertEqual(self.client.get(url, {'fields': 'id,username'}).json(), {'id': self.helper.pk, 'username': 'helper'})
+
+    def test_bulk_profiles_are_cached(self):
+        url = f'/api/users/bulk/?ids={self.helper.pk},{self.poster.pk}'
+        self.assertEqual([user['id'] for user in self.client.get(url).json()['results']], [self.helper.pk, self.poster.pk])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).status_code, 200)
+        User.objects.filter(pk=self.helper.pk).update(is_verified=True)
+        self.assertTrue(self.client.get(url).json()['results'][0]['is_verified'])
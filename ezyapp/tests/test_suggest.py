@@ -0,0 +1,113 @@
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from ezyapp import suggest, throttling
+from ezyapp.models import Job, User
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class SuggestionTests(TransactionTestCase):
+    def setUp(self):
+        suggest.suggestion_index = suggest.SuggestionIndex()
+        throttling._store = None
+        self.poster = User.objects.create_user('poster', user_type='poster')
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('helper', user_type='helper'))
+
+    def create_job(self, title, address='MG Road, Bengaluru'):
+        return Job.objects.create(
+            user=self.poster, title=title, description='Details', location_lat=Decimal('12.97'),
+            location_long=Decimal('77.59'), location_address=address, category='pet', job_type='fixed',
+            price=Decimal('100.00'), start_time=timezone.now() + timedelta(days=1),
+        )
+
+    def suggestions(self, q, **params):
+        response = self.client.get('/api/jobs/suggest/', {'q': q, **params})
+        self.assertEqual(response.status_code, 200)
+        return [(item['text'], item['count']) for item in response.json()]
+
+    def test_prefix_matching(self):
+        self.create_job('Walk my dog')
+        self.create_job('Paint the fence', address='Indiranagar')
+        self.assertEqual(self.suggestions('wal'), [('Walk my dog', 1)])
+        self.assertEqual(self.suggestions('my d'), [('Walk my dog', 1)])
+        self.assertEqual(self.suggestions('FENCE'), [('Paint the fence', 1)])
+        self.assertEqual(self.suggestions('indira'), [('Indiranagar', 1)])
+        self.assertEqual(self.suggestions('alk'), [])
+
+    def test_ranking(self):
+        self.create_job('Walk my cat')
+        self.create_job('Walk my dog')
+        self.create_job('Walk my dog')
+        self.create_job('Walk my bird')
+        # Most used first, ties in alphabetical order
+        self.assertEqual(
+            self.suggestions('walk'), [('Walk my dog', 2), ('Walk my bird', 1), ('Walk my cat', 1)]
+        )
+        self.assertEqual(self.suggestions('walk', limit=1), [('Walk my dog', 2)])
+
+    def test_saves_update_the_index(self):
+        self.assertEqual(self.suggestions('walk'), [])
+        job = self.create_job('Walk my dog')
+        with self.assertNumQueries(0):
+            self.assertEqual(suggest.suggestion_index.suggest('walk', 8)[0]['text'], 'Walk my dog')
+
+        job.title = 'Walk my cat'
+        job.save()
+        self.assertEqual(self.suggestions('walk'), [('Walk my cat', 1)])
+        job.status = 'assigned'
+        job.save()
+        self.assertEqual(self.suggestions('walk'), [])
+
+    @override_settings(SUGGEST_REBUILD_INTERVAL=0)
+    def test_rebuild_runs_in_the_background(self):
+        job = self.create_job('Walk my dog')
+        self.assertEqual(self.suggestions('walk'), [('Walk my dog', 1)])
+        # Changed without signals, so only a rebuild sees it
+        Job.objects.filter(pk=job.pk).update(title='Walk my cat')
+
+        scanning, release = threading.Event(), threading.Event()
+
+        def slow_rebuild(original):
+            def rebuild():
+                scanning.set()
+                release.wait(5)
+                original()
+            return rebuild
+
+        index = suggest.suggestion_index
+        with mock.patch.object(index, 'rebuild', slow_rebuild(index.rebuild)):
+            # The request answers from the current index while the rebuild waits
+            self.assertEqual(self.suggestions('walk'), [('Walk my dog', 1)])
+            self.assertTrue(scanning.wait(5))
+            rebuilder = index.rebuilder
+            self.assertIsNone(index.start_rebuild())
+            release.set()
+            rebuilder.join(5)
+        self.assertEqual(suggest.suggestion_index.suggest('walk', 8), [
+            {'text': 'Walk my cat', 'field': 'title', 'count': 1}
+        ])
+
+    def test_saves_during_a_rebuild_are_kept(self):
+        self.create_job('Walk my dog')
+        self.suggestions('walk')
+        index = suggest.suggestion_index
+        original = index.get_phrase_keys
+        new_job = []
+
+        def save_meanwhile(field, phrase):
+            # A save in this process lands after the rebuild read the table
+            if not new_job:
+                new_job.append(self.create_job('Water the plants'))
+            return original(field, phrase)
+
+        with mock.patch.object(index, 'get_phrase_keys', save_meanwhile):
+            index.rebuild()
+        self.assertEqual([item['text'] for item in index.suggest('water', 8)], ['Water the plants'])
+        self.assertIsNone(index.pending)
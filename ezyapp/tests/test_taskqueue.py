@@ -0,0 +1,38 @@
+import time
+
+from django.test import TransactionTestCase, override_settings
+
+from ezyapp.models import Task
+from ezyapp.taskqueue import claim_tasks, execute_task, requeue_stale_tasks, task
+
+requeued = []
+
+
+@task(name='ezyapp.tests.slow_task')
+def slow_task(seconds):
+    time.sleep(seconds)
+    # Another worker's housekeeping, running while this task is still busy
+    requeued.append(requeue_stale_tasks())
+
+
+@override_settings(TASK_LOCK_TIMEOUT=0.5, TASK_HEARTBEAT_INTERVAL=0.1)
+class HeartbeatTests(TransactionTestCase):
+    def setUp(self):
+        requeued.clear()
+
+    def test_running_task_is_not_requeued(self):
+        queued = slow_task.enqueue(1.0)
+        self.assertEqual(claim_tasks('worker-1', 1), [queued.pk])
+        execute_task(queued.pk)
+
+        self.assertEqual(requeued, [0])
+        finished = Task.objects.get(pk=queued.pk)
+        self.assertEqual(finished.status, 'succeeded')
+        self.assertEqual(finished.attempts, 1)
+
+    def test_abandoned_task_is_requeued(self):
+        queued = slow_task.enqueue(0)
+        claim_tasks('worker-1', 1)
+        time.sleep(0.6)
+        self.assertEqual(requeue_stale_tasks(), 1)
+        self.assertEqual(Task.objects.get(pk=queued.pk).status, 'queued')
@@ -0,0 +1,81 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.settings import api_settings
+from rest_framework.test import APIClient
+
+from ezyapp import throttling
+from ezyapp.models import User
+
+RATES = {'otp': '2/hour', 'search': '3/min', 'feed': '4/min', 'writes': '2/min', 'avatars': '30/min'}
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class EndpointThrottleTests(TestCase):
+    def setUp(self):
+        throttling._store = None
+        patcher = mock.patch.dict(api_settings.DEFAULT_THROTTLE_RATES, RATES)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user('helper', user_type='helper', phone_number='+919876543210')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assertQuota(self, response, scope, limit, remaining):
+        self.assertEqual(response['X-RateLimit-Scope'], scope)
+        self.assertEqual(response['X-RateLimit-Limit'], str(limit))
+        self.assertEqual(response['X-RateLimit-Remaining'], str(remaining))
+        self.assertGreater(int(response['X-RateLimit-Reset']), 0)
+
+    def test_scopes(self):
+        self.assertQuota(self.client.get('/api/jobs/'), 'feed', 4, 3)
+        self.assertQuota(self.client.get('/api/jobs/', {'search': 'dog'}), 'search', 3, 2)
+        self.assertQuota(self.client.get('/api/jobs/suggest/', {'q': 'dog'}), 'search', 3, 1)
+        self.assertQuota(self.client.patch(f'/api/users/{self.user.pk}/', {'bio': 'Hi'}), 'writes', 2, 1)
+        self.assertQuota(self.client.post('/api/users/request_otp/', {'phone_number': '+919876543210'}), 'otp', 2, 1)
+
+    def test_retrieve_is_not_throttled(self):
+        response = self.client.get(f'/api/users/{self.user.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-RateLimit-Scope', response)
+
+    def test_exhausted_scope(self):
+        for remaining in (3, 2, 1, 0):
+            response = self.client.get('/api/jobs/')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['X-RateLimit-Remaining'], str(remaining))
+        response = self.client.get('/api/jobs/')
+        self.assertEqual(response.status_code, 429)
+        self.assertQuota(response, 'feed', 4, 0)
+        # 4/min refills a token every 15 seconds
+        self.assertEqual(response['Retry-After'], '15')
+        # Other scopes keep their own buckets
+        self.assertEqual(self.client.get('/api/jobs/', {'search': 'dog'}).status_code, 200)
+
+    def test_buckets_are_per_user(self):
+        for _ in range(2):
+            self.client.patch(f'/api/users/{self.user.pk}/', {'bio': 'Hi'})
+        self.assertEqual(self.client.patch(f'/api/users/{self.user.pk}/', {'bio': 'Hi'}).status_code, 429)
+
+        other = User.objects.create_user('other', user_type='helper')
+        self.client.force_authenticate(other)
+        self.assertQuota(self.client.patch(f'/api/users/{other.pk}/', {'bio': 'Hi'}), 'writes', 2, 1)
+
+    def test_anonymous_requests_are_throttled_by_ip(self):
+        self.client.force_authenticate(None)
+        credentials = {'username': 'helper', 'password': 'wrong'}
+        for _ in range(2):
+            self.client.post('/api/auth/token/', credentials, REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(self.client.post('/api/auth/token/', credentials, REMOTE_ADDR='10.0.0.1').status_code, 429)
+        self.assertQuota(self.client.post('/api/auth/token/', credentials, REMOTE_ADDR='10.0.0.2'), 'writes', 2, 1)
+
+    @override_settings(THROTTLE_BACKEND='cache')
+    def test_cache_backend(self):
+        cache.clear()
+        throttling._store = None
+        self.addCleanup(setattr, throttling, '_store', None)
+        self.assertIsInstance(throttling.get_bucket_store(), throttling.CacheBucketStore)
+        for _ in range(2):
+            self.client.patch(f'/api/users/{self.user.pk}/', {'bio': 'Hi'})
+        self.assertEqual(self.client.patch(f'/api/users/{self.user.pk}/', {'bio': 'Hi'}).status_code, 429)
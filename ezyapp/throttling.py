@@ -0,0 +1,139 @@
+"""
+Token-bucket throttling scoped per endpoint.
+
+Each request is assigned a scope: the view's ``throttle_scope`` if it sets
+one (the OTP actions use ``otp``), otherwise ``search`` for list requests
+with ``?search=``, ``feed`` for other list requests and ``writes`` for
+unsafe methods. Other requests (retrieve, schema, docs) are not throttled.
+Views outside DRF take tokens with ``take_token`` (avatar renderings use
+``avatars``).
+Rates come from REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] in DRF's
+``number/period`` format; a rate of N/period allows bursts of N and refills
+at N per period.
+
+Buckets live in process memory by default (THROTTLE_BACKEND = 'local'),
+which costs a dict lookup per request but counts per worker process. Set
+THROTTLE_BACKEND = 'cache' to keep them in THROTTLE_CACHE_ALIAS instead,
+shared by all workers when that cache is (e.g. Redis or Memcached).
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import permissions
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 60 * 60 * 24}
+
+
+def parse_rate(rate):
+    """'10/min' -> (10, 60)"""
+    num, period = rate.split('/')
+    return int(num), PERIODS[period[0]]
+
+
+class LocalBucketStore:
+    """Buckets in an LRU-bounded dict, shared by the threads of one process."""
+
+    def __init__(self, max_keys=None):
+        self.max_keys = max_keys or getattr(settings, 'THROTTLE_LOCAL_MAX_KEYS', 10000)
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def consume(self, key, capacity, refill_rate, now):
+        with self.lock:
+            tokens, updated = self.buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * refill_rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self.buckets[key] = (tokens, now)
+            if len(self.buckets) > self.max_keys:
+                self.buckets.popitem(last=False)
+        return allowed, tokens
+
+
+class CacheBucketStore:
+    """
+    Buckets in a Django cache. Reads and writes are not atomic, so concurrent
+    requests for one key may occasionally both take the last token.
+    """
+
+    def __init__(self, alias=None):
+        self.cache = caches[alias or getattr(settings, 'THROTTLE_CACHE_ALIAS', 'default')]
+
+    def consume(self, key, capacity, refill_rate, now):
+        tokens, updated = self.cache.get(key) or (capacity, now)
+        tokens = min(capacity, tokens + (now - updated) * refill_rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        # Once full again the bucket is indistinguishable from a missing one
+        self.cache.set(key, (tokens, now), math.ceil((capacity - tokens) / refill_rate) + 1)
+        return allowed, tokens
+
+
+_store = None
+
+
+def get_bucket_store():
+    global _store
+    if _store is None:
+        backend = getattr(settings, 'THROTTLE_BACKEND', 'local')
+        _store = CacheBucketStore() if backend == 'cache' else LocalBucketStore()
+    return _store
+
+
+def take_token(scope, ident):
+    """
+    Take a token from ``ident``'s bucket for ``scope``. Returns ``(allowed,
+    tokens left, capacity, refill rate per second)``, or None when the scope
+    has no rate.
+    """
+    rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope) if scope else None
+    if rate is None:
+        return None
+    capacity, duration = parse_rate(rate)
+    refill_rate = capacity / duration
+    allowed, tokens = get_bucket_store().consume(f'throttle:{scope}:{ident}', capacity, refill_rate, time.time())
+    return allowed, tokens, capacity, refill_rate
+
+
+class EndpointThrottle(BaseThrottle):
+    """Apply the rate of the request's scope to the user (or client IP when anonymous)."""
+
+    def get_scope(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        if scope:
+            return scope
+        if request.method not in permissions.SAFE_METHODS:
+            return 'writes'
+        if getattr(view, 'action', None) == 'list':
+            return 'search' if request.query_params.get('search') else 'feed'
+        return None
+
+    def allow_request(self, request, view):
+        scope = self.get_scope(request, view)
+        user = request.user
+        ident = f'user:{user.pk}' if user and user.is_authenticated else f'ip:{self.get_ident(request)}'
+        taken = take_token(scope, ident)
+        if taken is None:
+            return True
+        allowed, tokens, capacity, refill_rate = taken
+
+        self.wait_seconds = 0 if allowed else (1 - tokens) / refill_rate
+        # Read by RateLimitHeadersMiddleware
+        request._request.throttle_quota = {
+            'X-RateLimit-Scope': scope,
+            'X-RateLimit-Limit': str(capacity),
+            'X-RateLimit-Remaining': str(int(tokens)),
+            'X-RateLimit-Reset': str(math.ceil((capacity - tokens) / refill_rate)),
+        }
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
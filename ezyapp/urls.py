@@ -12,6 +12,9 @@ router.register(r'wallets', views.WalletViewSet, basename='wallet')
 router.register(r'transactions', views.TransactionViewSet, basename='transaction')
 router.register(r'notifications', views.NotificationViewSet, basename='notification')
 router.register(r'documents', views.HelperDocumentViewSet, basename='document')
+router.register(r'archive/jobs', views.ArchivedJobViewSet, basename='archived-job')
+router.register(r'archive/applications', views.ArchivedJobApplicationViewSet, basename='archived-application')
+router.register(r'archive/notifications', views.ArchivedNotificationViewSet, basename='archived-notification')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -1,6 +1,8 @@
 from django.shortcuts import render
+from django.db import transaction
 from django.db.models import Q, Count, Avg
 from django.shortcuts import get_object_or_404
+from django.http import Http404
 from rest_framework import viewsets, status, permissions, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -11,15 +13,29 @@ from django.conf import settings
 from django.utils import timezone
 from datetime import timedelta
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiExample
-from .models import Job, JobApplication, Review, Wallet, Transaction, Notification, HelperDocument
+from .models import (
+    Job, JobApplication, Review, Wallet, Transaction, Notification, HelperDocument,
+    ArchivedJob, ArchivedJobApplication, ArchivedNotification, UserImport
+)
+from .events import publish
+from .filters import DateWindowFilter
+from .imports import SUPPORTED_CONTENT_TYPES, import_jobs, iter_rows
+from .ledger import get_statement
+from .maptiles import get_map
+from .mixins import BulkRetrieveMixin, FastListMixin, SparseFieldsetMixin
+from .onboarding import seal_upload
 from .serializers import (
-    UserSerializer, UserUpdateSerializer, UserProfileSerializer,
-    JobSerializer, JobDetailSerializer,
+    UserSerializer, UserUpdateSerializer, UserProfileSerializer, UserImportSerializer,
+    JobSerializer, JobDetailSerializer, JobMapQuerySerializer, JobMapSerializer,
+    JobSuggestQuerySerializer, JobSuggestionSerializer,
     JobApplicationSerializer, JobApplicationDetailSerializer,
     ReviewSerializer, ReviewDetailSerializer,
-    WalletSerializer, TransactionSerializer,
-    NotificationSerializer, HelperDocumentSerializer
+    WalletSerializer, TransactionSerializer, WalletStatementQuerySerializer, WalletStatementSerializer,
+    NotificationSerializer, HelperDocumentSerializer,
+    ArchivedJobSerializer, ArchivedJobApplicationSerializer, ArchivedNotificationSerializer
 )
+from .suggest import get_suggestions
+from .tasks import register_user_import
 
 User = get_user_model()
 
@@ -36,7 +52,7 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
         return obj.user == request.user
 
 @extend_schema(tags=['users'])
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(BulkRetrieveMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     API endpoint for managing users.
     
@@ -46,18 +62,21 @@ class UserViewSet(viewsets.ModelViewSet):
     serializer_class = UserSerializer
     filter_backends = [filters.SearchFilter]
     search_fields = ['username', 'email', 'first_name', 'last_name']
+    throttle_scope = None  # set per action, e.g. 'otp'; see ezyapp/throttling.py
     
     def get_permissions(self):
         if self.action == 'create':
             return [permissions.AllowAny()]
         elif self.action in ['update', 'partial_update', 'destroy']:
             return [permissions.IsAuthenticated()]
+        elif self.action in ['import_users', 'user_import']:
+            return [permissions.IsAdminUser()]
         return [permissions.IsAuthenticated()]
     
     def get_serializer_class(self):
         if self.action in ['update', 'partial_update']:
             return UserUpdateSerializer
-        elif self.action in ['retrieve', 'list']:
+        elif self.action in ['retrieve', 'list', 'bulk_retrieve']:
             return UserProfileSerializer
         return UserSerializer
     
@@ -66,7 +85,26 @@ class UserViewSet(viewsets.ModelViewSet):
             # Regular users can only see their own profile when listing
             return User.objects.filter(id=self.request.user.id)
         return super().get_queryset()
-    
+
+    # Posters choosing a helper read the same applicant profiles (and their
+    # verification) over and over, so profiles go through the query cache
+    def get_object(self):
+        if self.action != 'retrieve':
+            return super().get_object()
+        queryset = self.filter_queryset(self.get_queryset())
+        fields = self.get_requested_fields()
+        if fields is None or 'documents_status' in fields:
+            queryset = queryset.select_related('documents')
+        try:
+            user = queryset.get_cached(pk=self.kwargs['pk'])
+        except (User.DoesNotExist, ValueError):
+            raise Http404
+        self.check_object_permissions(self.request, user)
+        return user
+
+    def get_bulk_objects(self, queryset):
+        return queryset.cached()
+
     @extend_schema(
         summary="Get user ratings",
         description="Retrieve the average rating and total number of reviews for a user",
@@ -125,7 +163,7 @@ class UserViewSet(viewsets.ModelViewSet):
             }
         }
     )
-    @action(detail=False, methods=['post'])
+    @action(detail=False, methods=['post'], throttle_scope='otp')
     def request_otp(self, request):
         """Request a new OTP for verification."""
         phone_number = request.data.get('phone_number')
@@ -180,7 +218,7 @@ class UserViewSet(viewsets.ModelViewSet):
             }
         }
     )
-    @action(detail=False, methods=['post'])
+    @action(detail=False, methods=['post'], throttle_scope='otp')
     def verify_otp(self, request):
         """Verify OTP and mark user as verified."""
         phone_number = request.data.get('phone_number')
@@ -216,8 +254,55 @@ class UserViewSet(viewsets.ModelViewSet):
             return Response({'error': 'Invalid phone number or OTP'}, 
                            status=status.HTTP_400_BAD_REQUEST)
 
+    @extend_schema(
+        summary="Import users",
+        description=(
+            "Register users in bulk from NDJSON (one JSON object per line) or CSV with a header row "
+            "(staff only). Rows take the signup fields with a single `password`; they are validated "
+            "like POST /api/users/ and inserted in chunks with their wallets and document entries. "
+            "The import runs in the background: poll the returned import until it has finished; "
+            "its report lists invalid rows by row number."
+        ),
+        request={
+            "application/x-ndjson": {"type": "string", "format": "binary"},
+            "text/csv": {"type": "string", "format": "binary"},
+        },
+        responses={202: UserImportSerializer, 413: {"type": "object", "properties": {"error": {"type": "string"}}}}
+    )
+    @action(detail=False, methods=['post'], url_path='import')
+    def import_users(self, request):
+        """Queue a bulk registration; hashing thousands of passwords doesn't fit in a request."""
+        content_type = request.content_type.split(';')[0].strip().lower()
+        if content_type not in SUPPORTED_CONTENT_TYPES:
+            return Response(
+                {'error': f"Unsupported content type. Use one of: {', '.join(SUPPORTED_CONTENT_TYPES)}"},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+            )
+
+        max_size = getattr(settings, 'USER_IMPORT_MAX_BODY_SIZE', 2 * 1024 * 1024)
+        data = request.stream.read(max_size + 1) if request.stream is not None else b''
+        if len(data) > max_size:
+            return Response(
+                {'error': f'Imports are limited to {max_size} bytes; use the import_users command for larger files'},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+        user_import = UserImport.objects.create(
+            created_by=request.user, content_type=content_type, data=seal_upload(data)
+        )
+        transaction.on_commit(lambda: register_user_import.enqueue(user_import.pk))
+        serializer = UserImportSerializer(user_import, context=self.get_serializer_context())
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED,
+                        headers={'Location': serializer.data['url']})
+
+    @extend_schema(summary="Get a user import", responses={200: UserImportSerializer})
+    @action(detail=False, methods=['get'], url_path=r'import/(?P<import_id>\d+)')
+    def user_import(self, request, import_id=None):
+        """Status and, once finished, report of a bulk registration."""
+        user_import = get_object_or_404(UserImport, pk=import_id)
+        return Response(UserImportSerializer(user_import, context=self.get_serializer_context()).data)
+
 @extend_schema(tags=['documents'])
-class HelperDocumentViewSet(viewsets.ModelViewSet):
+class HelperDocumentViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     API endpoint for managing helper documents.
     
@@ -261,7 +346,12 @@ class HelperDocumentViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'])
     def status(self, request, pk=None):
         """Get the current status of verification documents."""
-        document = self.get_object()
+        # Polled by helpers waiting on verification, so read through the query cache
+        try:
+            document = self.get_queryset().get_cached(pk=pk)
+        except (HelperDocument.DoesNotExist, ValueError):
+            raise Http404
+        self.check_object_permissions(request, document)
         return Response({
             'status': document.status,
             'has_aadhaar': bool(document.aadhaar_card),
@@ -273,7 +363,7 @@ class HelperDocumentViewSet(viewsets.ModelViewSet):
         })
 
 @extend_schema(tags=['jobs'])
-class JobViewSet(viewsets.ModelViewSet):
+class JobViewSet(BulkRetrieveMixin, FastListMixin, viewsets.ModelViewSet):
     """
     API endpoint for managing jobs.
     
@@ -281,11 +371,14 @@ class JobViewSet(viewsets.ModelViewSet):
     """
     queryset = Job.objects.all()
     serializer_class = JobSerializer
+    fast_list_serializer_class = JobSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrReadOnly]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['category', 'status', 'job_type']
     search_fields = ['title', 'description', 'location_address']
     ordering_fields = ['created_at', 'start_time', 'price', 'hourly_rate']
+    ordering = ['-created_at']
+    throttle_scope = None  # set per action, e.g. 'search'; see ezyapp/throttling.py
     
     def get_serializer_class(self):
         if self.action in ['retrieve']:
@@ -303,7 +396,123 @@ class JobViewSet(viewsets.ModelViewSet):
         return Job.objects.filter(
             Q(status='open') | Q(assigned_to=user)
         )
-    
+
+    def get_helper_feed_branches(self):
+        """
+        Split the helper feed into two disjoint querysets, each served by its
+        own index: open jobs (partial index) and jobs assigned to the helper
+        that are no longer open.
+        """
+        user = self.request.user
+        return [
+            Job.objects.filter(status='open'),
+            Job.objects.filter(assigned_to=user).exclude(status='open'),
+        ]
+
+    def filter_queryset(self, queryset):
+        if self.action != 'list' or self.request.user.user_type == 'poster':
+            return super().filter_queryset(queryset)
+
+        # An OR across status and assigned_to can't be satisfied by a single
+        # index, so the helper list runs as a UNION ALL of index-backed branches.
+        # Filtering and search apply per branch; ordering applies to the union.
+        branches = [self.apply_sparse_fieldset(branch) for branch in self.get_helper_feed_branches()]
+        for backend in self.filter_backends:
+            if issubclass(backend, filters.OrderingFilter):
+                continue
+            branches = [backend().filter_queryset(self.request, branch, self) for branch in branches]
+
+        ordering = filters.OrderingFilter().get_ordering(self.request, queryset, self)
+        return branches[0].union(*branches[1:], all=True).order_by(*ordering)
+
+    @extend_schema(
+        summary="Job map",
+        description=(
+            "Open jobs in a bounding box, clustered on a grid for the zoom level: each busy grid cell "
+            "is returned as a cluster (job count and centroid), and jobs in sparse cells individually. "
+            "Results are computed per tile and cover whole tiles, so they may extend past the box."
+        ),
+        parameters=[
+            OpenApiParameter('bbox', str, required=True, description='west,south,east,north in degrees'),
+            OpenApiParameter('zoom', int, required=True, description='Zoom level, 0 to 20'),
+            OpenApiParameter('category', str, enum=[choice for choice, _ in Job.CATEGORY_CHOICES]),
+        ],
+        responses={200: JobMapSerializer}
+    )
+    @action(detail=False, methods=['get'], url_path='map', throttle_scope='search')
+    def map(self, request):
+        if request.user.user_type == 'poster':
+            return Response({'error': 'Only helpers can browse the job map'}, status=status.HTTP_403_FORBIDDEN)
+        query = JobMapQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        # Tiles are cached per zoom and category; see ezyapp/maptiles.py
+        return Response(get_map(
+            query.validated_data['zoom'], *query.validated_data['bbox'],
+            category=query.validated_data.get('category')
+        ))
+
+    @extend_schema(
+        summary="Search suggestions",
+        description=(
+            "Titles and addresses of open jobs with a word starting with q (or, for several words, "
+            "a run of words starting with q), most used first. Served from an in-memory prefix index."
+        ),
+        parameters=[
+            OpenApiParameter('q', str, required=True, description='Text typed so far'),
+            OpenApiParameter('limit', int, description='Suggestions returned, 1 to 20 (default: 8)'),
+        ],
+        responses={200: JobSuggestionSerializer(many=True)}
+    )
+    @action(detail=False, methods=['get'], throttle_scope='search')
+    def suggest(self, request):
+        if request.user.user_type == 'poster':
+            return Response({'error': 'Only helpers can search open jobs'}, status=status.HTTP_403_FORBIDDEN)
+        query = JobSuggestQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        # See ezyapp/suggest.py
+        return Response(get_suggestions(query.validated_data['q'], query.validated_data['limit']))
+
+    @extend_schema(
+        summary="Import jobs",
+        description=(
+            "Stream jobs as NDJSON (one JSON object per line) or CSV with a header row. "
+            "Rows are validated like POST /api/jobs/ and inserted in chunks; invalid rows "
+            "are skipped and reported by row number."
+        ),
+        request={
+            "application/x-ndjson": {"type": "string", "format": "binary"},
+            "text/csv": {"type": "string", "format": "binary"},
+        },
+        responses={
+            200: {
+                "type": "object",
+                "properties": {
+                    "created": {"type": "integer"},
+                    "failed": {"type": "integer"},
+                    "truncated": {"type": "boolean"},
+                    "errors": {"type": "array", "items": {"type": "object"}}
+                }
+            }
+        }
+    )
+    @action(detail=False, methods=['post'], url_path='import')
+    def import_jobs(self, request):
+        """Bulk-create jobs for the requesting poster from a streamed body."""
+        if request.user.user_type != 'poster':
+            return Response({'error': 'Only job posters can import jobs'}, status=status.HTTP_403_FORBIDDEN)
+
+        content_type = request.content_type.split(';')[0].strip().lower()
+        if content_type not in SUPPORTED_CONTENT_TYPES:
+            return Response(
+                {'error': f"Unsupported content type. Use one of: {', '.join(SUPPORTED_CONTENT_TYPES)}"},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+            )
+
+        # Read the raw stream rather than request.data so the body is never buffered whole
+        rows = iter_rows(request.stream, content_type)
+        report = import_jobs(rows, request.user, self.get_serializer_context())
+        return Response(report)
+
     @extend_schema(
         summary="Assign job to helper",
         description="Assign a job to a helper based on their application",
@@ -362,28 +571,28 @@ class JobViewSet(viewsets.ModelViewSet):
             if job.status != 'open':
                 return Response({'error': 'Only open jobs can be assigned'}, status=status.HTTP_400_BAD_REQUEST)
             
-            # Helper must be verified
-            if not application.helper.is_verified:
+            # Helper must be verified; read from the database, not the query
+            # cache, since a revoked verification must stop the assignment
+            helper = User.objects.get(pk=application.helper_id)
+            if not helper.is_verified:
                 return Response({'error': 'Helper must be verified before being assigned'}, 
                                status=status.HTTP_400_BAD_REQUEST)
             
-            # Update job status and assigned_to
-            job.status = 'assigned'
-            job.assigned_to = application.helper
-            job.save()
-            
-            # Update application status
-            application.status = 'accepted'
-            application.save()
-            
-            # Reject other applications
-            JobApplication.objects.filter(job=job).exclude(id=application_id).update(status='rejected')
-            
-            # Create notification for helper
-            Notification.objects.create(
-                user=application.helper,
-                message=f"You've been assigned to the job '{job.title}'!"
-            )
+            with transaction.atomic():
+                # Update job status and assigned_to
+                job.status = 'assigned'
+                job.assigned_to = helper
+                job.save()
+                
+                # Update application status
+                application.status = 'accepted'
+                application.save()
+                
+                # Reject other applications
+                JobApplication.objects.filter(job=job).exclude(id=application_id).update(status='rejected')
+                
+                # The helper is notified by the outbox worker (see ezyapp/handlers.py)
+                publish('job.assigned', job_id=job.id, title=job.title, helper_id=application.helper_id)
             
             return Response({'success': 'Job assigned successfully'})
             
@@ -404,27 +613,21 @@ class JobViewSet(viewsets.ModelViewSet):
             return Response({'error': 'Only assigned jobs can be marked as complete'}, 
                            status=status.HTTP_400_BAD_REQUEST)
         
-        # Update job status
-        job.status = 'completed'
-        job.save()
-        
-        # Create notification for the other party
-        if request.user == job.user:
-            recipient = job.assigned_to
-            message = f"Job '{job.title}' has been marked as complete by the job poster"
-        else:
-            recipient = job.user
-            message = f"Job '{job.title}' has been marked as complete by the helper"
-        
-        Notification.objects.create(
-            user=recipient,
-            message=message
-        )
+        with transaction.atomic():
+            # Update job status
+            job.status = 'completed'
+            job.save()
+            
+            # The other party is notified by the outbox worker (see ezyapp/handlers.py)
+            publish(
+                'job.completed', job_id=job.id, title=job.title, user_id=job.user_id,
+                assigned_to_id=job.assigned_to_id, completed_by=request.user.id
+            )
         
         return Response({'success': 'Job marked as complete'})
 
 @extend_schema(tags=['applications'])
-class JobApplicationViewSet(viewsets.ModelViewSet):
+class JobApplicationViewSet(BulkRetrieveMixin, FastListMixin, viewsets.ModelViewSet):
     """
     API endpoint for managing job applications.
     
@@ -432,10 +635,12 @@ class JobApplicationViewSet(viewsets.ModelViewSet):
     """
     queryset = JobApplication.objects.all()
     serializer_class = JobApplicationSerializer
+    fast_list_serializer_class = JobApplicationSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['status', 'job']
     ordering_fields = ['created_at']
+    ordering = ['-created_at']
     
     def get_serializer_class(self):
         if self.action in ['retrieve']:
@@ -448,7 +653,7 @@ class JobApplicationViewSet(viewsets.ModelViewSet):
             # Job posters can see applications for their jobs
             return JobApplication.objects.filter(job__user=user)
         # Helpers can see their own applications
-        return JobApplication.objects.filter(applicant=user)
+        return JobApplication.objects.filter(helper=user)
     
     @extend_schema(
         summary="Create job application",
@@ -471,7 +676,7 @@ class JobApplicationViewSet(viewsets.ModelViewSet):
         return super().create(request, *args, **kwargs)
 
 @extend_schema(tags=['reviews'])
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(FastListMixin, viewsets.ModelViewSet):
     """
     API endpoint for managing reviews.
     
@@ -479,10 +684,12 @@ class ReviewViewSet(viewsets.ModelViewSet):
     """
     queryset = Review.objects.all()
     serializer_class = ReviewSerializer
+    fast_list_serializer_class = ReviewSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['reviewer', 'reviewed']
     ordering_fields = ['created_at', 'rating']
+    ordering = ['-created_at']
     
     def get_serializer_class(self):
         if self.action in ['retrieve']:
@@ -495,7 +702,7 @@ class ReviewViewSet(viewsets.ModelViewSet):
         return Review.objects.filter(Q(reviewer=user) | Q(reviewed=user))
 
 @extend_schema(tags=['wallets'])
-class WalletViewSet(viewsets.ReadOnlyModelViewSet):
+class WalletViewSet(SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
     """
     API endpoint for viewing wallet information.
     
@@ -510,18 +717,43 @@ class WalletViewSet(viewsets.ReadOnlyModelViewSet):
             return Wallet.objects.none()
         return Wallet.objects.filter(user=self.request.user)
 
+    @extend_schema(
+        summary="Wallet statement",
+        description=(
+            "Opening and closing balance and the transactions between start (inclusive) and end "
+            "(exclusive). Defaults to the last 30 days; at most WALLET_STATEMENT_MAX_DAYS."
+        ),
+        parameters=[
+            OpenApiParameter('start', str, description='ISO 8601 date-time'),
+            OpenApiParameter('end', str, description='ISO 8601 date-time (default: now)'),
+        ],
+        responses={200: WalletStatementSerializer}
+    )
+    @action(detail=True, methods=['get'])
+    def statement(self, request, pk=None):
+        wallet = self.get_object()
+        query = WalletStatementQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        start, end = query.validated_data['start'], query.validated_data['end']
+
+        statement = get_statement(wallet, start, end)
+        return Response(WalletStatementSerializer(dict(statement, start=start, end=end)).data)
+
 @extend_schema(tags=['transactions'])
-class TransactionViewSet(viewsets.ReadOnlyModelViewSet):
+class TransactionViewSet(FastListMixin, viewsets.ReadOnlyModelViewSet):
     """
     API endpoint for viewing transaction history.
     
     Allows users to view their transaction history with filtering and ordering options.
     """
     serializer_class = TransactionSerializer
+    fast_list_serializer_class = TransactionSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    # Bounded on created_at so Postgres only reads the matching monthly partitions
+    filter_backends = [DateWindowFilter, DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['type', 'reason']
     ordering_fields = ['created_at', 'amount']
+    ordering = ['-created_at']
     queryset = Transaction.objects.none()  # Initialize with empty queryset
     
     def get_queryset(self):
@@ -530,17 +762,20 @@ class TransactionViewSet(viewsets.ReadOnlyModelViewSet):
         return Transaction.objects.filter(wallet__user=self.request.user)
 
 @extend_schema(tags=['notifications'])
-class NotificationViewSet(viewsets.ModelViewSet):
+class NotificationViewSet(FastListMixin, viewsets.ModelViewSet):
     """
     API endpoint for managing notifications.
     
     Allows users to view and manage their notifications.
     """
     serializer_class = NotificationSerializer
+    fast_list_serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    # Bounded on created_at so Postgres only reads the matching monthly partitions
+    filter_backends = [DateWindowFilter, DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['is_read']
     ordering_fields = ['created_at']
+    ordering = ['-created_at']
     queryset = Notification.objects.none()  # Initialize with empty queryset
     
     def get_queryset(self):
@@ -583,3 +818,64 @@ class NotificationViewSet(viewsets.ModelViewSet):
             'message': f'Marked {count} notifications as read',
             'count': count
         })
+
+@extend_schema(tags=['archive'])
+class ArchivedJobViewSet(SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    API endpoint for viewing archived jobs.
+    
+    Settled jobs are moved here by the sweep_jobs command after the retention window.
+    """
+    serializer_class = ArchivedJobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = ['category', 'status', 'job_type']
+    ordering_fields = ['created_at', 'start_time', 'price', 'hourly_rate']
+    ordering = ['-created_at']
+    queryset = ArchivedJob.objects.none()  # Initialize with empty queryset
+    
+    def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return ArchivedJob.objects.none()
+        user = self.request.user
+        if user.user_type == 'poster':
+            return ArchivedJob.objects.filter(user=user)
+        return ArchivedJob.objects.filter(assigned_to=user)
+
+@extend_schema(tags=['archive'])
+class ArchivedJobApplicationViewSet(SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    API endpoint for viewing archived job applications.
+    """
+    serializer_class = ArchivedJobApplicationSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = ['status', 'job_id']
+    ordering_fields = ['created_at']
+    ordering = ['-created_at']
+    queryset = ArchivedJobApplication.objects.none()  # Initialize with empty queryset
+    
+    def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return ArchivedJobApplication.objects.none()
+        user = self.request.user
+        if user.user_type == 'poster':
+            return ArchivedJobApplication.objects.filter(poster=user)
+        return ArchivedJobApplication.objects.filter(helper=user)
+
+@extend_schema(tags=['archive'])
+class ArchivedNotificationViewSet(SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    API endpoint for viewing archived notifications.
+    """
+    serializer_class = ArchivedNotificationSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [filters.OrderingFilter]
+    ordering_fields = ['created_at']
+    ordering = ['-created_at']
+    queryset = ArchivedNotification.objects.none()  # Initialize with empty queryset
+    
+    def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return ArchivedNotification.objects.none()
+        return ArchivedNotification.objects.filter(user=self.request.user)
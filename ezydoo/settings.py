@@ -14,6 +14,7 @@ from pathlib import Path
 from datetime import timedelta
 import os
 import dj_database_url
+from corsheaders.defaults import default_headers
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -34,18 +35,19 @@ ALLOWED_HOSTS = os.environ.get('ALLOWED_HOSTS', 'localhost,127.0.0.1').split(','
 # Application definition
 
 INSTALLED_APPS = [
-    'django.contrib.admin',
+    # Admin modules are autodiscovered on first use (see ezydoo/urls.py)
+    'django.contrib.admin.apps.SimpleAdminConfig',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
+    'whitenoise.runserver_nostatic',
     'django.contrib.staticfiles',
     
     # Third-party apps
     'rest_framework',
     'rest_framework_simplejwt',
     'corsheaders',
-    'drf_yasg',
     'django_filters',
     'drf_spectacular',
     
@@ -55,11 +57,15 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'ezyapp.profiling.ProfilingMiddleware',
+    'ezyapp.middleware.IdempotencyMiddleware',
+    'ezyapp.middleware.RateLimitHeadersMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -95,6 +101,23 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Local memory by default; point CACHE_BACKEND/CACHE_LOCATION at a shared
+# cache (e.g. Redis or Memcached) to share entries between gunicorn workers.
+# The query cache needs a shared one; render.yaml configures Redis.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'ezydoo'),
+    }
+}
+if CACHES['default']['BACKEND'] == 'django.core.cache.backends.locmem.LocMemCache':
+    # Redis and Memcached pass OPTIONS on to their client, which rejects MAX_ENTRIES
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': 20000}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -132,9 +155,45 @@ USE_TZ = True
 STATIC_URL = 'static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
-# Media files (User uploads)
+# collectstatic writes content-hashed, pre-compressed copies that
+# WhiteNoiseMiddleware serves with far-future cache headers
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+WHITENOISE_KEEP_ONLY_HASHED_FILES = True
+
+# Media files (User uploads), served with access checks (see ezyapp/media.py)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Internal nginx location aliased to MEDIA_ROOT; when set, files are sent by
+# the proxy via X-Accel-Redirect instead of by the app server with sendfile()
+MEDIA_ACCEL_REDIRECT = os.environ.get('MEDIA_ACCEL_REDIRECT', '')
+MEDIA_MAX_AGE = int(os.environ.get('MEDIA_MAX_AGE', 60 * 60))
+
+# Query cache (see ezyapp/querycache.py); only used when QUERY_CACHE_ALIAS is a shared backend
+QUERY_CACHE_ALIAS = 'default'
+QUERY_CACHE_TIMEOUT = 300
+QUERY_CACHE_VERSION_TTL = 1.0
+QUERY_CACHE_LOCAL_MAX_ENTRIES = 1000
+
+# Request profiling (see ezyapp/profiling.py)
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 0))
+PROFILING_SAMPLE_MODE = 'sample'
+PROFILING_SAMPLE_INTERVAL = 0.001
+PROFILING_DIR = Path(os.environ.get('PROFILING_DIR', BASE_DIR / 'profiles'))
+PROFILING_MAX_FILES = int(os.environ.get('PROFILING_MAX_FILES', 200))
+
+# Avatars: resized profile pictures (see ezyapp/avatars.py)
+AVATAR_SIZES = {'small': 64, 'medium': 128, 'large': 256}
+# Other sizes /avatars/ renders on request (rate limited by the 'avatars' throttle scope)
+AVATAR_EXTRA_SIZES = (32, 48, 96, 192, 512)
+AVATAR_CACHE_DIR = 'avatar_cache'
+AVATAR_CACHE_MAX_BYTES = int(os.environ.get('AVATAR_CACHE_MAX_BYTES', 256 * 2 ** 20))
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -147,7 +206,7 @@ AUTH_USER_MODEL = 'ezyapp.User'
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'ezyapp.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -158,6 +217,28 @@ REST_FRAMEWORK = {
         'django_filters.rest_framework.DjangoFilterBackend',
     ],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # Token buckets per user (or IP) and scope; see ezyapp/throttling.py
+    'DEFAULT_THROTTLE_CLASSES': (
+        'ezyapp.throttling.EndpointThrottle',
+    ),
+    'DEFAULT_THROTTLE_RATES': {
+        'otp': os.environ.get('THROTTLE_RATE_OTP', '5/hour'),
+        'search': os.environ.get('THROTTLE_RATE_SEARCH', '30/min'),
+        'feed': os.environ.get('THROTTLE_RATE_FEED', '120/min'),
+        'writes': os.environ.get('THROTTLE_RATE_WRITES', '60/min'),
+        # On-demand avatar renderings (cache misses only; see ezyapp/avatars.py)
+        'avatars': os.environ.get('THROTTLE_RATE_AVATARS', '30/min'),
+    },
+    # orjson-backed JSON; falls back to the stock classes when orjson is missing
+    'DEFAULT_RENDERER_CLASSES': (
+        'ezyapp.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'ezyapp.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
 }
 
 # JWT Settings
@@ -171,6 +252,11 @@ SIMPLE_JWT = {
 # CORS Headers
 CORS_ALLOWED_ORIGINS = os.environ.get('CORS_ALLOWED_ORIGINS', 'http://localhost:3000').split(',')
 CORS_ALLOW_CREDENTIALS = True
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
+CORS_EXPOSE_HEADERS = (
+    'Idempotent-Replayed', 'Retry-After',
+    'X-RateLimit-Scope', 'X-RateLimit-Limit', 'X-RateLimit-Remaining', 'X-RateLimit-Reset',
+)
 
 # Security Settings
 if not DEBUG:
@@ -183,20 +269,79 @@ if not DEBUG:
     SECURE_HSTS_INCLUDE_SUBDOMAINS = True
     SECURE_HSTS_PRELOAD = True
 
-# Swagger settings
-SWAGGER_SETTINGS = {
-    'SECURITY_DEFINITIONS': {
-        'Bearer': {
-            'type': 'apiKey',
-            'name': 'Authorization',
-            'in': 'header'
-        }
-    }
-}
-
 # OTP settings
 OTP_EXPIRY_MINUTES = 10
 
+# Maximum ids accepted by the bulk retrieve endpoints
+BULK_RETRIEVE_MAX_IDS = 100
+
+# Archive settings (see the sweep_jobs management command)
+ARCHIVE_RETENTION_DAYS = int(os.environ.get('ARCHIVE_RETENTION_DAYS', 90))
+ARCHIVE_BATCH_SIZE = 500
+
+# Streaming job import (POST /api/jobs/import/)
+JOB_IMPORT_CHUNK_SIZE = 500
+JOB_IMPORT_MAX_ROWS = 50000
+JOB_IMPORT_MAX_ERRORS = 1000
+
+# Bulk user registration (POST /api/users/import/ and the import_users command; see ezyapp/onboarding.py)
+USER_IMPORT_CHUNK_SIZE = 500
+USER_IMPORT_MAX_ROWS = 1000  # per posted import, run by a worker; the command has no limit
+USER_IMPORT_MAX_BODY_SIZE = 2 * 1024 * 1024  # bytes
+USER_IMPORT_MAX_ERRORS = 1000
+USER_IMPORT_MAX_AGE = 60 * 60 * 24  # seconds before an unfinished posted import is failed and its rows dropped
+# Processes hashing passwords in the import_users command (default: the CPU count)
+USER_IMPORT_HASH_WORKERS = int(os.environ.get('USER_IMPORT_HASH_WORKERS', 0)) or None
+
+# Monthly partitions of transactions and notifications on PostgreSQL (see ezyapp/partitions.py)
+PARTITION_MONTHS_AHEAD = 3
+PARTITION_ARCHIVE_DIR = Path(os.environ.get('PARTITION_ARCHIVE_DIR', BASE_DIR / 'partition_archive'))
+# Days listed by /api/transactions/ and /api/notifications/ without ?created_after=
+LIST_DATE_WINDOW_DAYS = 90
+
+# Outbox delivery (see ezyapp/events.py and the process_outbox command)
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_DELAY = 30  # seconds, doubled after each failed attempt
+
+# Idempotency-Key handling for unsafe API requests (see ezyapp/middleware.py)
+IDEMPOTENCY_PATH_PREFIX = '/api/'
+IDEMPOTENCY_KEY_TTL = 60 * 60 * 24  # seconds
+IDEMPOTENCY_LOCK_TIMEOUT = 25  # seconds a retry waits for the original request; below gunicorn's timeout
+# Larger bodies are fingerprinted by length, without buffering them (streamed imports, uploads)
+IDEMPOTENCY_MAX_BODY_SIZE = 64 * 1024
+
+# Throttle bucket store: 'local' (per process) or 'cache' (THROTTLE_CACHE_ALIAS, shared
+# between workers when CACHE_BACKEND is e.g. Redis or Memcached)
+THROTTLE_BACKEND = os.environ.get('THROTTLE_BACKEND', 'local')
+THROTTLE_CACHE_ALIAS = 'default'
+THROTTLE_LOCAL_MAX_KEYS = 10000
+
+# Wallet ledger (see ezyapp/ledger.py)
+LEDGER_BATCH_SIZE = 1000
+WALLET_STATEMENT_MAX_DAYS = 366
+
+# Background tasks (see ezyapp/taskqueue.py and the run_worker command)
+TASK_QUEUES = ('high', 'default', 'low')  # priority order
+TASK_RETRY_DELAY = 10  # seconds, doubled after each failed attempt
+TASK_LOCK_TIMEOUT = 600  # running tasks whose lock is older than this are re-queued
+TASK_HEARTBEAT_INTERVAL = 60  # seconds between lock refreshes of a running task
+TASK_RETENTION_DAYS = 7
+
+# Clustered job map tiles (see ezyapp/maptiles.py)
+MAP_TILE_CELLS = 8  # grid cells per tile side
+MAP_SPARSE_CELL_JOBS = 3  # cells with at most this many jobs list them instead of a cluster
+MAP_MAX_TILES = 64
+MAP_TILE_CACHE_TIMEOUT = 60 * 10
+
+# Job search suggestions (see ezyapp/suggest.py)
+SUGGEST_MAX_WORDS = 8  # word positions of a title or address that queries can start at
+SUGGEST_REBUILD_INTERVAL = 60  # seconds between full background rebuilds of a worker's index
+SUGGEST_MAX_CACHED_QUERIES = 1000
+
+# Pre-generated OpenAPI schema (see the build_schema management command)
+SCHEMA_ROOT = BASE_DIR / 'schema'
+
 # Swagger settings
 SPECTACULAR_SETTINGS = {
     'TITLE': 'EzyDoo API',
@@ -219,6 +364,7 @@ SPECTACULAR_SETTINGS = {
         {'name': 'wallets', 'description': 'Wallet and transaction operations'},
         {'name': 'notifications', 'description': 'Notification operations'},
         {'name': 'documents', 'description': 'Document management operations'},
+        {'name': 'archive', 'description': 'Archived jobs, applications and notifications'},
     ],
     'ENUM_NAME_OVERRIDES': {
         'JobStatusEnum': [
@@ -226,6 +372,7 @@ SPECTACULAR_SETTINGS = {
             ('assigned', 'Assigned'),
             ('completed', 'Completed'),
             ('cancelled', 'Cancelled'),
+            ('expired', 'Expired'),
         ],
         'JobApplicationStatusEnum': [
             ('applied', 'Applied'),
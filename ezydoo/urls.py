@@ -15,20 +15,44 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
+from django.urls.resolvers import RoutePattern, URLResolver
 from django.conf import settings
-from django.conf.urls.static import static
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
+from django.utils.functional import cached_property
+from ezyapp.avatars import AVATAR_URL, serve_avatar
+from ezyapp.media import serve_media
+from ezyapp.profiling import profile_download_view, profile_list_view
+from ezyapp.schema import SchemaView, redoc_view, swagger_view
+
+
+class LazyAdminURLConf:
+    """
+    The admin's URLs, with the ModelAdmin modules imported (autodiscover) the
+    first time an admin URL is resolved or reversed rather than at startup.
+    """
+
+    @cached_property
+    def urlpatterns(self):
+        # Safe to repeat: modules that were already imported are not re-run
+        admin.autodiscover()
+        return admin.site.get_urls()
+
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
+    # Request profiles (see ezyapp/profiling.py)
+    path('admin/profiles/', admin.site.admin_view(profile_list_view), name='profile-list'),
+    path('admin/profiles/<str:profile_id>.<str:fmt>', admin.site.admin_view(profile_download_view),
+         name='profile-download'),
+    # include() would read urlpatterns immediately
+    URLResolver(RoutePattern('admin/'), LazyAdminURLConf(), app_name='admin', namespace=admin.site.name),
     path('api/', include('ezyapp.urls')),
-    # API Schema URLs
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
-    path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
-    path('', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
+    # API Schema URLs (pre-generated by `manage.py build_schema`; see ezyapp/schema.py)
+    path('api/schema/', SchemaView.as_view(), name='schema'),
+    re_path(r'^api/schema/(?P<digest>[0-9a-f]+)\.(?P<fmt>json|yaml)$', SchemaView.as_view(), name='schema-hashed'),
+    path('api/docs/', swagger_view, name='swagger-ui'),
+    path('', redoc_view, name='redoc'),
+    # Resized profile pictures (see ezyapp/avatars.py)
+    path(AVATAR_URL.lstrip('/') + '<int:user_id>/<int:size>.<str:fmt>', serve_avatar, name='avatar'),
+    # Uploaded files, with access checks (see ezyapp/media.py)
+    re_path(r'^%s(?P<path>.+)$' % settings.MEDIA_URL.lstrip('/'), serve_media, name='media'),
 ]
-
-# Serve media files in development
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -0,0 +1,67 @@
+"""
+Pre-fork warm-up for gunicorn's ``preload_app`` mode.
+
+With preloading, the master imports the application once and forks its
+workers from it, so code and data loaded before the fork are shared between
+workers copy-on-write instead of being loaded again in each one. ``warm_up``
+loads what the first requests would otherwise load lazily in every worker:
+the API URLconf (and with it the views and serializers), the compiled
+values-based list readers and the model field caches. It then closes any
+database connections (a forked worker must never reuse the master's) and
+freezes the garbage collector, moving everything allocated so far into a
+permanent generation that collections in the workers never scan, and so
+never touch, which would otherwise copy those pages into every worker.
+
+The admin and the schema generator are not warmed: both load on their first
+use (see ezydoo/urls.py).
+"""
+import gc
+import logging
+import time
+from importlib import import_module
+
+from django.apps import apps
+from django.db import connections
+from django.urls import resolve
+
+logger = logging.getLogger(__name__)
+
+WARMUP_PATHS = ('/api/', '/api/auth/token/')
+
+
+def warm_viewsets(urlconf_patterns):
+    """Compile the fast list readers and field maps of the routed viewsets."""
+    from ezyapp.fast_serializers import get_values_serializer
+
+    for pattern in urlconf_patterns:
+        if hasattr(pattern, 'url_patterns'):
+            warm_viewsets(pattern.url_patterns)
+            continue
+        viewset = getattr(pattern.callback, 'cls', None)
+        if viewset is None:
+            continue
+        fast_list_serializer_class = getattr(viewset, 'fast_list_serializer_class', None)
+        if fast_list_serializer_class is not None:
+            get_values_serializer(fast_list_serializer_class)
+        serializer_class = getattr(viewset, 'serializer_class', None)
+        if serializer_class is not None:
+            # Building the fields runs ModelSerializer's model introspection
+            serializer_class().fields
+
+
+def warm_up(freeze=True):
+    """Load the request path's modules and caches; with ``freeze``, prepare for forking."""
+    started = time.perf_counter()
+    for path in WARMUP_PATHS:
+        resolve(path)
+    # Only the API: walking the root URLconf would load the admin
+    warm_viewsets(import_module('ezyapp.urls').urlpatterns)
+    for model in apps.get_models():
+        model._meta.get_fields()
+        model._meta._relation_tree
+
+    connections.close_all()
+    if freeze:
+        gc.collect()
+        gc.freeze()
+    logger.info('Warm-up finished in %.2fs (%d objects frozen)', time.perf_counter() - started, gc.get_freeze_count())
@@ -9,9 +9,8 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
 
 import os
 from django.core.wsgi import get_wsgi_application
-from whitenoise import WhiteNoise
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ezydoo.settings')
 
+# Static files are served by WhiteNoiseMiddleware (see settings.MIDDLEWARE)
 application = get_wsgi_application()
-application = WhiteNoise(application, root='staticfiles/')
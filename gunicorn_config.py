@@ -1,16 +1,22 @@
 import multiprocessing
+import os
 
 # Server socket
 bind = "0.0.0.0:8000"
 backlog = 2048
 
 # Worker processes
-workers = multiprocessing.cpu_count() * 2 + 1
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
 worker_class = 'sync'
 worker_connections = 1000
 timeout = 30
 keepalive = 2
 
+# Preloading: load the app once in the master and fork workers from it, so
+# they share its memory copy-on-write and start without importing anything
+# (see ezydoo/warmup.py). Set GUNICORN_PRELOAD=False to load per worker.
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'True') == 'True'
+
 # Logging
 accesslog = '-'
 errorlog = '-'
@@ -21,4 +27,16 @@ proc_name = 'ezydoo'
 
 # SSL
 # keyfile = '/path/to/keyfile'
-# certfile = '/path/to/certfile' 
\ No newline at end of file
+# certfile = '/path/to/certfile' 
+
+
+def when_ready(server):
+    if server.cfg.preload_app:
+        from ezydoo.warmup import warm_up
+        warm_up(freeze=True)
+
+
+def post_worker_init(worker):
+    if not worker.cfg.preload_app:
+        from ezydoo.warmup import warm_up
+        warm_up(freeze=False)